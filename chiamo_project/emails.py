@@ -0,0 +1,139 @@
+# chiamo_project/emails.py
+"""
+Outgoing email: cached rendering and SMTP connection reuse.
+
+Rendering: compiled templates are looked up once per process (lru_cache on
+top of Django's cached loader, so template edits need a restart) and the
+context shared by every email (domain, year, support address) comes from
+base_context(). If a `<name>.txt` template exists next to the HTML one it is
+rendered for the plain-text part, which is much cheaper than running the
+HTML through strip_tags.
+
+Delivery: send_messages() sends every message over one SMTP session and
+reports a result per message, so one refused recipient doesn't fail (and get
+resent with) the rest. Each thread (job worker threads, the outbox
+dispatcher) keeps that session open between calls for
+EMAIL_CONNECTION_IDLE_SECONDS, so back-to-back jobs skip the TCP/TLS/AUTH
+handshake too. A session the server has dropped is reopened once per message
+before that message counts as failed.
+"""
+import datetime
+import smtplib
+import threading
+import time
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.template import TemplateDoesNotExist
+from django.template.loader import get_template
+from django.utils.html import strip_tags
+
+SUPPORT_EMAIL = "support@chiamoorder.com"
+
+_local = threading.local()
+
+
+# ---------------- Rendering ----------------
+@lru_cache(maxsize=None)
+def _template(name):
+    return get_template(name)
+
+
+@lru_cache(maxsize=None)
+def _text_template(html_name):
+    try:
+        return get_template(html_name.rsplit(".", 1)[0] + ".txt")
+    except TemplateDoesNotExist:
+        return None
+
+
+def base_context():
+    """Values every template may use; `year` is the only part that can change."""
+    return {
+        "domain": settings.EMAIL_SITE_URL,
+        "support_email": SUPPORT_EMAIL,
+        "year": datetime.date.today().year,
+    }
+
+
+def render_email(template_name, context):
+    """Return (html, text) for an HTML template and its optional .txt sibling."""
+    context = {**base_context(), **context}
+    html = _template(template_name).render(context)
+    text_template = _text_template(template_name)
+    text = text_template.render(context) if text_template else strip_tags(html)
+    return html, text
+
+
+def build_email(subject, template_name, context, to, from_email=None):
+    """An unsent multipart message; pass a list of them to send_messages()."""
+    html, text = render_email(template_name, context)
+    message = EmailMultiAlternatives(subject, text, from_email or settings.DEFAULT_FROM_EMAIL, to)
+    message.attach_alternative(html, "text/html")
+    return message
+
+
+# ---------------- Delivery ----------------
+def _connection():
+    connection = getattr(_local, "connection", None)
+    idle = time.monotonic() - getattr(_local, "last_used", 0)
+    if connection is not None and idle > settings.EMAIL_CONNECTION_IDLE_SECONDS:
+        close_connection()
+        connection = None
+    if connection is None:
+        connection = get_connection()
+        connection.open()
+        _local.connection = connection
+    return connection
+
+
+def close_connection():
+    """Close this thread's SMTP session, if any."""
+    connection = getattr(_local, "connection", None)
+    _local.connection = None
+    if connection is not None:
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+
+def _send_one(message):
+    try:
+        _connection().send_messages([message])
+    except (smtplib.SMTPServerDisconnected, ConnectionError):
+        # server dropped the idle session: reconnect once
+        close_connection()
+        _connection().send_messages([message])
+    finally:
+        _local.last_used = time.monotonic()
+
+
+def send_messages(messages):
+    """
+    Send messages over this thread's shared connection, one SMTP transaction each.
+    Returns one result per message, in order: None if it was sent, else the exception.
+    """
+    results = []
+    for message in messages:
+        try:
+            _send_one(message)
+        except Exception as exc:  # SMTPRecipientsRefused, a dead server, ...
+            close_connection()  # don't reuse a session in an unknown state
+            results.append(exc)
+        else:
+            results.append(None)
+    return results
+
+
+def send_message(message):
+    """Send one message; raises if it wasn't sent (so a job is retried)."""
+    error = send_messages([message])[0]
+    if error is not None:
+        raise error
+
+
+def send_email(subject, template_name, context, to):
+    """Render and send one templated email; raises if it wasn't sent."""
+    send_message(build_email(subject, template_name, context, to))
@@ -0,0 +1,45 @@
+# chiamo_project/permissions.py
+
+from rest_framework.permissions import BasePermission
+
+
+def user_in_groups(user, group_names):
+    """True for superusers and members of any of the given groups."""
+    if not user or not user.is_authenticated:
+        return False
+    if user.is_superuser:
+        return True
+    return user.groups.filter(name__in=group_names).exists()
+
+
+class GroupPermission(BasePermission):
+    """Allow superusers and members of `group_names` (see manage_roles.py)."""
+    group_names = ()
+
+    def has_permission(self, request, view):
+        return user_in_groups(request.user, self.group_names)
+
+
+class IsInvoicerAdmin(GroupPermission):
+    """Invoicing staff: exports and sales reports."""
+    group_names = ("InvoicerAdmin",)
+
+
+class IsLogisticsAdmin(GroupPermission):
+    """Logistics staff: fulfilment and delivery planning."""
+    group_names = ("LogisticsAdmin",)
+
+
+class IsSalesExecutive(GroupPermission):
+    """Field sales: nearby-shop lookups."""
+    group_names = ("SalesExecutive",)
+
+
+class IsStaffRole(GroupPermission):
+    """Django staff and every back-office group: customer lookups."""
+    group_names = ("InvoicerAdmin", "LogisticsAdmin", "SalesExecutive")
+
+    def has_permission(self, request, view):
+        if request.user and request.user.is_authenticated and request.user.is_staff:
+            return True
+        return super().has_permission(request, view)
@@ -45,6 +45,7 @@ INSTALLED_APPS = [
     'customers',
     'products',
     'orders',
+    'jobs',
 ]
 
 # ============ CUSTOM USER MODEL ============
@@ -97,7 +98,10 @@ if DATABASE_URL:
     DATABASES = {
         'default': dj_database_url.config(
             default=DATABASE_URL,
-            conn_max_age=600,
+            # 0 for the ASGI web process: each request's sync code runs in its own
+            # executor thread, so persistent connections would pile up one per
+            # request. The long-running worker/jobs processes set it (Procfile).
+            conn_max_age=int(os.getenv('DB_CONN_MAX_AGE', 0)),
             conn_health_checks=True,
         )
     }
@@ -140,6 +144,8 @@ STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 # ============ MEDIA FILES ============
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
+# customers/qr.py: customer QR codes encode <QR_CODE_BASE_URL>/user/<id>
+QR_CODE_BASE_URL = os.getenv('QR_CODE_BASE_URL', 'https://yourfrontend.com')
 
 # ============ DEFAULT PRIMARY KEY ============
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
@@ -147,7 +153,7 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # ============ REST FRAMEWORK ============
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'customers.authentication.CachedJWTAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
@@ -167,6 +173,11 @@ REST_FRAMEWORK = {
     ],
 }
 
+# ============ BATCH API ============
+# POST /api/batch/ (chiamo_project/views.py)
+BATCH_MAX_REQUESTS = 10
+BATCH_MAX_RESPONSE_BYTES = 1024 * 1024
+
 # ============ JWT SETTINGS ============
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=30),
@@ -177,7 +188,20 @@ SIMPLE_JWT = {
     'ALGORITHM': 'HS256',
     'SIGNING_KEY': SECRET_KEY,
     'AUTH_HEADER_TYPES': ('Bearer',),
+    'TOKEN_REFRESH_SERIALIZER': 'customers.tokens.TokenRefreshSerializer',
 }
+# customers/auth_cache.py (with REDIS_URL): request.user is served from the cache
+# instead of one query per request; the local per-process copy may lag a save by this many seconds
+AUTH_USER_CACHE_SECONDS = 300
+AUTH_USER_LOCAL_CACHE_SECONDS = 5
+AUTH_USER_LOCAL_CACHE_SIZE = 2048
+# customers/tokens.py (with REDIS_URL): blacklist Bloom filter per expiry day
+# (2**23 bits = 1 MB, ~1% false positives at 870k rotations/day), and how many
+# queued rotation rows / how old the oldest may be before they are written
+TOKEN_BLACKLIST_BLOOM_BITS = 2 ** 23
+TOKEN_BLACKLIST_BLOOM_HASHES = 7
+TOKEN_WRITE_BATCH_SIZE = 200
+TOKEN_WRITE_MAX_DELAY_SECONDS = 30
 
 # ============ CORS SETTINGS ============
 # Get frontend URL from environment
@@ -256,6 +280,86 @@ AXES_LOCKOUT_PARAMETERS = ['username', 'ip_address']
 AXES_RESET_ON_SUCCESS = True
 AXES_ENABLE_ADMIN = True
 AXES_HANDLER = 'axes.handlers.database.AxesDatabaseHandler'
+# customers/login.py (API login): with Redis, failures are counted in the cache
+# with the limits above and logged to AccessFailureLog in batches; without it,
+# lockout goes through AXES_HANDLER (database)
+LOGIN_FAILURE_BATCH_SIZE = 100
+LOGIN_FAILURE_FLUSH_SECONDS = 5
+# customers/otp.py: password-reset codes live in the cache (Redis) or the OneTimeCode table
+OTP_TTL_SECONDS = 600
+OTP_MAX_ATTEMPTS = 5
+
+# ============ FULFILMENT QUEUE ============
+FULFILMENT_LEASE_SECONDS = int(os.getenv('FULFILMENT_LEASE_SECONDS', 900))
+FULFILMENT_MAX_BATCH_SIZE = 50
+FULFILMENT_MAX_LEASE_SECONDS = 8 * 60 * 60  # one shift
+ORDER_PROGRESS_STEPS = 5  # steps of the app's order tracker; Order.progress is 1..this
+
+# ============ DELIVERY ROUTING ============
+# orders/routing.py: vans leave from and return to the depot
+ROUTE_DEPOT_LAT = float(os.getenv('ROUTE_DEPOT_LAT', 6.5244))
+ROUTE_DEPOT_LNG = float(os.getenv('ROUTE_DEPOT_LNG', 3.3792))
+ROUTE_VEHICLE_CAPACITY = int(os.getenv('ROUTE_VEHICLE_CAPACITY', 25))  # stops per van
+ROUTE_MAX_STOPS = 5000
+ROUTE_MAX_CAPACITY = 500  # stops per run: bounds the per-run distance matrix and 2-opt time
+
+# ============ ORDER ARCHIVE ============
+# Closed orders older than this move to the archive tables (manage.py archive_orders)
+ORDER_ARCHIVE_AFTER_DAYS = int(os.getenv('ORDER_ARCHIVE_AFTER_DAYS', 90))
+
+# ============ NOTIFICATION STREAM ============
+# orders/views.py: lifetime of the ?ticket= used to open the SSE stream
+NOTIFICATION_STREAM_TICKET_SECONDS = 30
+NOTIFICATION_STREAM_RECHECK_SECONDS = 60  # account re-check on an open stream
+
+# ============ OUTBOX ============
+# Order events are delivered by `manage.py dispatch_outbox` (see Procfile worker)
+OUTBOX_BATCH_SIZE = 100
+OUTBOX_MAX_ATTEMPTS = int(os.getenv('OUTBOX_MAX_ATTEMPTS', 8))
+OUTBOX_POLL_SECONDS = float(os.getenv('OUTBOX_POLL_SECONDS', 1))
+OUTBOX_CLAIM_SECONDS = 300  # a claimed batch is hidden from other dispatchers this long
+# batch handlers (SMTP) get at most this many events per call, and the claim is
+# renewed before each call: 5 emails at EMAIL_TIMEOUT per SMTP step fit in it
+OUTBOX_HANDLER_CHUNK_SIZE = 5
+
+# ============ BACKGROUND JOBS ============
+# Emails and SMS run in `manage.py run_jobs` (see Procfile), not in the request
+JOBS_THREADS = int(os.getenv('JOBS_THREADS', 8))
+JOBS_MAX_ATTEMPTS = 5
+JOBS_BACKOFF_SECONDS = 10
+JOBS_MAX_BACKOFF_SECONDS = 60 * 60
+JOBS_POLL_SECONDS = float(os.getenv('JOBS_POLL_SECONDS', 1))
+JOBS_STALE_SECONDS = 60 * 10  # a running job without a heartbeat this long is assumed orphaned
+JOBS_HEARTBEAT_SECONDS = 60  # how often a worker refreshes locked_at on the jobs it is running
+
+# ============ SMS (TERMII) ============
+TERMII_API_KEY = os.getenv('TERMII_API_KEY')
+TERMII_BASE_URL = os.getenv('TERMII_BASE_URL', 'https://api.ng.termii.com')
+TERMII_SENDER_ID = os.getenv('TERMII_SENDER_ID', 'ChiamoOrder')
+TERMII_CONNECT_TIMEOUT = 3.05
+TERMII_READ_TIMEOUT = float(os.getenv('TERMII_READ_TIMEOUT', 10))
+TERMII_MAX_RETRIES = 3
+TERMII_POOL_SIZE = JOBS_THREADS  # one warm connection per job thread
+TERMII_BREAKER_THRESHOLD = 5  # consecutive failures before we stop calling Termii
+TERMII_BREAKER_RESET_SECONDS = 30
+
+# ============ EMAIL SETTINGS ============
+EMAIL_BACKEND = os.getenv('EMAIL_BACKEND', 'django.core.mail.backends.smtp.EmailBackend')
+EMAIL_HOST = os.getenv('EMAIL_HOST', 'smtp.gmail.com')
+EMAIL_PORT = int(os.getenv('EMAIL_PORT', 587))
+EMAIL_USE_TLS = os.getenv('EMAIL_USE_TLS', 'True') == 'True'
+EMAIL_HOST_USER = os.getenv('EMAIL_HOST_USER', '')
+EMAIL_HOST_PASSWORD = os.getenv('EMAIL_HOST_PASSWORD', '')
+EMAIL_TIMEOUT = 10
+DEFAULT_FROM_EMAIL = os.getenv('DEFAULT_FROM_EMAIL', 'ChiamoOrder <chiamoorder@gmail.com>')
+# chiamo_project/emails.py: how long an idle worker thread keeps its SMTP session open
+EMAIL_CONNECTION_IDLE_SECONDS = 60
+EMAIL_SITE_URL = os.getenv('EMAIL_SITE_URL', 'http://127.0.0.1:8000')  # {{ domain }} in email templates
+
+# ============ CAMPAIGNS ============
+# customers/campaigns.py: in-flight SMS requests, and Termii's allowed send rate
+CAMPAIGN_CONCURRENCY = int(os.getenv('CAMPAIGN_CONCURRENCY', 50))
+CAMPAIGN_SMS_RATE_PER_SECOND = float(os.getenv('CAMPAIGN_SMS_RATE_PER_SECOND', 100))
 
 # ============ CACHE SETTINGS ============
 REDIS_URL = os.getenv('REDIS_URL')
@@ -9,6 +9,8 @@ from rest_framework_simplejwt.views import (
     TokenRefreshView,
 )
 
+from .views import BatchView, BootstrapView
+
 urlpatterns = [
     path("admin/", admin.site.urls),
 
@@ -16,6 +18,8 @@ urlpatterns = [
     path("api/customers/", include("customers.urls")),
     path("api/products/", include("products.urls")),
     path("api/orders/", include("orders.urls")),
+    path("api/bootstrap/", BootstrapView.as_view(), name="bootstrap"),
+    path("api/batch/", BatchView.as_view(), name="batch"),
     
 
     # ✅ JWT authentication endpoints
@@ -1,5 +1,6 @@
 # chiamo_project/utils.py
 
+from django.conf import settings
 from django.http import JsonResponse
 
 
@@ -13,4 +14,18 @@ def axes_lockout_response(request, credentials, *args, **kwargs):
                       'Please try again in 30 minutes.',
             'retry_after': 1800
         }
-    }, status=403)
\ No newline at end of file
+    }, status=403)
+
+PROCESS_LOCAL_CACHES = (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+)
+
+
+def cache_is_shared(alias="default"):
+    """
+    True when every web and worker process sees the same cache (Redis in
+    production). Without REDIS_URL the cache is a per-process LocMemCache,
+    which must not hold state another process has to read.
+    """
+    return settings.CACHES[alias]["BACKEND"] not in PROCESS_LOCAL_CACHES
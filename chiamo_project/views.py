@@ -0,0 +1,170 @@
+# chiamo_project/views.py
+import asyncio
+import copy
+import json
+import logging
+from decimal import Decimal
+from io import BytesIO
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.db.models import Count, DecimalField, Prefetch, Sum, Value
+from django.db.models.functions import Coalesce
+from django.http import HttpResponse, QueryDict
+from django.urls import Resolver404, resolve
+from rest_framework import permissions, status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from customers.qr import ensure_qr_code
+from customers.serializers import ProfileUpdateSerializer
+from orders import notifications
+from orders.models import Cart, CartItem, Notification, Order, SmartList, SmartListItem
+from orders.serializers import CartSerializer, NotificationSerializer, SmartListSerializer
+
+logger = logging.getLogger(__name__)
+
+
+# ---------------- APP BOOTSTRAP ---------------- #
+class BootstrapView(APIView):
+    """
+    GET /api/bootstrap/
+    Everything the app shows on launch, in one round trip:
+    { profile, cart, smartlists, notifications: { unread, recent }, summary: { total_orders, total_spent } }
+
+    Same payloads as ProfileView, CartView, SmartListListCreateAPIView,
+    NotificationListView (first page) and OrderSummaryView. The number of
+    queries is fixed however many items, lists or orders the user has: every
+    relation is prefetched, the summary is one aggregate and the unread count
+    one counter-row lookup.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        user = request.user
+        context = {"request": request}
+
+        ensure_qr_code(user)  # no query once the QR code exists
+        cart = self.get_cart(user)
+        smartlists = (
+            SmartList.objects.filter(user=user)
+            .prefetch_related(Prefetch("items", SmartListItem.objects.select_related("product")))
+            .order_by("-created_at")
+        )
+        recent = Notification.objects.filter(user=user).order_by("-created_at")[:settings.REST_FRAMEWORK["PAGE_SIZE"]]
+        summary = Order.objects.filter(user=user).aggregate(
+            total_orders=Count("id"),
+            total_spent=Coalesce(Sum("total"), Value(Decimal("0")), output_field=DecimalField()),
+        )
+
+        return Response({
+            "profile": ProfileUpdateSerializer(user).data,  # relative qr_code URL, as ProfileView
+            "cart": CartSerializer(cart, context=context).data,
+            "smartlists": SmartListSerializer(smartlists, many=True, context=context).data,
+            "notifications": {
+                "unread": notifications.unread_count(user),
+                "recent": NotificationSerializer(recent, many=True, context=context).data,
+            },
+            "summary": summary,
+        }, status=status.HTTP_200_OK)
+
+    @staticmethod
+    def get_cart(user):
+        items = Prefetch("items", CartItem.objects.select_related("product"))
+        cart = Cart.objects.filter(user=user).prefetch_related(items).first()
+        if cart is None:
+            cart, _ = Cart.objects.get_or_create(user=user)
+        return cart
+
+
+# ---------------- BATCH ---------------- #
+class BatchView(APIView):
+    """
+    POST /api/batch/
+    payload: { requests: ["/api/orders/summary/", "/api/products/12/", ...] }
+    -> { responses: [ { path, status, body }, ... ] }  (same order as requested)
+
+    Runs several GET requests in one round trip. Each path is resolved and
+    its view called directly. The middleware stack has already run once for
+    the batch. The user authenticated here is handed to every subrequest
+    (DRF's forced authentication), so the token is checked once. Throttles
+    and permissions of each view still apply.
+
+    At most BATCH_MAX_REQUESTS paths, and the bodies together stay within
+    BATCH_MAX_RESPONSE_BYTES: an entry whose body would cross it is a 413,
+    and once the limit is reached the remaining paths aren't run. Streaming and
+    async views (exports, the notification stream) can't be batched.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        paths = request.data.get("requests") if isinstance(request.data, dict) else None
+        if not isinstance(paths, list) or not paths or not all(isinstance(p, str) for p in paths):
+            return Response({"error": "requests must be a non-empty list of paths"}, status=status.HTTP_400_BAD_REQUEST)
+        if len(paths) > settings.BATCH_MAX_REQUESTS:
+            return Response(
+                {"error": f"At most {settings.BATCH_MAX_REQUESTS} requests per batch"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        parts, size = [], 0
+        too_large = json.dumps({"error": "Batch response size limit reached"}).encode()
+        for path in paths:
+            code, body = 413, too_large
+            if size < settings.BATCH_MAX_RESPONSE_BYTES:
+                sub_code, sub_body = self.dispatch_get(request, path)
+                if not isinstance(sub_body, bytes):
+                    sub_body = json.dumps(sub_body).encode()
+                # an entry that would take the batch past the limit is dropped too
+                if size + len(sub_body) <= settings.BATCH_MAX_RESPONSE_BYTES:
+                    code, body = sub_code, sub_body
+                    size += len(body)
+            # bodies are already JSON: splice them in rather than decode and re-encode
+            parts.append(b'{"path":%s,"status":%d,"body":%s}' % (json.dumps(path).encode(), code, body))
+
+        return HttpResponse(b'{"responses":[' + b",".join(parts) + b"]}", content_type="application/json")
+
+    def dispatch_get(self, request, path):
+        """Run one GET subrequest; returns (status, body as JSON bytes or a dict)."""
+        url = urlsplit(path)
+        if url.scheme or url.netloc or not url.path.startswith("/api/"):
+            return 400, {"error": "Only relative /api/ paths can be batched"}
+        try:
+            match = resolve(url.path)
+        except Resolver404:
+            return 404, {"error": "Not found"}
+        view_class = getattr(match.func, "view_class", None) or getattr(match.func, "cls", None)
+        if view_class is BatchView or asyncio.iscoroutinefunction(match.func):
+            return 400, {"error": "This endpoint can't be batched"}
+
+        # a copy keeps the WSGI/ASGI request class, so scheme and host work as for the batch itself
+        sub = copy.copy(request._request)
+        for cached in ("_body", "_post", "_files"):
+            sub.__dict__.pop(cached, None)
+        sub.method = "GET"
+        sub.path = sub.path_info = url.path
+        sub.META = {
+            **request.META,
+            "REQUEST_METHOD": "GET",
+            "PATH_INFO": url.path,
+            "QUERY_STRING": url.query,
+            "CONTENT_LENGTH": "0",
+        }
+        sub.META.pop("CONTENT_TYPE", None)
+        sub.GET = QueryDict(url.query)
+        sub._stream, sub._read_started = BytesIO(), False
+        sub.resolver_match = match
+        sub.user = request.user
+        sub._force_auth_user, sub._force_auth_token = request.user, request.auth  # no second token check
+
+        try:
+            response = match.func(sub, *match.args, **match.kwargs)
+            if hasattr(response, "render"):
+                response.render()
+        except Exception:
+            logger.exception("Batched request to %s failed", path)
+            return 500, {"error": "Internal server error"}
+
+        if response.streaming or "json" not in response.get("Content-Type", ""):
+            return 400, {"error": "This endpoint can't be batched"}
+        return response.status_code, response.content or b"null"
@@ -1,6 +1,7 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
-from .models import User, Address
+from . import search
+from .models import User, Address, Campaign, CampaignDelivery
 
 
 @admin.register(User)
@@ -14,8 +15,10 @@ class UserAdmin(BaseUserAdmin):
     # Fields to display in the admin list
     list_display = ("id", "business_name", "email", "phone", "has_pin", "timestamp")
     list_filter = ("has_pin", "timestamp")
-    search_fields = ("business_name", "email", "phone")
+    search_fields = ("business_name", "email", "phone")  # matching is done by get_search_results
+    search_help_text = "Business name, email or phone number (any format)"
     ordering = ("-timestamp",)
+    show_full_result_count = False  # skip the extra COUNT(*) over the whole table
 
     # Fields shown in the edit form
     fieldsets = (
@@ -40,6 +43,12 @@ class UserAdmin(BaseUserAdmin):
 
     filter_horizontal = ("groups", "user_permissions")
 
+    def get_search_results(self, request, queryset, search_term):
+        """Indexed search (customers/search.py) instead of icontains over every search field."""
+        if not search_term.strip():
+            return queryset, False
+        return search.search_customers(queryset, search_term), False
+
     # --- Permission Control ---
     def has_module_permission(self, request):
         """Can this user see the 'Customers' section in admin?"""
@@ -81,3 +90,28 @@ class AddressAdmin(admin.ModelAdmin):
         ('Settings', {'fields': ('is_default',)}),
         ('Timestamps', {'fields': ('created_at', 'updated_at')}),
     )
+
+
+# ------------------------------
+# Campaigns (sent by manage.py run_campaign)
+# ------------------------------
+@admin.register(Campaign)
+class CampaignAdmin(admin.ModelAdmin):
+    list_display = ("name", "channel", "status", "sent_count", "failed_count", "created_at")
+    list_filter = ("channel", "status")
+    search_fields = ("name", "message")
+    readonly_fields = ("sent_count", "failed_count", "last_user_id", "started_at", "finished_at")
+    actions = ["pause"]
+
+    @admin.action(description="Pause selected campaigns")
+    def pause(self, request, queryset):
+        count = queryset.filter(status="running").update(status="paused")
+        self.message_user(request, f"{count} campaigns will pause after their current chunk")
+
+
+@admin.register(CampaignDelivery)
+class CampaignDeliveryAdmin(admin.ModelAdmin):
+    list_display = ("campaign", "recipient", "status", "detail", "created_at")
+    list_filter = ("status", "campaign")
+    search_fields = ("recipient",)
+    raw_id_fields = ("campaign", "user")
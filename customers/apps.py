@@ -4,3 +4,14 @@ from django.apps import AppConfig
 class CustomersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'customers'
+
+    def ready(self):
+        from django.conf import settings
+        from django.db.models.signals import post_save
+        from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+        from .tokens import blacklisted_token_saved
+
+        if settings.REDIS_URL:
+            # tokens blacklisted outside customers/tokens.py (admin, shell) must reach the filter too
+            post_save.connect(blacklisted_token_saved, sender=BlacklistedToken)
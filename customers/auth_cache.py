@@ -0,0 +1,106 @@
+# customers/auth_cache.py
+"""
+Cache of authenticated users for CachedJWTAuthentication.
+
+Each user has a version stamp in the shared cache (Redis in production). The
+user row is cached under `auth:user:<id>:<stamp>`, and every process also
+keeps a small LRU of recent users for AUTH_USER_LOCAL_CACHE_SECONDS.
+User.save() and User.delete() replace the stamp, so every cached copy of the
+old row stops being used at once. The local copies in other processes can
+live on for at most the local TTL (a few seconds).
+
+The stamp is read before the row is loaded from the database and the row is
+stored under that stamp. If a save lands in between, the stale row goes in
+under the old stamp and is never read.
+
+Without a shared cache (no REDIS_URL) nothing is cached: a stamp bumped in a
+per-process LocMemCache would only reach the worker that saved the user, and
+the others would keep serving the old row. get_user() then always misses and
+returns no stamp, and set_user() does nothing.
+"""
+import pickle
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+
+from chiamo_project.utils import cache_is_shared
+
+_local = OrderedDict()  # user id -> (expires_at, stamp, pickled user)
+_lock = threading.Lock()
+
+
+def _stamp_key(user_id):
+    return f"auth:stamp:{user_id}"
+
+
+def _user_key(user_id, stamp):
+    return f"auth:user:{user_id}:{stamp}"
+
+
+def _remember(user_id, stamp, data):
+    with _lock:
+        _local[user_id] = (time.monotonic() + settings.AUTH_USER_LOCAL_CACHE_SECONDS, stamp, data)
+        _local.move_to_end(user_id)
+        while len(_local) > settings.AUTH_USER_LOCAL_CACHE_SIZE:
+            _local.popitem(last=False)
+
+
+def current_stamp(user_id):
+    stamp = cache.get(_stamp_key(user_id))
+    if stamp is None:
+        cache.add(_stamp_key(user_id), uuid.uuid4().hex[:12], None)
+        stamp = cache.get(_stamp_key(user_id))
+    return stamp
+
+
+def get_user(user_id):
+    """
+    Returns (user, stamp). `user` is None on a miss; load it from the database
+    and pass it to set_user() together with the returned stamp.
+    Every hit is a fresh copy, so views may modify request.user freely.
+    """
+    if not cache_is_shared():
+        return None, None
+    user_id = str(user_id)
+    with _lock:
+        entry = _local.get(user_id)
+        if entry is not None and entry[0] > time.monotonic():
+            _local.move_to_end(user_id)
+            return pickle.loads(entry[2]), entry[1]
+
+    stamp = current_stamp(user_id)
+    data = cache.get(_user_key(user_id, stamp))
+    if data is None:
+        return None, stamp
+    _remember(user_id, stamp, data)
+    return pickle.loads(data), stamp
+
+
+def set_user(user, stamp):
+    if stamp is None:  # no shared cache
+        return
+    user_id = str(user.pk)
+    data = pickle.dumps(user)
+    cache.set(_user_key(user_id, stamp), data, settings.AUTH_USER_CACHE_SECONDS)
+    _remember(user_id, stamp, data)
+
+
+def invalidate_user(user_id):
+    """Drop every cached copy of this user (called when the row changes)."""
+    user_id = str(user_id)
+    cache.set(_stamp_key(user_id), uuid.uuid4().hex[:12], None)
+    with _lock:
+        _local.pop(user_id, None)
+
+
+def invalidate_users(user_ids):
+    """invalidate_user() for many users in one cache round trip (after bulk_update)."""
+    user_ids = [str(user_id) for user_id in user_ids]
+    cache.set_many({_stamp_key(user_id): uuid.uuid4().hex[:12] for user_id in user_ids}, None)
+    with _lock:
+        for user_id in user_ids:
+            _local.pop(user_id, None)
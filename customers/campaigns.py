@@ -0,0 +1,232 @@
+# customers/campaigns.py
+"""
+Campaign sender: one SMS or email per customer, sent concurrently.
+
+Recipients are read in primary-key order, one chunk at a time (keyset
+pagination on `pk > last_user_id`), so memory is bounded by the chunk size.
+Each chunk is sent with asyncio: a semaphore caps in-flight requests and a
+token bucket, spent by the client on retries too, keeps us under the
+provider's rate limit. The chunk's outcomes are then written with one bulk
+INSERT into CampaignDelivery, in the same transaction as the cursor advance.
+Re-running a paused or failed campaign therefore resumes after the last
+committed chunk, and recipients who already have a delivery row are skipped,
+so nobody is messaged twice.
+
+If the Termii circuit breaker opens mid-run, the campaign is paused and the
+recipients it could not attempt are left for the next run.
+
+SMS go through AsyncTermiiClient. Email goes over SMTP, so each chunk is
+handed to chiamo_project.emails on a worker thread and sent over one
+connection.
+"""
+import asyncio
+import logging
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from chiamo_project import emails
+
+from .models import Campaign, CampaignDelivery
+from .utils.sms import AsyncTermiiClient, CircuitOpenError, SMSError, get_client
+
+logger = logging.getLogger(__name__)
+
+CAMPAIGN_CHUNK_SIZE = 1000
+
+
+class TokenBucket:
+    """Allows `rate` acquisitions per second on average, bursts up to `capacity`."""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or rate
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class _Placeholders(dict):
+    def __missing__(self, key):
+        return "{" + key + "}"
+
+
+def render_message(template, user):
+    return template.format_map(_Placeholders(name=user["name"] or "", business_name=user["business_name"]))
+
+
+# ---------------- Recipients ----------------
+def audience(campaign):
+    field = "phone" if campaign.channel == "sms" else "email"
+    users = (
+        get_user_model().objects.filter(is_active=True)
+        .exclude(**{f"{field}__isnull": True})
+        .exclude(**{field: ""})
+    )
+    if campaign.location:
+        users = users.filter(location__iexact=campaign.location)
+    if campaign.sales_executive:
+        users = users.filter(sales_executive__iexact=campaign.sales_executive)
+    return users
+
+
+def next_chunk(campaign, chunk_size):
+    return list(
+        audience(campaign)
+        .filter(pk__gt=campaign.last_user_id)
+        # anyone already attempted (e.g. before a circuit-breaker pause) is skipped
+        .exclude(campaign_deliveries__campaign=campaign)
+        .order_by("pk")
+        .values("pk", "name", "business_name", "phone", "email")[:chunk_size]
+    )
+
+
+def record_outcomes(campaign, outcomes, cursor):
+    """Write one chunk's outcomes and move the cursor to `cursor`, atomically."""
+    sent = sum(1 for outcome in outcomes if outcome.status == "sent")
+    with transaction.atomic():
+        CampaignDelivery.objects.bulk_create(outcomes, ignore_conflicts=True)
+        Campaign.objects.filter(pk=campaign.pk).update(
+            last_user_id=cursor,
+            sent_count=F("sent_count") + sent,
+            failed_count=F("failed_count") + len(outcomes) - sent,
+        )
+    campaign.refresh_from_db(fields=["last_user_id", "sent_count", "failed_count", "status"])
+
+
+# ---------------- Sending ----------------
+async def _send_sms(client, semaphore, campaign, user):
+    async with semaphore:
+        try:
+            response = await client.send(user["phone"], render_message(campaign.message, user))
+        except CircuitOpenError:
+            return None  # not attempted; picked up again on resume
+        except SMSError as exc:
+            return CampaignDelivery(campaign=campaign, user_id=user["pk"], recipient=user["phone"],
+                                    status="failed", detail=str(exc)[:255])
+        except Exception as exc:  # e.g. a template error; fail this recipient, not the whole chunk
+            logger.exception("Campaign %s: SMS to user %s failed", campaign.pk, user["pk"])
+            return CampaignDelivery(campaign=campaign, user_id=user["pk"], recipient=user["phone"],
+                                    status="failed", detail=f"{type(exc).__name__}: {exc}"[:255])
+        return CampaignDelivery(campaign=campaign, user_id=user["pk"], recipient=user["phone"],
+                                status="sent", detail=str(response.get("message_id", ""))[:255])
+
+
+def _send_email_chunk(campaign, users):
+    subject = campaign.subject or campaign.name
+    messages = [
+        emails.build_email(
+            subject,
+            "emails/campaign.html",
+            {"user": user, "subject": subject, "message": render_message(campaign.message, user)},
+            [user["email"]],
+        )
+        for user in users
+    ]
+    try:
+        results = emails.send_messages(messages)
+    finally:
+        emails.close_connection()
+    # one outcome per message: a refused address or dropped session fails only its own rows
+    return [
+        CampaignDelivery(
+            campaign=campaign, user_id=user["pk"], recipient=user["email"],
+            status="sent" if error is None else "failed",
+            detail="" if error is None else f"{type(error).__name__}: {error}"[:255],
+        )
+        for user, error in zip(users, results)
+    ]
+
+
+async def _run(campaign, chunk_size, concurrency, rate, progress):
+    semaphore = asyncio.Semaphore(concurrency)
+    bucket = TokenBucket(rate)
+    sync_client = get_client()  # share the sync client's circuit breaker
+    client = AsyncTermiiClient(
+        base_url=settings.TERMII_BASE_URL,
+        api_key=settings.TERMII_API_KEY,
+        sender_id=settings.TERMII_SENDER_ID,
+        connect_timeout=settings.TERMII_CONNECT_TIMEOUT,
+        read_timeout=settings.TERMII_READ_TIMEOUT,
+        max_retries=settings.TERMII_MAX_RETRIES,
+        max_connections=concurrency,
+        breaker=sync_client.breaker,
+        rate_limiter=bucket,  # retries spend tokens too
+    )
+
+    async with client:
+        while True:
+            users = await sync_to_async(next_chunk)(campaign, chunk_size)
+            if not users:
+                return True
+
+            if campaign.channel == "sms":
+                results = await asyncio.gather(
+                    *(_send_sms(client, semaphore, campaign, user) for user in users)
+                )
+                outcomes = [outcome for outcome in results if outcome is not None]
+                skipped = [user["pk"] for user, outcome in zip(users, results) if outcome is None]
+            else:
+                outcomes = await asyncio.to_thread(_send_email_chunk, campaign, users)
+                skipped = []
+
+            # never move the cursor past someone who was not attempted
+            cursor = min(skipped) - 1 if skipped else users[-1]["pk"]
+            await sync_to_async(record_outcomes)(campaign, outcomes, cursor)
+            if progress:
+                progress(campaign)
+            if skipped:
+                raise CircuitOpenError(f"Termii circuit breaker is open; {len(skipped)} recipients deferred")
+            if campaign.status == "paused":  # paused from the admin
+                return False
+
+
+def run_campaign(campaign, chunk_size=CAMPAIGN_CHUNK_SIZE, concurrency=None, rate=None, progress=None):
+    """
+    Send (or resume) a campaign. Returns the campaign's final status.
+    `progress(campaign)` is called after every committed chunk.
+    """
+    if campaign.status == "done":
+        return campaign.status
+
+    concurrency = concurrency or settings.CAMPAIGN_CONCURRENCY
+    rate = rate or settings.CAMPAIGN_SMS_RATE_PER_SECOND
+
+    campaign.status = "running"
+    campaign.started_at = campaign.started_at or timezone.now()
+    campaign.save(update_fields=["status", "started_at"])
+
+    try:
+        finished = asyncio.run(_run(campaign, chunk_size, concurrency, rate, progress))
+    except CircuitOpenError:
+        logger.warning("Campaign %s paused: SMS provider unavailable", campaign.pk)
+        Campaign.objects.filter(pk=campaign.pk).update(status="paused")
+        campaign.status = "paused"
+        return campaign.status
+    except Exception:
+        logger.exception("Campaign %s stopped after user %s", campaign.pk, campaign.last_user_id)
+        Campaign.objects.filter(pk=campaign.pk).update(status="failed")
+        campaign.status = "failed"
+        raise
+
+    if finished:
+        campaign.status = "done"
+        campaign.finished_at = timezone.now()
+        campaign.save(update_fields=["status", "finished_at"])
+    return campaign.status
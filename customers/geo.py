@@ -0,0 +1,152 @@
+# customers/geo.py
+"""
+Nearest-shop search.
+
+User.latitude/longitude stay free text for the API. User.save() mirrors them
+into numeric geo_lat/geo_lng and a 9-character geohash (an indexed column).
+A geohash prefix names a rectangular cell, so "shops in this cell" is a
+prefix match, `geohash LIKE 'abcde%'`. On PostgreSQL that is an index scan
+on the varchar_pattern_ops `_like` index Django adds for db_index=True, and
+it does not depend on the database collation (a `< 'abcde~'` bound would:
+'~' only sorts after letters and digits under C collation).
+
+nearest() fetches the shops in the 3x3 block of cells around the point, at
+the finest precision that holds at least k shops. It ranks them with a
+vectorised haversine in NumPy and checks that the k-th distance lies inside
+the block. If it doesn't, a closer shop could sit in a cell outside the
+block, so the search widens one precision level. If even the coarsest block
+can't prove it, every shop is ranked. Only the k winners are loaded as full
+rows.
+"""
+import math
+
+import numpy as np
+from django.contrib.auth import get_user_model
+from django.db.models import Q
+
+EARTH_RADIUS_KM = 6371.0088
+GEOHASH_PRECISION = 9  # ~5 m cells; prefixes of it are the coarser cells
+SEARCH_PRECISIONS = (6, 5, 4, 3, 2)  # ~1 km ... ~1250 km cells
+
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+
+# ---------------- Geohash ----------------
+def encode(lat, lng, precision=GEOHASH_PRECISION):
+    lat_range, lng_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars, bit, ch, even = [], 0, 0, True
+    while len(chars) < precision:
+        rng, value = (lng_range, lng) if even else (lat_range, lat)
+        mid = (rng[0] + rng[1]) / 2
+        if value >= mid:
+            ch |= 1 << (4 - bit)
+            rng[0] = mid
+        else:
+            rng[1] = mid
+        even = not even
+        if bit < 4:
+            bit += 1
+        else:
+            chars.append(_BASE32[ch])
+            bit, ch = 0, 0
+    return "".join(chars)
+
+
+def cell_size(precision):
+    """(lat degrees, lng degrees) covered by one cell."""
+    bits = 5 * precision
+    return 180.0 / 2 ** (bits // 2), 360.0 / 2 ** ((bits + 1) // 2)
+
+
+def block(lat, lng, precision):
+    """The cell containing the point plus its eight neighbours."""
+    dlat, dlng = cell_size(precision)
+    cells = set()
+    for i in (-1, 0, 1):
+        for j in (-1, 0, 1):
+            nlat = lat + i * dlat
+            if -90 <= nlat <= 90:
+                nlng = (lng + j * dlng + 180) % 360 - 180
+                cells.add(encode(nlat, nlng, precision))
+    return cells
+
+
+def safe_radius_km(lat, precision):
+    """Any point closer than this lies inside block(lat, lng, precision)."""
+    dlat, dlng = cell_size(precision)
+    km_per_degree = math.pi * EARTH_RADIUS_KM / 180
+    return min(dlat * km_per_degree, dlng * km_per_degree * math.cos(math.radians(lat)))
+
+
+def point_from_text(latitude, longitude):
+    """(geo_lat, geo_lng, geohash) for the text columns; Nones if missing or invalid."""
+    try:
+        lat, lng = float(latitude), float(longitude)
+    except (TypeError, ValueError):
+        return None, None, ""
+    if not (-90 <= lat <= 90 and -180 <= lng <= 180) or math.isnan(lat) or math.isnan(lng):
+        return None, None, ""
+    return lat, lng, encode(lat, lng)
+
+
+# ---------------- Search ----------------
+def haversine_km(lat, lng, lats, lngs):
+    """Distances from one point to arrays of points."""
+    lat, lng = math.radians(lat), math.radians(lng)
+    lats, lngs = np.radians(lats), np.radians(lngs)
+    a = np.sin((lats - lat) / 2) ** 2 + math.cos(lat) * np.cos(lats) * np.sin((lngs - lng) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def _candidates(queryset, cells=None):
+    """(pks, lats, lngs) of the shops in `cells`, or of every shop if cells is None."""
+    if cells is not None:
+        condition = Q()
+        for cell in cells:
+            condition |= Q(geohash__startswith=cell)
+        queryset = queryset.filter(condition)
+    rows = list(queryset.values_list("pk", "geo_lat", "geo_lng"))
+    if not rows:
+        return np.empty(0, dtype=np.int64), np.empty(0), np.empty(0)
+    data = np.array(rows, dtype=np.float64)
+    return data[:, 0].astype(np.int64), data[:, 1], data[:, 2]
+
+
+def _closest(lat, lng, k, pks, lats, lngs):
+    """The (at most) k candidates nearest to the point, unordered, and their distances."""
+    distances = haversine_km(lat, lng, lats, lngs)
+    if len(pks) > k:
+        keep = np.argpartition(distances, k - 1)[:k]
+        pks, distances = pks[keep], distances[keep]
+    return pks, distances
+
+
+def nearest(lat, lng, k=20, max_km=None, queryset=None):
+    """
+    The k active shops nearest to (lat, lng), as [(user, distance_km)], closest first.
+    `max_km` drops anything further away.
+    """
+    if queryset is None:
+        queryset = get_user_model().objects.filter(is_active=True)
+    queryset = queryset.exclude(geohash="")
+
+    limit = max_km if max_km is not None else math.inf
+    for precision in SEARCH_PRECISIONS:
+        pks, distances = _closest(lat, lng, k, *_candidates(queryset, block(lat, lng, precision)))
+        kth = distances.max() if len(pks) == k else math.inf
+        # done once the k found are provably the closest (or closer than max_km anyway)
+        if min(kth, limit) <= safe_radius_km(lat, precision):
+            break
+    else:
+        # not even the coarsest block is known to hold them (sparse data, or a point
+        # far from every shop): rank every shop
+        pks, distances = _closest(lat, lng, k, *_candidates(queryset))
+
+    order = np.argsort(distances)
+    pks, distances = pks[order], distances[order]
+    if max_km is not None:
+        within = distances <= max_km
+        pks, distances = pks[within], distances[within]
+
+    users = queryset.in_bulk([int(pk) for pk in pks])
+    return [(users[int(pk)], float(distance)) for pk, distance in zip(pks, distances) if int(pk) in users]
@@ -0,0 +1,202 @@
+# customers/importer.py
+"""
+Bulk customer import (`manage.py import_customers`).
+
+Rows are read from CSV or NDJSON one at a time, and each row is validated
+as it streams past. Duplicates are reported and skipped, without aborting
+the batch. A duplicate is a row whose business_name or email appears
+earlier in the file or already exists in the database.
+
+Valid rows are handled in chunks:
+* Passwords are hashed on a process pool, because PBKDF2 is CPU-bound.
+* Each chunk is inserted with one bulk_create while the pool is already
+  hashing the next chunk.
+* If a chunk collides with a registration that happened meanwhile, that
+  chunk falls back to row-by-row inserts, so only the clashing rows are lost.
+"""
+import csv
+import json
+from dataclasses import dataclass, field
+
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import IntegrityError, transaction
+
+from . import geo, search
+from .models import User
+
+IMPORT_CHUNK_SIZE = 1000
+
+IMPORT_FIELDS = [
+    "business_name", "email", "name", "phone", "location", "sales_executive",
+    "latitude", "longitude", "shop_photo_url",
+]
+# the API's camelCase names are accepted too
+ALIASES = {"businessName": "business_name", "salesExecutive": "sales_executive", "shopPhotoUrl": "shop_photo_url"}
+
+
+def hash_password(raw):
+    """Runs in the pool. No password -> unusable password (user sets one via forgot-password)."""
+    return make_password(raw or None)
+
+
+# ---------------- Reading ----------------
+def read_rows(stream, fmt):
+    """Yield (line number, dict) from a CSV (with header) or NDJSON stream."""
+    if fmt == "csv":
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row
+        return
+    for line_no, line in enumerate(stream, start=1):
+        if line.strip():
+            try:
+                yield line_no, json.loads(line)
+            except ValueError as e:
+                yield line_no, {"_error": f"invalid JSON: {e}"}
+
+
+def clean_row(raw):
+    """Return (model fields, raw password) for one input row; raises ValueError with the reason."""
+    if not isinstance(raw, dict):  # valid JSON, but e.g. a list or a string
+        raise ValueError(f"expected an object, got {type(raw).__name__}")
+    if "_error" in raw:
+        raise ValueError(raw["_error"])
+
+    data = {}
+    for key, value in raw.items():
+        key = ALIASES.get(key, key)
+        if key in IMPORT_FIELDS and value not in (None, ""):
+            data[key] = str(value).strip()
+
+    if not data.get("business_name"):
+        raise ValueError("business_name is required")
+    if not data.get("email"):
+        raise ValueError("email is required")
+
+    data["email"] = User.objects.normalize_email(data["email"])
+    try:
+        validate_email(data["email"])
+    except ValidationError:
+        raise ValueError(f"invalid email {data['email']!r}")
+
+    for name, value in data.items():
+        max_length = User._meta.get_field(name).max_length
+        if max_length and len(value) > max_length:
+            raise ValueError(f"{name} is longer than {max_length} characters")
+
+    password = raw.get("password") or None
+    if password is not None and not isinstance(password, str):
+        raise ValueError("password must be a string")
+    if password is not None and len(password) < 6:
+        raise ValueError("password must be at least 6 characters")
+    return data, password
+
+
+# ---------------- Import ----------------
+@dataclass
+class ImportStats:
+    read: int = 0
+    imported: int = 0
+    problems: list = field(default_factory=list)  # (line, business_name, email, reason)
+
+
+class CustomerImporter:
+    def __init__(self, executor=None, workers=1, chunk_size=IMPORT_CHUNK_SIZE, dry_run=False, progress=None):
+        self.executor = executor
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.dry_run = dry_run
+        self.progress = progress
+        self.stats = ImportStats()
+        self._names = set()
+        self._emails = set()
+
+    def run(self, rows):
+        pending = None
+        for chunk in self._chunks(rows):
+            chunk = self._drop_existing(chunk)
+            if self.dry_run:
+                self.stats.imported += len(chunk)
+                continue
+            hashes = self.executor.map(
+                hash_password,
+                [password for _, _, password in chunk],
+                chunksize=max(1, len(chunk) // (self.workers * 4)),
+            )
+            if pending:
+                self._insert(*pending)
+            pending = (chunk, hashes)
+        if pending:
+            self._insert(*pending)
+        return self.stats
+
+    def _problem(self, line, data, reason):
+        business_name = data.get("business_name") or data.get("businessName") or ""
+        self.stats.problems.append((line, business_name, data.get("email") or "", reason))
+
+    def _chunks(self, rows):
+        """Validate while streaming; yield lists of (line, fields, password) unique within the file."""
+        chunk = []
+        for line, raw in rows:
+            self.stats.read += 1
+            try:
+                data, password = clean_row(raw)
+            except ValueError as e:
+                self._problem(line, raw if isinstance(raw, dict) else {}, str(e))
+                continue
+            if data["business_name"] in self._names:
+                self._problem(line, data, "duplicate business_name in file")
+                continue
+            if data["email"] in self._emails:
+                self._problem(line, data, "duplicate email in file")
+                continue
+            self._names.add(data["business_name"])
+            self._emails.add(data["email"])
+            chunk.append((line, data, password))
+            if len(chunk) >= self.chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    def _drop_existing(self, chunk):
+        names = set(User.objects.filter(
+            business_name__in=[data["business_name"] for _, data, _ in chunk]
+        ).values_list("business_name", flat=True))
+        emails = set(User.objects.filter(
+            email__in=[data["email"] for _, data, _ in chunk]
+        ).values_list("email", flat=True))
+
+        kept = []
+        for line, data, password in chunk:
+            if data["business_name"] in names:
+                self._problem(line, data, "business_name already exists")
+            elif data["email"] in emails:
+                self._problem(line, data, "email already exists")
+            else:
+                kept.append((line, data, password))
+        return kept
+
+    def _insert(self, chunk, hashes):
+        users = [User(password=hashed, **data) for (_, data, _), hashed in zip(chunk, hashes)]
+        for user in users:  # bulk_create skips User.save()
+            user.geo_lat, user.geo_lng, user.geohash = geo.point_from_text(user.latitude, user.longitude)
+            user.phone_normalized = search.normalize_phone(user.phone)
+        try:
+            with transaction.atomic():
+                User.objects.bulk_create(users)
+            self.stats.imported += len(users)
+        except IntegrityError:
+            # someone registered one of these names/emails since _drop_existing: go row by row
+            for (line, data, _), user in zip(chunk, users):
+                user.pk = None
+                try:
+                    with transaction.atomic():
+                        user.save(force_insert=True)
+                    self.stats.imported += 1
+                except IntegrityError:
+                    self._problem(line, data, "business_name or email already exists")
+        if self.progress:
+            self.progress(self.stats, chunk[-1][0] if chunk else None)
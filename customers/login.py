@@ -0,0 +1,188 @@
+# customers/login.py
+"""
+Login pipeline for LoginView: one user query, lockout state in a shared store.
+
+authenticate() goes through the axes backend and ModelBackend. On failure,
+axes' handler writes attempt rows synchronously, and the view then needed a
+second query to tell "unknown business name" from "wrong password". Here:
+
+* With a shared cache (Redis), the lockout counters live in the cache,
+  keyed by business name and by IP. That matches AXES_LOCKOUT_PARAMETERS,
+  AXES_FAILURE_LIMIT and AXES_COOLOFF_TIME. A locked-out attempt costs no
+  query and no password hash.
+* Without one, per-process LocMemCache counters would multiply the failure
+  limit by the number of workers and vanish on restart. Lockout then goes
+  through axes' own handler (AxesDatabaseHandler, the AXES_HANDLER default),
+  which keeps AccessAttempt rows every worker sees.
+* The user row is fetched once and the password checked against it.
+* Failures are kept for audit as axes AccessFailureLog rows. They are
+  buffered in memory and bulk-inserted by a background thread every
+  LOGIN_FAILURE_FLUSH_SECONDS or LOGIN_FAILURE_BATCH_SIZE rows, so a
+  failed login never waits on an INSERT. A crash can lose the last few
+  seconds of audit rows, but never the lockout state.
+
+The Django admin login is untouched and still goes through axes.
+"""
+import logging
+import threading
+import time
+
+from axes.conf import settings as axes_settings
+from axes.handlers.proxy import AxesProxyHandler
+from axes.helpers import get_client_ip_address
+from axes.models import AccessFailureLog
+from axes.utils import reset as axes_reset
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+
+from chiamo_project.utils import cache_is_shared
+
+logger = logging.getLogger(__name__)
+
+User = get_user_model()
+
+
+# ---------------- Lockout ----------------
+def client_ip(request):
+    # axes' own resolution (REMOTE_ADDR unless AXES_IPWARE_* says otherwise): a
+    # client-set X-Forwarded-For must not pick the IP the limit is counted against
+    return get_client_ip_address(request)
+
+
+def _failure_keys(business_name, ip):
+    keys = []
+    if "username" in settings.AXES_LOCKOUT_PARAMETERS and business_name:
+        keys.append(f"login:failures:user:{business_name.lower()}")
+    if "ip_address" in settings.AXES_LOCKOUT_PARAMETERS and ip:
+        keys.append(f"login:failures:ip:{ip}")
+    return keys
+
+
+def is_locked_out(business_name, ip):
+    counts = cache.get_many(_failure_keys(business_name, ip))
+    return any(count >= settings.AXES_FAILURE_LIMIT for count in counts.values())
+
+
+def register_failure(business_name, ip):
+    """Count a failure against the name and the IP. Returns True if that locks either out."""
+    timeout = int(settings.AXES_COOLOFF_TIME.total_seconds())
+    locked = False
+    for key in _failure_keys(business_name, ip):
+        cache.add(key, 0, timeout)
+        try:
+            count = cache.incr(key)
+        except ValueError:  # expired between add() and incr()
+            cache.set(key, 1, timeout)
+            count = 1
+        locked = locked or count >= settings.AXES_FAILURE_LIMIT
+    return locked
+
+
+def reset_failures(business_name):
+    """
+    A successful login clears the business name's counter only. The IP's
+    stays, so one valid account can't reset the limit for a credential
+    stuffing run from the same address.
+    """
+    cache.delete_many(_failure_keys(business_name, None))
+
+
+# ---------------- Failure log ----------------
+class FailureLog:
+    """Buffers AccessFailureLog rows and bulk-inserts them from a daemon thread."""
+
+    def __init__(self):
+        self._rows = []
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    def add(self, request, business_name, locked_out):
+        row = AccessFailureLog(
+            username=business_name,
+            ip_address=client_ip(request),
+            user_agent=request.META.get("HTTP_USER_AGENT", "<unknown>")[:255],
+            http_accept=request.META.get("HTTP_ACCEPT", "<unknown>")[:1025],
+            path_info=request.META.get("PATH_INFO", "<unknown>")[:255],
+            locked_out=locked_out,
+        )
+        with self._lock:
+            self._rows.append(row)
+            full = len(self._rows) >= settings.LOGIN_FAILURE_BATCH_SIZE
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="login-failure-log", daemon=True)
+                self._thread.start()
+        if full:
+            self._wakeup.set()
+
+    def flush(self):
+        with self._lock:
+            rows, self._rows = self._rows, []
+        if rows:
+            try:
+                AccessFailureLog.objects.bulk_create(rows)
+            except Exception:
+                logger.exception("Could not write %s login failure rows", len(rows))
+        return len(rows)
+
+    def _run(self):
+        from django.db import connection
+
+        while True:
+            self._wakeup.wait(settings.LOGIN_FAILURE_FLUSH_SECONDS)
+            self._wakeup.clear()
+            self.flush()
+            connection.close()
+
+
+failure_log = FailureLog()
+
+
+# ---------------- Login ----------------
+class LoginResult:
+    OK = "ok"
+    UNKNOWN_USER = "unknown_user"
+    BAD_PASSWORD = "bad_password"
+    LOCKED_OUT = "locked_out"
+
+    def __init__(self, status, user=None):
+        self.status = status
+        self.user = user
+
+
+def _axes_login(request, business_name, password):
+    """login() with lockout state kept by the axes handler in the database."""
+    credentials = {axes_settings.AXES_USERNAME_FORM_FIELD: business_name}
+    if AxesProxyHandler.is_locked(request, credentials):
+        return LoginResult(LoginResult.LOCKED_OUT)
+
+    user = User.objects.filter(business_name=business_name).first()
+    if user is not None and user.is_active and user.check_password(password):
+        if settings.AXES_RESET_ON_SUCCESS:
+            axes_reset(username=business_name)  # the name's attempts; see reset_failures()
+        return LoginResult(LoginResult.OK, user)
+
+    AxesProxyHandler.user_login_failed(sender=login, credentials=credentials, request=request)
+    failure_log.add(request, business_name, request.axes_locked_out)
+    return LoginResult(LoginResult.UNKNOWN_USER if user is None else LoginResult.BAD_PASSWORD)
+
+
+def login(request, business_name, password):
+    """Check the credentials; returns a LoginResult. One query, none when locked out (shared cache)."""
+    if not cache_is_shared():
+        return _axes_login(request, business_name, password)
+
+    ip = client_ip(request)
+    if is_locked_out(business_name, ip):
+        return LoginResult(LoginResult.LOCKED_OUT)
+
+    user = User.objects.filter(business_name=business_name).first()
+    if user is not None and user.is_active and user.check_password(password):
+        if settings.AXES_RESET_ON_SUCCESS:
+            reset_failures(business_name)
+        return LoginResult(LoginResult.OK, user)
+
+    locked = register_failure(business_name, ip)
+    failure_log.add(request, business_name, locked)
+    return LoginResult(LoginResult.UNKNOWN_USER if user is None else LoginResult.BAD_PASSWORD)
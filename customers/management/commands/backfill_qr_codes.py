@@ -0,0 +1,91 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from customers.auth_cache import invalidate_users
+from customers.qr import qr_file_name, qr_payload, render_qr_png, store_png
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = "Render customer QR codes in bulk on all CPU cores (e.g. after changing QR_CODE_BASE_URL)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=1000, help="Users per query / bulk_update")
+        parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Render processes")
+        parser.add_argument("--force", action="store_true", help="Re-render even if the file is up to date")
+        parser.add_argument("--start-after", type=int, default=0, metavar="USER_ID", help="Resume after this user id")
+
+    def handle(self, *args, **options):
+        self.force = options["force"]
+        self.storage = User._meta.get_field("qr_code").storage
+        self.workers = options["workers"]
+        self.total = User.objects.filter(pk__gt=options["start_after"]).count()
+        self.seen = self.updated = self.rendered = 0
+        self.started = time.monotonic()
+
+        self.stdout.write(f"🔳 {self.total} users, {self.workers} worker processes")
+
+        # Rendering (Pillow, CPU-bound) runs in the pool; storage writes and the
+        # bulk UPDATE run here, while the pool is already busy with the next chunk.
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            pending = None
+            for chunk in self.chunks(options["start_after"], options["chunk_size"]):
+                submitted = self.submit(executor, chunk)
+                if pending:
+                    self.finish(*pending)
+                pending = submitted
+            if pending:
+                self.finish(*pending)
+
+        elapsed = time.monotonic() - self.started
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {self.updated} QR codes updated ({self.rendered} rendered) out of {self.seen} users "
+            f"in {elapsed:.1f}s ({self.rendered / elapsed if elapsed else 0:.0f} renders/s)"
+        ))
+
+    def chunks(self, last_id, size):
+        while True:
+            chunk = list(User.objects.filter(pk__gt=last_id).order_by("pk").only("pk", "qr_code")[:size])
+            if not chunk:
+                return
+            yield chunk
+            last_id = chunk[-1].pk
+
+    def submit(self, executor, chunk):
+        stale = []  # (user, file name) whose qr_code must change
+        to_render = []  # (file name, payload) with no file in storage yet
+        for user in chunk:
+            payload = qr_payload(user)
+            name = qr_file_name(payload)
+            if user.qr_code.name == name and not self.force:
+                continue
+            stale.append((user, name))
+            if self.force or not self.storage.exists(name):
+                to_render.append((name, payload))
+
+        batch = max(1, len(to_render) // (self.workers * 4))
+        images = executor.map(render_qr_png, [payload for _, payload in to_render], chunksize=batch)
+        return chunk, stale, to_render, images
+
+    def finish(self, chunk, stale, to_render, images):
+        for (name, _), png in zip(to_render, images):
+            store_png(self.storage, name, png, replace=self.force)
+
+        for user, name in stale:
+            user.qr_code.name = name
+        User.objects.bulk_update([user for user, _ in stale], ["qr_code"], batch_size=500)
+        invalidate_users([user.pk for user, _ in stale])
+
+        self.seen += len(chunk)
+        self.updated += len(stale)
+        self.rendered += len(to_render)
+        elapsed = time.monotonic() - self.started
+        self.stdout.write(
+            f"📦 {self.seen}/{self.total} users, {self.rendered} rendered "
+            f"({self.rendered / elapsed if elapsed else 0:.0f}/s, last user {chunk[-1].pk})"
+        )
@@ -0,0 +1,120 @@
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from axes.models import AccessAttempt
+from django.contrib.auth import authenticate, get_user_model
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from django.test import RequestFactory, override_settings
+from rest_framework.response import Response
+
+from customers.login import failure_log
+from customers.views import LoginView
+
+User = get_user_model()
+
+BENCH_PREFIX = "bench-login-"
+FAST_HASHERS = ["django.contrib.auth.hashers.MD5PasswordHasher"]
+
+
+class LegacyLoginView(LoginView):
+    """The previous LoginView body: authenticate() + a second query on failure."""
+
+    def post(self, request):
+        business_name = request.data.get("business_name")
+        password = request.data.get("password")
+        user = authenticate(request, business_name=business_name, password=password)
+        if user is None:
+            if not User.objects.filter(business_name=business_name).exists():
+                return Response({"error": "Invalid business name ❌"}, status=400)
+            return Response({"error": "Incorrect password ❌"}, status=400)
+        return Response({"id": user.pk}, status=200)
+
+
+class Command(BaseCommand):
+    help = "Benchmark the login endpoint under credential-stuffing-like load (creates and removes its own users)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=1000)
+        parser.add_argument("--threads", type=int, default=8)
+        parser.add_argument("--users", type=int, default=200, help="Real accounts being attacked")
+        parser.add_argument("--ips", type=int, default=500, help="Distinct attacker IPs")
+        parser.add_argument("--unknown-ratio", type=float, default=0.5, help="Share of attempts on non-existent names")
+        parser.add_argument("--valid-ratio", type=float, default=0.02, help="Share of attempts with the right password")
+        parser.add_argument("--legacy", action="store_true", help="Also run the old authenticate() path for comparison")
+        parser.add_argument(
+            "--real-hasher",
+            action="store_true",
+            help="Keep PASSWORD_HASHERS (PBKDF2); by default MD5 is used so the numbers show pipeline overhead",
+        )
+
+    def handle(self, *args, **options):
+        hashers = {} if options["real_hasher"] else {"PASSWORD_HASHERS": FAST_HASHERS}
+        with override_settings(**hashers):
+            names = self.create_users(options["users"])
+            try:
+                attempts = self.attempts(names, options)
+                views = [("fast path", LoginView)]
+                if options["legacy"]:
+                    views.append(("authenticate()", LegacyLoginView))
+                for label, view in views:
+                    self.run(label, view.as_view(throttle_classes=[]), attempts, options["threads"])
+            finally:
+                User.objects.filter(business_name__startswith=BENCH_PREFIX).delete()
+                failure_log.flush()
+
+    def create_users(self, count):
+        User.objects.filter(business_name__startswith=BENCH_PREFIX).delete()
+        template = User(business_name="x", email="x@x.com")
+        template.set_password("correct-horse")
+        User.objects.bulk_create([
+            User(business_name=f"{BENCH_PREFIX}{i}", email=f"{BENCH_PREFIX}{i}@example.com", password=template.password)
+            for i in range(count)
+        ])
+        return [f"{BENCH_PREFIX}{i}" for i in range(count)]
+
+    def attempts(self, names, options):
+        rng = random.Random(42)
+        attempts = []
+        for _ in range(options["requests"]):
+            roll = rng.random()
+            if roll < options["unknown_ratio"]:
+                name, password = f"{BENCH_PREFIX}ghost-{rng.randrange(10 ** 6)}", "hunter2"
+            else:
+                name = rng.choice(names)
+                password = "correct-horse" if roll > 1 - options["valid_ratio"] else "hunter2"
+            ip = f"10.0.{rng.randrange(options['ips']) // 256}.{rng.randrange(options['ips']) % 256}"
+            attempts.append((name, password, ip))
+        return attempts
+
+    def run(self, label, view, attempts, threads):
+        cache.clear()  # fresh lockout counters for each run
+        AccessAttempt.objects.filter(username__startswith=BENCH_PREFIX).delete()
+        factory = RequestFactory()
+
+        def one(attempt):
+            name, password, ip = attempt
+            request = factory.post(
+                "/api/customers/login/",
+                {"business_name": name, "password": password},
+                content_type="application/json",
+                REMOTE_ADDR=ip,
+            )
+            try:
+                return view(request).status_code
+            except Exception as exc:  # e.g. SQLite "database is locked" under concurrent attempt writes
+                return type(exc).__name__
+            finally:
+                close_old_connections()
+
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            statuses = list(pool.map(one, attempts))
+        elapsed = time.monotonic() - started
+
+        counts = {code: statuses.count(code) for code in sorted(set(statuses), key=str)}
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {label}: {len(attempts)} logins in {elapsed:.2f}s = {len(attempts) / elapsed:.0f} req/s {counts}"
+        ))
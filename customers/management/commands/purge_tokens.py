@@ -0,0 +1,65 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.utils import aware_utcnow
+
+from customers.tokens import add_to_blacklist_filter, flush_pending
+
+
+class Command(BaseCommand):
+    help = "Write queued token rotations, then delete expired outstanding/blacklisted tokens in chunks"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=5000, help="Tokens deleted per transaction")
+        parser.add_argument("--pause", type=float, default=0.0, help="Seconds to sleep between chunks")
+        parser.add_argument(
+            "--rebuild-filter",
+            action="store_true",
+            help="Re-add every unexpired blacklisted token to the Redis Bloom filter (after a Redis flush or first deploy)",
+        )
+
+    def handle(self, *args, **options):
+        flushed = flush_pending()
+        if flushed:
+            self.stdout.write(f"📝 Wrote {flushed} queued token rows")
+
+        now = aware_utcnow()
+        deleted = 0
+        while True:
+            ids = list(
+                OutstandingToken.objects.filter(expires_at__lte=now)
+                .order_by("id")
+                .values_list("id", flat=True)[: options["chunk_size"]]
+            )
+            if not ids:
+                break
+            with transaction.atomic():
+                BlacklistedToken.objects.filter(token_id__in=ids).delete()
+                OutstandingToken.objects.filter(id__in=ids).delete()
+            deleted += len(ids)
+            self.stdout.write(f"🧹 Deleted {deleted} expired tokens so far")
+            if options["pause"]:
+                time.sleep(options["pause"])
+
+        if options["rebuild_filter"] and settings.REDIS_URL:
+            rows = (
+                BlacklistedToken.objects.filter(token__expires_at__gt=now)
+                .values_list("token__jti", "token__expires_at")
+                .iterator(chunk_size=options["chunk_size"])
+            )
+            batch, added = [], 0
+            for jti, expires_at in rows:
+                batch.append((jti, expires_at.timestamp()))
+                if len(batch) >= options["chunk_size"]:
+                    add_to_blacklist_filter(batch)
+                    added += len(batch)
+                    batch = []
+            if batch:
+                add_to_blacklist_filter(batch)
+                added += len(batch)
+            self.stdout.write(f"🌸 Added {added} blacklisted tokens to the filter")
+
+        self.stdout.write(self.style.SUCCESS(f"✅ Purged {deleted} expired tokens"))
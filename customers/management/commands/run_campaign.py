@@ -0,0 +1,65 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from customers.campaigns import CAMPAIGN_CHUNK_SIZE, audience, run_campaign
+from customers.models import Campaign
+
+
+class Command(BaseCommand):
+    help = "Send an SMS or email campaign to customers, or resume one that was paused or failed"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--name")
+        parser.add_argument("--channel", choices=[value for value, _ in Campaign.CHANNEL_CHOICES], default="sms")
+        parser.add_argument("--subject", default="")
+        parser.add_argument("--message")
+        parser.add_argument("--location", default="")
+        parser.add_argument("--sales-executive", default="")
+        parser.add_argument("--resume", type=int, metavar="CAMPAIGN_ID")
+        parser.add_argument("--chunk-size", type=int, default=CAMPAIGN_CHUNK_SIZE)
+        parser.add_argument("--concurrency", type=int, default=None)
+        parser.add_argument("--rate", type=float, default=None, help="Max SMS per second")
+        parser.add_argument("--dry-run", action="store_true", help="Only count the audience")
+
+    def handle(self, *args, **options):
+        if options["resume"]:
+            try:
+                campaign = Campaign.objects.get(pk=options["resume"])
+            except Campaign.DoesNotExist:
+                raise CommandError(f"Campaign {options['resume']} does not exist")
+            if campaign.status == "done":
+                raise CommandError(f"Campaign {campaign.pk} has already finished")
+        else:
+            if not options["name"] or not options["message"]:
+                raise CommandError("--name and --message are required for a new campaign")
+            campaign = Campaign(
+                name=options["name"],
+                channel=options["channel"],
+                subject=options["subject"],
+                message=options["message"],
+                location=options["location"],
+                sales_executive=options["sales_executive"],
+            )
+
+        if options["dry_run"]:
+            count = audience(campaign).filter(pk__gt=campaign.last_user_id).count()
+            self.stdout.write(f"📣 {count} customers would receive \"{campaign.name}\" by {campaign.channel}")
+            return
+
+        if campaign.pk is None:
+            campaign.save()
+
+        def progress(c):
+            self.stdout.write(f"📨 Campaign {c.pk}: {c.sent_count} sent, {c.failed_count} failed")
+
+        status = run_campaign(
+            campaign,
+            chunk_size=options["chunk_size"],
+            concurrency=options["concurrency"],
+            rate=options["rate"],
+            progress=progress,
+        )
+        summary = f"Campaign {campaign.pk} {status}: {campaign.sent_count} sent, {campaign.failed_count} failed"
+        if status == "done":
+            self.stdout.write(self.style.SUCCESS(f"✅ {summary}"))
+        else:
+            self.stdout.write(self.style.WARNING(f"⏸️  {summary} (resume with --resume {campaign.pk})"))
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.9 on 2026-10-19 03:39
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('customers', '0002_campaigns'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='user',
+            name='otp_created_at',
+        ),
+        migrations.RemoveField(
+            model_name='user',
+            name='reset_otp',
+        ),
+    ]
@@ -0,0 +1,80 @@
+# Generated by Django 5.2.9 on 2026-10-19 03:43
+
+import math
+
+from django.db import migrations, models
+
+# Frozen copies of customers.geo.encode/point_from_text as of this migration,
+# so later changes to the app code can't change what the backfill does.
+_BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+
+
+def encode(lat, lng, precision=9):
+    lat_range, lng_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars, bit, ch, even = [], 0, 0, True
+    while len(chars) < precision:
+        rng, value = (lng_range, lng) if even else (lat_range, lat)
+        mid = (rng[0] + rng[1]) / 2
+        if value >= mid:
+            ch |= 1 << (4 - bit)
+            rng[0] = mid
+        else:
+            rng[1] = mid
+        even = not even
+        if bit < 4:
+            bit += 1
+        else:
+            chars.append(_BASE32[ch])
+            bit, ch = 0, 0
+    return ''.join(chars)
+
+
+def point_from_text(latitude, longitude):
+    try:
+        lat, lng = float(latitude), float(longitude)
+    except (TypeError, ValueError):
+        return None, None, ''
+    if not (-90 <= lat <= 90 and -180 <= lng <= 180) or math.isnan(lat) or math.isnan(lng):
+        return None, None, ''
+    return lat, lng, encode(lat, lng)
+
+
+def backfill_geo(apps, schema_editor):
+    User = apps.get_model('customers', 'User')
+    users = User.objects.exclude(latitude__isnull=True).exclude(longitude__isnull=True).only('id', 'latitude', 'longitude')
+    batch = []
+    for user in users.iterator(chunk_size=2000):
+        user.geo_lat, user.geo_lng, user.geohash = point_from_text(user.latitude, user.longitude)
+        if user.geohash:
+            batch.append(user)
+        if len(batch) >= 2000:
+            User.objects.bulk_update(batch, ['geo_lat', 'geo_lng', 'geohash'])
+            batch = []
+    if batch:
+        User.objects.bulk_update(batch, ['geo_lat', 'geo_lng', 'geohash'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('customers', '0003_remove_user_reset_otp'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='geo_lat',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='geo_lng',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='geohash',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=12),
+        ),
+        migrations.RunPython(backfill_geo, migrations.RunPython.noop),
+    ]
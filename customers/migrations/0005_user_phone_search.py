@@ -0,0 +1,75 @@
+# Generated by Django 5.2.9 on 2026-10-19 03:50
+
+import re
+
+from django.db import migrations, models
+
+# Frozen copy of customers.search.normalize_phone as of this migration, so
+# later changes to the app code can't change what the backfill does.
+_NON_DIGITS = re.compile(r'\D')
+
+
+def normalize_phone(raw):
+    digits = _NON_DIGITS.sub('', raw or '')
+    if digits.startswith('00'):
+        digits = digits[2:]
+    elif digits.startswith('0'):
+        digits = '234' + digits[1:]
+    elif len(digits) == 10:
+        digits = '234' + digits
+    return digits[:20]
+
+
+# (index name, indexed expression) -- see customers/search.py
+TRIGRAM_INDEXES = [
+    ('customers_user_business_name_trgm', 'UPPER(business_name::text) gin_trgm_ops'),
+    ('customers_user_email_trgm', 'UPPER(email::text) gin_trgm_ops'),
+    ('customers_user_phone_normalized_trgm', 'phone_normalized gin_trgm_ops'),
+]
+
+
+def backfill_phone_normalized(apps, schema_editor):
+    User = apps.get_model('customers', 'User')
+    users = User.objects.exclude(phone__isnull=True).exclude(phone='').only('id', 'phone')
+    batch = []
+    for user in users.iterator(chunk_size=2000):
+        user.phone_normalized = normalize_phone(user.phone)
+        batch.append(user)
+        if len(batch) >= 2000:
+            User.objects.bulk_update(batch, ['phone_normalized'])
+            batch = []
+    if batch:
+        User.objects.bulk_update(batch, ['phone_normalized'])
+
+
+def create_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    table = schema_editor.quote_name(apps.get_model('customers', 'User')._meta.db_table)
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for name, expression in TRIGRAM_INDEXES:
+        schema_editor.execute(f'CREATE INDEX IF NOT EXISTS {name} ON {table} USING gin ({expression})')
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, _ in TRIGRAM_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('customers', '0004_user_geo'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='phone_normalized',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=20),
+        ),
+        migrations.RunPython(backfill_phone_normalized, migrations.RunPython.noop),
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
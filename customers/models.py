@@ -3,13 +3,11 @@
 from django.db import models
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionsMixin
 from django.contrib.auth.hashers import make_password, check_password
-from django.utils import timezone
-from datetime import timedelta
-import random
-from io import BytesIO
-from django.core.files import File
 from django.conf import settings
-import qrcode
+from django.db import transaction
+from functools import partial
+
+from . import auth_cache, geo, search
 
 
 class UserManager(BaseUserManager):
@@ -53,10 +51,16 @@ class User(AbstractBaseUser, PermissionsMixin):
     business_name = models.CharField(max_length=255, unique=True)
     email = models.EmailField(unique=True)
     phone = models.CharField(max_length=20, blank=True, null=True)
+    # digits-only canonical phone for staff search (customers/search.py), set in save()
+    phone_normalized = models.CharField(max_length=20, blank=True, default="", db_index=True)
     location = models.TextField(blank=True, null=True)
     sales_executive = models.TextField(max_length=30, blank=True, null=True)
     latitude = models.CharField(max_length=50, blank=True, null=True)
     longitude = models.CharField(max_length=50, blank=True, null=True)
+    # numeric copies of latitude/longitude for nearby search (customers/geo.py), set in save()
+    geo_lat = models.FloatField(blank=True, null=True)
+    geo_lng = models.FloatField(blank=True, null=True)
+    geohash = models.CharField(max_length=12, blank=True, default="", db_index=True)
     timestamp = models.DateTimeField(auto_now_add=True)
     shop_photo_url = models.URLField(blank=True, null=True)
     theme = models.CharField(
@@ -64,16 +68,12 @@ class User(AbstractBaseUser, PermissionsMixin):
         choices=ThemeChoices.choices,
         default=ThemeChoices.LIGHT,
     )
-    qr_code = models.ImageField(upload_to="qr_codes/", blank=True, null=True)
+    qr_code = models.ImageField(upload_to="qr_codes/", blank=True, null=True)  # filled lazily by customers/qr.py
 
     # Security PIN fields
     transaction_pin = models.CharField(max_length=255, blank=True, null=True)
     has_pin = models.BooleanField(default=False)
 
-    # OTP fields for password reset
-    reset_otp = models.CharField(max_length=6, blank=True, null=True)
-    otp_created_at = models.DateTimeField(blank=True, null=True)
-
     # Required by Django
     is_active = models.BooleanField(default=True)
     is_staff = models.BooleanField(default=False)
@@ -106,23 +106,22 @@ class User(AbstractBaseUser, PermissionsMixin):
         verbose_name_plural = 'Users'
 
     def save(self, *args, **kwargs):
-        # Only generate QR code if user has been saved (has an ID)
-        if self.pk:
-            try:
-                qr = qrcode.QRCode(version=1, box_size=10, border=5)
-                qr.add_data(f"https://yourfrontend.com/user/{self.pk}")
-                qr.make(fit=True)
-
-                img = qr.make_image(fill="black", back_color="white")
-                buffer = BytesIO()
-                img.save(buffer, format="PNG")
-                buffer.seek(0)
-                file_name = f"qr_{self.business_name}.png"
-                self.qr_code.save(file_name, File(buffer), save=False)
-            except Exception:
-                pass  # Don't fail if QR generation fails
-
+        self.geo_lat, self.geo_lng, self.geohash = geo.point_from_text(self.latitude, self.longitude)
+        self.phone_normalized = search.normalize_phone(self.phone)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and {"latitude", "longitude"} & set(update_fields):
+            kwargs["update_fields"] = update_fields = {*update_fields, "geo_lat", "geo_lng", "geohash"}
+        if update_fields is not None and "phone" in update_fields:
+            kwargs["update_fields"] = {*update_fields, "phone_normalized"}
         super().save(*args, **kwargs)
+        # ✅ cached copies used by CachedJWTAuthentication go stale once this commits
+        transaction.on_commit(partial(auth_cache.invalidate_user, self.pk))
+
+    def delete(self, *args, **kwargs):
+        user_id = self.pk
+        result = super().delete(*args, **kwargs)
+        transaction.on_commit(partial(auth_cache.invalidate_user, user_id))
+        return result
 
     def set_transaction_pin(self, raw_pin: str):
         """Set transaction PIN."""
@@ -136,24 +135,6 @@ class User(AbstractBaseUser, PermissionsMixin):
             return False
         return check_password(raw_pin, self.transaction_pin)
 
-    def generate_reset_otp(self):
-        """Generate 4-digit OTP for password reset."""
-        otp = str(random.randint(1000, 9999))
-        self.reset_otp = otp
-        self.otp_created_at = timezone.now()
-        self.save(update_fields=['reset_otp', 'otp_created_at'])
-        return otp
-
-    def validate_reset_otp(self, otp: str) -> bool:
-        """Check if OTP is valid and not expired (10 mins)."""
-        if not self.reset_otp or not self.otp_created_at:
-            return False
-        if self.reset_otp != otp:
-            return False
-        if timezone.now() > self.otp_created_at + timedelta(minutes=10):
-            return False
-        return True
-
     def __str__(self):
         return self.business_name
 
@@ -180,4 +161,87 @@ class Address(models.Model):
         verbose_name_plural = 'Addresses'
 
     def __str__(self):
-        return f"{self.street}, {self.city}, {self.state or ''}"
\ No newline at end of file
+        return f"{self.street}, {self.city}, {self.state or ''}"
+
+
+class OneTimeCode(models.Model):
+    """
+    Password-reset code for deployments without a shared cache (customers/otp.py).
+    Only an HMAC of the code is stored.
+    """
+    purpose = models.CharField(max_length=20)
+    email = models.EmailField()
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="+")
+    digest = models.CharField(max_length=64)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    expires_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["purpose", "email"], name="unique_one_time_code"),
+        ]
+
+    def __str__(self):
+        return f"{self.purpose} code for {self.email}"
+
+
+class Campaign(models.Model):
+    """
+    Flash-sale style SMS or email blast to customers, run by customers/campaigns.py.
+    `last_user_id` is the resume cursor; outcomes live in CampaignDelivery.
+    """
+    CHANNEL_CHOICES = [
+        ("sms", "SMS"),
+        ("email", "Email"),
+    ]
+    STATUS_CHOICES = [
+        ("draft", "Draft"),
+        ("running", "Running"),
+        ("paused", "Paused"),
+        ("done", "Done"),
+        ("failed", "Failed"),
+    ]
+
+    name = models.CharField(max_length=200)
+    channel = models.CharField(max_length=10, choices=CHANNEL_CHOICES, default="sms")
+    subject = models.CharField(max_length=200, blank=True, default="", help_text="Email only")
+    message = models.TextField(help_text="May use {name} and {business_name}")
+
+    # audience: every active user with a phone/email, narrowed by whichever of these are set
+    location = models.CharField(max_length=255, blank=True, default="")
+    sales_executive = models.CharField(max_length=255, blank=True, default="")
+
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="draft")
+    last_user_id = models.BigIntegerField(default=0, editable=False)
+    sent_count = models.IntegerField(default=0, editable=False)
+    failed_count = models.IntegerField(default=0, editable=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+
+    def __str__(self):
+        return f"{self.name} ({self.channel}, {self.status})"
+
+
+class CampaignDelivery(models.Model):
+    """Outcome of one campaign message to one customer."""
+    campaign = models.ForeignKey(Campaign, on_delete=models.CASCADE, related_name="deliveries")
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="campaign_deliveries")
+    recipient = models.CharField(max_length=255)
+    status = models.CharField(max_length=10, choices=[("sent", "Sent"), ("failed", "Failed")])
+    detail = models.CharField(max_length=255, blank=True, default="")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["campaign", "user"], name="campaign_delivery_uniq"),
+        ]
+        indexes = [
+            models.Index(fields=["campaign", "status"], name="campaign_delivery_status_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.campaign_id} → {self.recipient}: {self.status}"
@@ -0,0 +1,151 @@
+# customers/otp.py
+"""
+One-time codes (password reset), not kept on the user row.
+
+    code = otp.issue(user_id, email)       # in the forgot-password request
+    otp.verify(email, code)                # -> user id or None
+    otp.consume(email, code)               # same, but the code can't be used again
+
+The code is issued by the web request that asks for it; only the code is
+handed to the email job. Where it is stored depends on the cache:
+
+* A shared cache (Redis): entries expire after OTP_TTL_SECONDS, attempts are
+  counted with an atomic cache.incr, and verification needs no DB query.
+* A per-process LocMemCache (no REDIS_URL): a code stored there would be
+  invisible to every other web worker, so codes go to the OneTimeCode table
+  instead, with the attempt counter bumped by a conditional UPDATE.
+
+After OTP_MAX_ATTEMPTS wrong or right guesses the code is thrown away, so a
+4-digit code can't be brute forced. Only an HMAC of the code is stored,
+together with the user id, so a reset never needs to look the user up by email.
+"""
+import secrets
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F
+from django.utils import timezone
+from django.utils.crypto import constant_time_compare, salted_hmac
+
+from chiamo_project.utils import cache_is_shared
+
+from .models import OneTimeCode
+
+RESET = "reset"
+
+
+def _email(email):
+    return email.strip().lower()
+
+
+def _key(purpose, email):
+    return f"otp:{purpose}:{_email(email)}"
+
+
+def _digest(email, code):
+    return salted_hmac("customers.otp", f"{_email(email)}:{code}").hexdigest()
+
+
+# ---------------- Shared cache ----------------
+def _cache_issue(purpose, user_id, email, digest):
+    key = _key(purpose, email)
+    cache.set_many({key: {"digest": digest, "user_id": user_id}, f"{key}:attempts": 0}, settings.OTP_TTL_SECONDS)
+
+
+def _cache_check(purpose, email, code):
+    key = _key(purpose, email)
+    try:
+        attempts = cache.incr(f"{key}:attempts")
+    except ValueError:  # no code issued, or it expired
+        return None
+
+    entry = cache.get(key)
+    if entry is None:
+        return None
+    if attempts > settings.OTP_MAX_ATTEMPTS:
+        revoke(email, purpose)
+        return None
+    if not constant_time_compare(entry["digest"], _digest(email, code)):
+        return None
+    return entry["user_id"]
+
+
+def _cache_take(purpose, email):
+    key = _key(purpose, email)
+    if not cache.delete(key):  # someone else consumed it first
+        return False
+    cache.delete(f"{key}:attempts")
+    return True
+
+
+# ---------------- Database ----------------
+def _db_codes(purpose, email):
+    return OneTimeCode.objects.filter(purpose=purpose, email=_email(email))
+
+
+def _db_issue(purpose, user_id, email, digest):
+    OneTimeCode.objects.update_or_create(
+        purpose=purpose,
+        email=_email(email),
+        defaults={
+            "user_id": user_id,
+            "digest": digest,
+            "attempts": 0,
+            "expires_at": timezone.now() + timedelta(seconds=settings.OTP_TTL_SECONDS),
+        },
+    )
+
+
+def _db_check(purpose, email, code):
+    row = _db_codes(purpose, email).filter(expires_at__gt=timezone.now()).first()
+    if row is None:
+        return None
+    # count the attempt atomically; once the limit is reached no UPDATE matches
+    if not OneTimeCode.objects.filter(pk=row.pk, attempts__lt=settings.OTP_MAX_ATTEMPTS).update(
+        attempts=F("attempts") + 1
+    ):
+        revoke(email, purpose)
+        return None
+    if not constant_time_compare(row.digest, _digest(email, code)):
+        return None
+    return row.user_id
+
+
+def _db_take(purpose, email):
+    deleted, _ = _db_codes(purpose, email).delete()
+    return deleted > 0
+
+
+# ---------------- API ----------------
+def issue(user_id, email, purpose=RESET):
+    """Create a fresh 4-digit code for the user, replacing any earlier one. Returns the code."""
+    code = f"{secrets.randbelow(9000) + 1000}"
+    store = _cache_issue if cache_is_shared() else _db_issue
+    store(purpose, user_id, email, _digest(email, code))
+    return code
+
+
+def verify(email, code, purpose=RESET):
+    """Returns the user id the code was issued to, or None if it is wrong, expired or used up."""
+    check = _cache_check if cache_is_shared() else _db_check
+    return check(purpose, email, code)
+
+
+def consume(email, code, purpose=RESET):
+    """verify() and invalidate the code; only one caller can consume it."""
+    user_id = verify(email, code, purpose)
+    if user_id is None:
+        return None
+    take = _cache_take if cache_is_shared() else _db_take
+    if not take(purpose, email):
+        return None
+    return user_id
+
+
+def revoke(email, purpose=RESET):
+    if cache_is_shared():
+        key = _key(purpose, email)
+        cache.delete_many([key, f"{key}:attempts"])
+    else:
+        _db_codes(purpose, email).delete()
@@ -0,0 +1,84 @@
+# customers/qr.py
+"""
+Customer QR codes, generated off the request path.
+
+The QR image only depends on its payload (QR_CODE_BASE_URL + user id), and the
+file is named after a hash of that payload. The payload contains the user id,
+so every customer has their own file; the name just tells whether the stored
+image still matches the current payload (e.g. after QR_CODE_BASE_URL changes).
+ensure_qr_code() runs in a job queued at registration (tasks.generate_qr_code)
+and again where the code is shown (the profile endpoints) as a fallback; it
+does nothing when the stored name already matches, so User.save() never has
+to touch Pillow or storage. `manage.py
+backfill_qr_codes` regenerates them in bulk across a process pool.
+"""
+import hashlib
+import logging
+from io import BytesIO
+
+import qrcode
+from django.conf import settings
+from django.core.files.base import ContentFile
+
+from . import auth_cache
+
+logger = logging.getLogger(__name__)
+
+QR_UPLOAD_DIR = "qr_codes"
+
+
+def qr_payload(user):
+    return f"{settings.QR_CODE_BASE_URL.rstrip('/')}/user/{user.pk}"
+
+
+def qr_file_name(payload):
+    digest = hashlib.sha256(payload.encode()).hexdigest()[:32]
+    return f"{QR_UPLOAD_DIR}/{digest}.png"
+
+
+def render_qr_png(payload):
+    qr = qrcode.QRCode(version=1, box_size=10, border=5)
+    qr.add_data(payload)
+    qr.make(fit=True)
+
+    img = qr.make_image(fill="black", back_color="white")
+    buffer = BytesIO()
+    img.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def store_png(storage, name, png, replace=False):
+    """Write `png` under exactly `name`; with replace=True an existing file is overwritten."""
+    if replace and storage.exists(name):
+        storage.delete(name)
+    saved = storage.save(name, ContentFile(png))
+    if saved != name:  # someone else wrote the same file first
+        storage.delete(saved)
+
+
+def ensure_qr_code(user):
+    """
+    Make sure `user.qr_code` points at the image for its current payload,
+    rendering it only if no such file exists yet. Returns the FieldFile.
+    """
+    if user.pk is None:
+        return user.qr_code
+
+    payload = qr_payload(user)
+    name = qr_file_name(payload)
+    if user.qr_code.name == name:
+        return user.qr_code
+
+    storage = user.qr_code.storage
+    try:
+        if not storage.exists(name):
+            store_png(storage, name, render_qr_png(payload))
+    except Exception:
+        logger.exception("QR code generation failed for user %s", user.pk)
+        return user.qr_code  # don't fail the request over a QR code
+
+    # queryset update: no User.save(), no signals, only this column
+    type(user).objects.filter(pk=user.pk).update(qr_code=name)
+    auth_cache.invalidate_user(user.pk)
+    user.qr_code.name = name
+    return user.qr_code
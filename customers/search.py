@@ -0,0 +1,58 @@
+# customers/search.py
+"""
+Customer search for staff: the admin changelist and GET /api/customers/search/.
+
+Phone numbers are typed in many ways ("0803 123 4567", "+234-803-1234567",
+"2348031234567"). User.save() stores one canonical digits-only form in
+`phone_normalized` (234 followed by the national number), and digit queries
+are normalised the same way. So a number that starts with 0, +234 or 234 is
+a prefix match on phone_normalized (`LIKE '234803%'`). On PostgreSQL that
+uses the varchar_pattern_ops `_like` index Django adds for db_index=True,
+whatever the database collation; SQLite (local development) scans.
+
+Text queries match business_name or email with icontains. On PostgreSQL,
+migration 0005 adds pg_trgm GIN indexes on UPPER(business_name),
+UPPER(email) and phone_normalized. Those are exactly the expressions
+Django's icontains/contains lookups compare, so substring matches use the
+indexes instead of scanning the table. SQLite (local development only) has
+no trigram indexes and falls back to a scan.
+"""
+import re
+
+from django.db.models import Q
+
+MIN_QUERY_LENGTH = 3  # trigrams need three characters to narrow anything down
+COUNTRY_CODE = "234"
+
+_NON_DIGITS = re.compile(r"\D")
+
+
+def normalize_phone(raw):
+    """Canonical digits for a phone number, e.g. '0803 123 4567' -> '2348031234567'; '' if none."""
+    digits = _NON_DIGITS.sub("", raw or "")
+    if digits.startswith("00"):  # international dialling prefix
+        digits = digits[2:]
+    elif digits.startswith("0"):  # national trunk prefix
+        digits = COUNTRY_CODE + digits[1:]
+    elif len(digits) == 10:  # national number without the leading 0
+        digits = COUNTRY_CODE + digits
+    return digits[:20]
+
+
+def is_phone_query(term):
+    """Mostly digits (spaces, +, -, brackets allowed), e.g. '0803 12' or '+234 803'."""
+    digits = _NON_DIGITS.sub("", term)
+    return len(digits) >= MIN_QUERY_LENGTH and not re.search(r"[^\d\s+\-().]", term)
+
+
+def search_customers(queryset, term):
+    """Filter `queryset` to customers matching `term` (see module docstring)."""
+    term = term.strip()
+    if is_phone_query(term):
+        digits = _NON_DIGITS.sub("", term)
+        if term.startswith(("0", "+")) or digits.startswith(COUNTRY_CODE):
+            # the start of a full number: a prefix of the canonical form
+            return queryset.filter(phone_normalized__startswith=normalize_phone(term))
+        # a fragment from anywhere in the number
+        return queryset.filter(phone_normalized__contains=digits)
+    return queryset.filter(Q(business_name__icontains=term) | Q(email__icontains=term))
@@ -18,7 +18,7 @@ class UserSerializer(serializers.ModelSerializer):
     password = serializers.CharField(write_only=True, required=True, min_length=6)
     confirmPassword = serializers.CharField(write_only=True, required=True)
 
-    # QR code is read-only (generated by model.save)
+    # QR code is read-only (generated lazily by customers/qr.py)
     qr_code = serializers.ImageField(read_only=True)
 
     class Meta:
@@ -140,18 +140,19 @@ class LoginSerializer(serializers.Serializer):
 from rest_framework import serializers
 from django.contrib.auth.tokens import default_token_generator
 from rest_framework import serializers
+from . import otp
 from .models import User
 
 
 class ForgotPasswordSerializer(serializers.Serializer):
     email = serializers.EmailField()
 
-    def validate_email(self, value):
-        try:
-            user = User.objects.get(email=value)
-        except User.DoesNotExist:
-            raise serializers.ValidationError("No account found with this email.")
-        return value
+    def validate(self, data):
+        user_id = User.objects.filter(email=data["email"]).values_list("pk", flat=True).first()
+        if user_id is None:
+            raise serializers.ValidationError({"email": "No account found with this email."})
+        data["user_id"] = user_id
+        return data
 
 
 class VerifyOtpSerializer(serializers.Serializer):
@@ -159,14 +160,9 @@ class VerifyOtpSerializer(serializers.Serializer):
     otp = serializers.CharField(min_length=4, max_length=4)
 
     def validate(self, data):
-        try:
-            user = User.objects.get(email=data["email"])
-        except User.DoesNotExist:
-            raise serializers.ValidationError("Invalid user.")
-
-        if not user.validate_reset_otp(data["otp"]):
+        # OTPs live in the cache (customers/otp.py): no database query here
+        if otp.verify(data["email"], data["otp"]) is None:
             raise serializers.ValidationError("Invalid or expired OTP.")
-
         return data
 
 
@@ -176,22 +172,17 @@ class ResetPasswordSerializer(serializers.Serializer):
     new_password = serializers.CharField(min_length=6)
 
     def validate(self, data):
-        try:
-            user = User.objects.get(email=data["email"])
-        except User.DoesNotExist:
-            raise serializers.ValidationError("Invalid user.")
-
-        if not user.validate_reset_otp(data["otp"]):
+        user_id = otp.consume(data["email"], data["otp"])  # single use
+        if user_id is None:
             raise serializers.ValidationError("Invalid or expired OTP.")
-
+        data["user_id"] = user_id
         return data
 
     def save(self, **kwargs):
-        user = User.objects.get(email=self.validated_data["email"])
+        # one read, one write
+        user = User.objects.get(pk=self.validated_data["user_id"])
         user.set_password(self.validated_data["new_password"])
-        user.reset_otp = None  # clear OTP after use
-        user.otp_created_at = None
-        user.save()
+        user.save(update_fields=["password"])
         return user
 
 
@@ -245,3 +236,14 @@ class AddressSerializer(serializers.ModelSerializer):
         model = Address
         fields = '__all__'
         read_only_fields = ['user']
+
+
+class CustomerSearchSerializer(serializers.ModelSerializer):
+    """A search hit as shown to staff (GET /api/customers/search/)."""
+    businessName = serializers.CharField(source="business_name", read_only=True)
+    salesExecutive = serializers.CharField(source="sales_executive", read_only=True)
+
+    class Meta:
+        model = User
+        fields = ["id", "businessName", "name", "email", "phone", "location", "salesExecutive", "timestamp"]
+        read_only_fields = fields
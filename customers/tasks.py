@@ -0,0 +1,73 @@
+# customers/tasks.py
+"""
+Background jobs for account emails and SMS (run by `manage.py run_jobs`).
+Views enqueue these with .delay() so registration and password reset never
+wait on SMTP or Termii. The token refresh queue is flushed here too.
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.tokens import default_token_generator
+
+from chiamo_project.emails import send_email
+from jobs.queue import job
+
+from . import tokens
+from .qr import ensure_qr_code
+from .utils import sms
+
+User = get_user_model()
+
+
+@job
+def send_welcome_email(user_id):
+    user = User.objects.filter(pk=user_id).first()
+    if user is None:
+        return
+    send_email("🎉 Welcome to ChiamoOrder!", "emails/welcome_email.html", {"user": user}, [user.email])
+
+
+@job
+def send_welcome_sms(user_id):
+    user = User.objects.filter(pk=user_id).first()
+    if user is None or not user.phone:
+        return
+    # SMSError propagates so the job is retried (a read timeout included: better
+    # a rare duplicate welcome than none)
+    sms.get_client().send(
+        user.phone,
+        f"Hi {user.name}, welcome to ChiamoOrder 🎉. "
+        f"Your business '{user.business_name}' has been registered successfully.",
+    )
+
+
+@job
+def generate_qr_code(user_id):
+    user = User.objects.filter(pk=user_id).first()
+    if user is not None:
+        ensure_qr_code(user)
+
+
+@job(max_attempts=3)
+def send_password_reset_email(user_id, code):
+    user = User.objects.filter(pk=user_id).first()
+    if user is None:
+        return
+    # the OTP is issued by the web request (customers/otp.py); the link token is made here
+    token = default_token_generator.make_token(user)
+    send_email(
+        "Reset Your Password - ChiamoOrder",
+        "emails/reset_password_email.html",
+        {
+            "user": user,
+            "reset_link": f"{settings.EMAIL_SITE_URL}/reset-password/{user.pk}/{token}/",
+            "otp": code,
+            "otp_minutes": settings.OTP_TTL_SECONDS // 60,
+        },
+        [user.email],
+    )
+
+
+@job
+def flush_token_queue():
+    """Write the refresh-token rows queued in Redis (enqueued by tokens.record_tokens)."""
+    tokens.flush_pending()
@@ -1,3 +1,271 @@
-from django.test import TestCase
+import asyncio
+import io
+import json
+import random
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
 
-# Create your tests here.
+from axes.models import AccessAttempt
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework.test import APIClient
+
+from customers import geo, login
+from customers.importer import CustomerImporter, read_rows
+from customers.models import User
+from customers.utils.sms import AsyncTermiiClient, CircuitBreaker, SMSError, TermiiClient
+from customers.views import LoginView
+
+
+class _StandInTermii(BaseHTTPRequestHandler):
+    """
+    Local stand-in for Termii's send endpoint. Each request pops the next
+    scripted reply from the server: a status code, or "drop" to read the
+    request and close the connection without answering.
+    """
+
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        self.server.received.append(json.loads(body))
+        reply = self.server.replies.pop(0) if self.server.replies else 200
+        if reply == "drop":
+            self.close_connection = True
+            self.connection.shutdown(socket.SHUT_RDWR)
+            return
+        payload = json.dumps({"message": "Successfully Sent" if reply == 200 else "error"}).encode()
+        self.send_response(reply)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+class TermiiClientTests(SimpleTestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _StandInTermii)
+        self.server.received = []
+        self.server.replies = []
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def termii(self, **kwargs):
+        return TermiiClient(self.base_url, "key", "Chiamo", backoff=0, **kwargs)
+
+    def send_async(self, **kwargs):
+        async def run():
+            async with AsyncTermiiClient(self.base_url, "key", "Chiamo", backoff=0, **kwargs) as client:
+                return await client.send("+2348012345678", "hi")
+
+        return asyncio.run(run())
+
+    def test_send(self):
+        data = self.termii().send("+2348012345678", "hi")
+        self.assertEqual(data["message"], "Successfully Sent")
+        self.assertEqual(self.server.received[0]["to"], "+2348012345678")
+
+    def test_retries_5xx(self):
+        self.server.replies = [503, 200]
+        self.termii().send("+2348012345678", "hi")
+        self.assertEqual(len(self.server.received), 2)
+
+    def test_dropped_connection_is_not_retried(self):
+        self.server.replies = ["drop", 200]
+        with self.assertRaisesMessage(SMSError, "may have been sent"):
+            self.termii().send("+2348012345678", "hi")
+        self.assertEqual(len(self.server.received), 1)
+
+    def test_async_dropped_connection_is_not_retried(self):
+        self.server.replies = ["drop", 200]
+        with self.assertRaisesMessage(SMSError, "may have been sent"):
+            self.send_async()
+        self.assertEqual(len(self.server.received), 1)
+
+    def test_connect_failure_is_retried(self):
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            port = sock.getsockname()[1]  # nothing listens here once closed
+        breaker = CircuitBreaker(failure_threshold=10)
+        client = TermiiClient(f"http://127.0.0.1:{port}", "key", "Chiamo", backoff=0, max_retries=2, breaker=breaker)
+        with self.assertRaisesMessage(SMSError, "unreachable"):
+            client.send("+2348012345678", "hi")
+        self.assertEqual(breaker._failures, 3)
+
+    def test_half_open_trial_released_after_unexpected_error(self):
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+        breaker.record_failure()
+        client = self.termii(breaker=breaker)
+        client.session.post = lambda *args, **kwargs: 1 / 0
+        with self.assertRaises(ZeroDivisionError):
+            client.send("+2348012345678", "hi")
+        self.assertTrue(breaker.allow())
+
+
+@mock.patch.object(LoginView, "throttle_classes", [])
+@mock.patch.object(login.failure_log, "add", lambda *args: None)  # no background audit writer in tests
+class LoginLockoutTests(TestCase):
+    """Both lockout stores: cache counters (shared cache) and axes' database handler."""
+
+    def setUp(self):
+        cache.clear()
+        User.objects.create_user("Shop1", "s1@x.com", "pw12345678")
+        self.api = APIClient()
+
+    def post(self, business_name, password, forwarded_for="203.0.113.9"):
+        return self.api.post(
+            "/api/customers/login/",
+            {"business_name": business_name, "password": password},
+            format="json",
+            secure=True,
+            REMOTE_ADDR="198.51.100.1",
+            HTTP_X_FORWARDED_FOR=forwarded_for,
+        ).status_code
+
+    def for_each_store(self, check):
+        for shared in (True, False):
+            with self.subTest(shared_cache=shared), mock.patch.object(login, "cache_is_shared", return_value=shared):
+                cache.clear()
+                AccessAttempt.objects.all().delete()
+                check()
+
+    def test_locks_out_business_name(self):
+        def check():
+            codes = [self.post("Shop1", "wrong") for _ in range(settings.AXES_FAILURE_LIMIT)]
+            self.assertEqual(codes, [400] * settings.AXES_FAILURE_LIMIT)
+            self.assertEqual(self.post("Shop1", "pw12345678"), settings.AXES_HTTP_RESPONSE_CODE)
+
+        self.for_each_store(check)
+
+    def test_forwarded_for_does_not_escape_ip_limit(self):
+        def check():
+            for i in range(settings.AXES_FAILURE_LIMIT):
+                self.post(f"ghost{i}", "wrong", forwarded_for=f"10.0.0.{i}")
+            self.assertEqual(self.post("Shop1", "pw12345678", forwarded_for="10.0.1.1"),
+                             settings.AXES_HTTP_RESPONSE_CODE)
+
+        self.for_each_store(check)
+
+    def test_success_keeps_ip_counter(self):
+        def check():
+            for i in range(settings.AXES_FAILURE_LIMIT - 1):
+                self.post(f"ghost{i}", "wrong")
+            self.assertEqual(self.post("Shop1", "pw12345678"), 200)
+            self.assertEqual(self.post("ghost", "wrong"), 400)  # the limit-th failure from this IP
+            self.assertEqual(self.post("Shop1", "pw12345678"), settings.AXES_HTTP_RESPONSE_CODE)
+
+        self.for_each_store(check)
+
+
+@override_settings(PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"])
+class CustomerImportTests(TestCase):
+    ROWS = [
+        {"business_name": "Shop1", "email": "new1@x.com"},  # name taken in the database
+        {"business_name": "New1", "email": "s1@X.COM"},  # email taken (the domain is normalised)
+        {"business_name": "New2", "email": "new2@x.com", "password": "secret12"},
+        {"business_name": "New2", "email": "other@x.com"},  # name repeated in the file
+        {"business_name": "New3", "email": "new2@x.com"},  # email repeated in the file
+        {"businessName": "New4", "email": "new4@x.com", "phone": "0801 234 5678"},
+        {"business_name": "New5"},
+        ["not", "an", "object"],
+    ]
+
+    def setUp(self):
+        User.objects.create_user("Shop1", "s1@x.com", "pw12345678")
+
+    def ndjson(self, rows=None):
+        return io.StringIO("".join(json.dumps(row) + "\n" for row in (rows or self.ROWS)))
+
+    def run_import(self, **kwargs):
+        with ThreadPoolExecutor(2) as executor:  # same map() contract as the command's process pool
+            importer = CustomerImporter(executor, workers=2, chunk_size=2, **kwargs)
+            return importer.run(read_rows(self.ndjson(), "ndjson"))
+
+    def test_duplicates_are_reported_and_skipped(self):
+        stats = self.run_import()
+
+        self.assertEqual((stats.read, stats.imported), (8, 2))
+        self.assertEqual(
+            [(line, reason) for line, _, _, reason in stats.problems],
+            [
+                (1, "business_name already exists"),
+                (2, "email already exists"),
+                (4, "duplicate business_name in file"),
+                (5, "duplicate email in file"),
+                (7, "email is required"),
+                (8, "expected an object, got list"),
+            ],
+        )
+        self.assertEqual(
+            sorted(User.objects.values_list("business_name", flat=True)), ["New2", "New4", "Shop1"]
+        )
+        self.assertTrue(User.objects.get(business_name="New2").check_password("secret12"))
+        new4 = User.objects.get(business_name="New4")
+        self.assertFalse(new4.has_usable_password())
+        self.assertEqual(new4.phone_normalized, "2348012345678")
+
+    def test_chunk_collision_falls_back_to_row_inserts(self):
+        # a registration racing the import: the chunk's bulk insert fails
+        with mock.patch.object(CustomerImporter, "_drop_existing", lambda self, chunk: chunk):
+            stats = self.run_import()
+
+        self.assertEqual(stats.imported, 2)
+        self.assertIn((1, "Shop1", "new1@x.com", "business_name or email already exists"), stats.problems)
+        self.assertEqual(User.objects.count(), 3)
+
+    def test_dry_run_command(self):
+        out = io.StringIO()
+        with mock.patch("sys.stdin", self.ndjson()):
+            call_command("import_customers", "-", "--format", "ndjson", "--dry-run", stdout=out)
+        self.assertIn("2 of 8 shops would be imported, 6 skipped", out.getvalue())
+        self.assertEqual(User.objects.count(), 1)
+
+
+class NearestShopTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        rng = random.Random(46)
+        # a dense cluster around Lagos and a few shops hundreds of km away
+        points = [(6.4 + rng.random() * 0.4, 3.2 + rng.random() * 0.4) for _ in range(150)]
+        points += [(9.05, 7.49), (7.38, 3.94), (12.0, 8.52), (-33.9, 18.4)]
+        for i, (lat, lng) in enumerate(points):
+            User.objects.create(business_name=f"G{i}", email=f"g{i}@x.com", latitude=str(lat), longitude=str(lng))
+        User.objects.create(business_name="NoCoords", email="none@x.com", latitude="n/a", longitude="")
+
+    def brute_force(self, lat, lng, k):
+        shops = list(User.objects.exclude(geohash="").values_list("pk", "geo_lat", "geo_lng"))
+        distances = geo.haversine_km(lat, lng, [s[1] for s in shops], [s[2] for s in shops])
+        return [pk for _, pk in sorted(zip(distances, [s[0] for s in shops]))[:k]]
+
+    def test_encode(self):
+        self.assertEqual(geo.encode(57.64911, 10.40744), "u4pruydqq")
+        self.assertEqual(geo.point_from_text("6.5", "3.3")[2], geo.encode(6.5, 3.3))
+        self.assertEqual(geo.point_from_text("91", "3.3"), (None, None, ""))
+
+    def test_matches_brute_force(self):
+        # inside the cluster, at its edge, and far from it (the search has to widen)
+        for lat, lng, k in [(6.55, 3.35, 10), (6.8, 3.6, 5), (6.4, 3.2, 40), (9.0, 7.5, 3), (0.0, 0.0, 2)]:
+            with self.subTest(lat=lat, lng=lng, k=k):
+                found = geo.nearest(lat, lng, k=k)
+                self.assertEqual([user.pk for user, _ in found], self.brute_force(lat, lng, k))
+                distances = [distance for _, distance in found]
+                self.assertEqual(distances, sorted(distances))
+
+    def test_max_km(self):
+        found = geo.nearest(9.05, 7.49, k=10, max_km=50)
+        self.assertEqual([user.business_name for user, _ in found], ["G150"])
+
+    def test_skips_shops_without_coordinates(self):
+        found = geo.nearest(6.55, 3.35, k=1000)
+        self.assertEqual(len(found), 154)
+        self.assertNotIn("NoCoords", [user.business_name for user, _ in found])
@@ -0,0 +1,277 @@
+# customers/tokens.py
+"""
+Refresh-token rotation that keeps the blacklist tables off the hot path.
+
+With ROTATE_REFRESH_TOKENS + BLACKLIST_AFTER_ROTATION, simplejwt checks
+BlacklistedToken and writes OutstandingToken/BlacklistedToken rows (plus
+user lookups) on every refresh. Here, when REDIS_URL is set:
+
+* Blacklisted jtis are added to a Bloom filter in Redis: one bitmap per day of
+  token expiry, which expires with its tokens, so the filter never fills up.
+  A miss proves the token is not blacklisted, without touching the database.
+  A hit is confirmed against the pending set below and then the database,
+  so false positives cost one query and never reject a valid token.
+* The rotation's two rows are queued in a Redis list. The request that fills
+  TOKEN_WRITE_BATCH_SIZE, or finds the oldest entry older than
+  TOKEN_WRITE_MAX_DELAY_SECONDS, enqueues one flush job (customers/tasks.py),
+  and the jobs worker writes the rows with bulk_create. Until then the
+  blacklisted jti sits in a Redis set that the check also consults.
+* A flush holds a Redis lock, reads a batch with LRANGE and LTRIMs it off the
+  queue only after the database write succeeded. A failed write leaves the
+  rows queued for the next flush; a crash in between writes them twice,
+  which the bulk_create(ignore_conflicts=True) absorbs.
+
+Without Redis the tables are the only shared state between processes, so the
+check stays a database lookup and the rows are written straight away (in one
+bulk_create each). `manage.py purge_tokens` flushes the queue, deletes
+expired tokens in chunks and can rebuild the filter.
+"""
+import hashlib
+import json
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt import serializers as jwt_serializers
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import BlacklistMixin, RefreshToken
+from rest_framework_simplejwt.utils import datetime_from_epoch
+
+from . import auth_cache
+
+BLOOM_KEY = "chiamoorder:tokens:bloom:{day}"
+PENDING_KEY = "chiamoorder:tokens:pending"  # JSON rows not yet in the database
+PENDING_JTIS_KEY = "chiamoorder:tokens:pending_jtis"  # blacklisted jtis among them
+PENDING_SINCE_KEY = "chiamoorder:tokens:pending_since"
+FLUSH_SCHEDULED_KEY = "chiamoorder:tokens:flush_scheduled"  # a flush job is queued
+FLUSH_LOCK_KEY = "chiamoorder:tokens:flush_lock"
+FLUSH_LOCK_SECONDS = 300
+
+DAY = 24 * 60 * 60
+
+_redis = None
+_redis_lock = threading.Lock()
+
+
+def _redis_client():
+    global _redis
+    with _redis_lock:
+        if _redis is None:
+            import redis
+            _redis = redis.Redis.from_url(settings.REDIS_URL)
+    return _redis
+
+
+# ---------------- Bloom filter ----------------
+def _bloom_key(exp):
+    return BLOOM_KEY.format(day=int(exp) // DAY)
+
+
+def _positions(jti):
+    digest = hashlib.sha256(jti.encode()).digest()
+    h1 = int.from_bytes(digest[:8], "big")
+    h2 = int.from_bytes(digest[8:16], "big") | 1
+    bits = settings.TOKEN_BLACKLIST_BLOOM_BITS
+    return [(h1 + i * h2) % bits for i in range(settings.TOKEN_BLACKLIST_BLOOM_HASHES)]
+
+
+def _bloom_add(pipe, jti, exp):
+    key = _bloom_key(exp)
+    for position in _positions(jti):
+        pipe.setbit(key, position, 1)
+    pipe.expireat(key, (int(exp) // DAY + 1) * DAY + 3600)
+
+
+def add_to_blacklist_filter(jtis_with_exp):
+    """Add (jti, exp) pairs to the filter, e.g. rows blacklisted from the admin."""
+    pipe = _redis_client().pipeline(transaction=False)
+    for jti, exp in jtis_with_exp:
+        _bloom_add(pipe, jti, exp)
+    pipe.execute()
+
+
+def blacklisted_token_saved(sender, instance, created, **kwargs):
+    if created:
+        transaction.on_commit(
+            lambda: add_to_blacklist_filter([(instance.token.jti, instance.token.expires_at.timestamp())])
+        )
+
+
+def is_blacklisted(jti, exp):
+    if not settings.REDIS_URL:
+        return BlacklistedToken.objects.filter(token__jti=jti).exists()
+
+    client = _redis_client()
+    pipe = client.pipeline(transaction=False)
+    key = _bloom_key(exp)
+    for position in _positions(jti):
+        pipe.getbit(key, position)
+    if not all(pipe.execute()):
+        return False
+    # real hit or false positive: ask the pending set, then the database
+    return bool(client.sismember(PENDING_JTIS_KEY, jti)) or BlacklistedToken.objects.filter(token__jti=jti).exists()
+
+
+# ---------------- Writes ----------------
+def token_row(token, blacklist=False):
+    """Snapshot of a token as an OutstandingToken row (taken now, before it is rotated)."""
+    return {
+        "jti": token[api_settings.JTI_CLAIM],
+        "user_id": token.payload.get(api_settings.USER_ID_CLAIM),
+        "token": str(token),
+        "created_at": token.current_time.timestamp(),
+        "exp": token["exp"],
+        "blacklist": blacklist,
+    }
+
+
+def _write_rows(rows):
+    User = get_user_model()
+    user_ids = {str(row["user_id"]) for row in rows if row["user_id"] is not None}
+    existing = {str(pk) for pk in User.objects.filter(pk__in=user_ids).values_list("pk", flat=True)}
+    blacklisted = [row["jti"] for row in rows if row["blacklist"]]
+
+    with transaction.atomic():
+        OutstandingToken.objects.bulk_create(
+            [
+                OutstandingToken(
+                    jti=row["jti"],
+                    user_id=row["user_id"] if str(row["user_id"]) in existing else None,
+                    token=row["token"],
+                    created_at=datetime_from_epoch(row["created_at"]),
+                    expires_at=datetime_from_epoch(row["exp"]),
+                )
+                for row in rows
+            ],
+            ignore_conflicts=True,
+        )
+        if blacklisted:
+            token_ids = OutstandingToken.objects.filter(jti__in=blacklisted).values_list("id", flat=True)
+            BlacklistedToken.objects.bulk_create(
+                [BlacklistedToken(token_id=token_id) for token_id in token_ids], ignore_conflicts=True
+            )
+    return blacklisted
+
+
+def record_tokens(rows):
+    """Persist OutstandingToken rows (and blacklist those marked), batched when Redis is available."""
+    if not settings.REDIS_URL:
+        _write_rows(rows)
+        return
+
+    client = _redis_client()
+    pipe = client.pipeline()  # MULTI: filter, pending set and queue change together
+    blacklisted = [row for row in rows if row["blacklist"]]
+    for row in blacklisted:
+        _bloom_add(pipe, row["jti"], row["exp"])
+    if blacklisted:
+        pipe.sadd(PENDING_JTIS_KEY, *(row["jti"] for row in blacklisted))
+        pipe.expire(PENDING_JTIS_KEY, int(api_settings.REFRESH_TOKEN_LIFETIME.total_seconds()))
+    pipe.rpush(PENDING_KEY, *(json.dumps(row) for row in rows))
+    pipe.set(PENDING_SINCE_KEY, time.time(), nx=True)
+    pipe.get(PENDING_SINCE_KEY)
+    results = pipe.execute()
+
+    queued, since = results[-3], float(results[-1])
+    if queued >= settings.TOKEN_WRITE_BATCH_SIZE or time.time() - since > settings.TOKEN_WRITE_MAX_DELAY_SECONDS:
+        # one job at a time; the key expires in case the job is lost
+        if client.set(FLUSH_SCHEDULED_KEY, 1, nx=True, ex=settings.TOKEN_WRITE_MAX_DELAY_SECONDS):
+            from .tasks import flush_token_queue
+            flush_token_queue.delay()
+
+
+def flush_pending(batch_size=None):
+    """
+    Write queued token rows to the database. Returns how many were written
+    (0 if another flush holds the lock).
+    """
+    if not settings.REDIS_URL:
+        return 0
+
+    client = _redis_client()
+    lock = client.lock(FLUSH_LOCK_KEY, timeout=FLUSH_LOCK_SECONDS)
+    if not lock.acquire(blocking=False):
+        return 0
+
+    batch_size = batch_size or settings.TOKEN_WRITE_BATCH_SIZE
+    written = 0
+    try:
+        client.delete(FLUSH_SCHEDULED_KEY, PENDING_SINCE_KEY)
+        while True:
+            raw = client.lrange(PENDING_KEY, 0, batch_size - 1)
+            if not raw:
+                return written
+            blacklisted = _write_rows([json.loads(item) for item in raw])
+            # only now leave the queue; new rows are appended at the other end
+            client.ltrim(PENDING_KEY, len(raw), -1)
+            if blacklisted:
+                client.srem(PENDING_JTIS_KEY, *blacklisted)
+            written += len(raw)
+    finally:
+        lock.release()
+
+
+# ---------------- simplejwt integration ----------------
+class RotatingRefreshToken(RefreshToken):
+    """RefreshToken whose blacklist check and bookkeeping go through this module."""
+
+    def check_blacklist(self):
+        if is_blacklisted(self.payload[api_settings.JTI_CLAIM], self.payload["exp"]):
+            raise TokenError(_("Token is blacklisted"))
+
+    def blacklist(self):
+        record_tokens([token_row(self, blacklist=True)])
+
+    def outstand(self):
+        record_tokens([token_row(self)])
+
+    @classmethod
+    def for_user(cls, user):
+        token = super(BlacklistMixin, cls).for_user(user)  # skip the synchronous OutstandingToken insert
+        token.outstand()
+        return token
+
+
+class TokenRefreshSerializer(jwt_serializers.TokenRefreshSerializer):
+    """
+    POST /api/token/refresh/
+    Same contract as simplejwt's; the user comes from customers/auth_cache.py
+    and the rotation is written through record_tokens().
+    """
+
+    token_class = RotatingRefreshToken
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs["refresh"])
+
+        user_id = refresh.payload.get(api_settings.USER_ID_CLAIM, None)
+        if user_id:
+            user, stamp = auth_cache.get_user(user_id)
+            if user is None:
+                user = get_user_model().objects.filter(**{api_settings.USER_ID_FIELD: user_id}).first()
+                if user is not None:
+                    auth_cache.set_user(user, stamp)
+            if not api_settings.USER_AUTHENTICATION_RULE(user):
+                raise AuthenticationFailed(self.error_messages["no_active_account"], "no_active_account")
+
+        data = {"access": str(refresh.access_token)}
+
+        if api_settings.ROTATE_REFRESH_TOKENS:
+            rows = []
+            if api_settings.BLACKLIST_AFTER_ROTATION:
+                rows.append(token_row(refresh, blacklist=True))
+
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+            rows.append(token_row(refresh))
+            record_tokens(rows)
+
+            data["refresh"] = str(refresh)
+
+        return data
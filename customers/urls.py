@@ -14,6 +14,8 @@ urlpatterns = [
     path("reset-password/", views.reset_password, name="reset-password"),
     path("profile/", ProfileView.as_view(), name="profile"),
     path("theme/", ThemeUpdateView.as_view(), name="theme-update"),
+    path("nearby/", views.NearbyShopsView.as_view(), name="nearby-shops"),
+    path("search/", views.CustomerSearchView.as_view(), name="customer-search"),
     path('has-transaction-pin/<int:pk>/', views.HasTransactionPinView.as_view(), name='has-transaction-pin'),
     path('addresses/', views.addresses, name='addresses'),
     path('addresses/<int:pk>/', views.address_detail, name='address_detail'),
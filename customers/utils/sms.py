@@ -1,31 +1,378 @@
 # utils/sms.py
+"""
+Termii SMS client.
+
+One TermiiClient per process keeps a pooled `requests.Session`, so messages
+reuse warm keep-alive connections instead of a TCP + TLS handshake each.
+Every call has a connect and a read timeout. Failures that are safe to repeat
+are retried with exponential backoff and jitter: failures to connect, connect
+timeouts, 429 and 5xx. When a 429 or 503 carries Retry-After, the retry
+waits at least that long (giving up if it asks for more than
+MAX_RETRY_AFTER seconds). A read timeout or a connection dropped after the
+request went out is not retried, because Termii may already have accepted
+the message. A circuit breaker stops calling Termii for
+a while after repeated failures, so an outage fails fast instead of tying up
+job threads.
+
+The base URL comes from settings (TERMII_BASE_URL), which lets tests point
+the client at a local stand-in server.
+"""
+import asyncio
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+import aiohttp
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
 from django.conf import settings
 
+SEND_PATH = "/api/sms/send"
+BULK_PATH = "/api/sms/send/bulk"
+BULK_MAX_RECIPIENTS = 10000  # Termii's per-request limit for the bulk endpoint
+SUCCESS_MESSAGE = "Successfully Sent"
+MAX_RETRY_AFTER = 60  # seconds; a longer Retry-After fails the call instead of waiting
+
+
+class SMSError(Exception):
+    """Termii could not be reached or rejected the message."""
+
+    def __init__(self, message, response=None):
+        super().__init__(message)
+        self.response = response
+
+
+class CircuitOpenError(SMSError):
+    """Raised without calling Termii while the circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """
+    Closed: calls go through. After `failure_threshold` consecutive failures it
+    opens and rejects calls for `reset_timeout` seconds, then lets one trial
+    call through (half-open); success closes it, failure re-opens it.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state()
+
+    def _state(self):
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def allow(self):
+        with self._lock:
+            state = self._state()
+            if state == "closed":
+                return True
+            if state == "half-open" and not self._trial_running:
+                self._trial_running = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._trial_running = False
+            if self._opened_at is not None or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+
+    def release(self):
+        """
+        End a call that may have recorded neither outcome (it raised, or was
+        cancelled), so a half-open trial can't hold the breaker open for good.
+        """
+        with self._lock:
+            self._trial_running = False
+
+
+class _TermiiBase:
+    def __init__(self, base_url, api_key, sender_id, max_retries=3, backoff=0.5, breaker=None):
+        self.base_url = base_url.rstrip("/")
+        self.api_key = api_key
+        self.sender_id = sender_id
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.breaker = breaker or CircuitBreaker()
+
+    def _payload(self, to, message, channel, type):
+        return {
+            "to": to,
+            "from": self.sender_id,
+            "sms": message,
+            "type": type,  # plain, unicode, flash
+            "channel": channel,  # dnd, whatsapp, generic
+            "api_key": self.api_key,
+        }
+
+    def _retry_delay(self, attempt, retry_after=None):
+        delay = random.uniform(0, self.backoff * 2 ** attempt)  # full jitter
+        return max(delay, retry_after or 0)
+
+    @staticmethod
+    def _retry_after(headers):
+        """Seconds from a Retry-After header (delay or HTTP date), or None."""
+        value = headers.get("Retry-After")
+        if not value:
+            return None
+        try:
+            return max(float(value), 0)
+        except ValueError:
+            pass
+        try:
+            return max(parsedate_to_datetime(value).timestamp() - time.time(), 0)
+        except (TypeError, ValueError):
+            return None
+
+    @staticmethod
+    def _connect_failed(exc):
+        """True if a requests ConnectionError happened before the request was sent."""
+        if isinstance(exc, requests.exceptions.ConnectTimeout):
+            return True
+        reason = getattr(exc.args[0], "reason", None) if exc.args else None  # urllib3's MaxRetryError
+        return isinstance(reason, NewConnectionError)  # includes DNS failures
+
+    @staticmethod
+    def _retryable_status(status_code):
+        return status_code == 429 or status_code >= 500
+
+    @staticmethod
+    def _check(status_code, data, response):
+        if status_code != 200 or data.get("message") != SUCCESS_MESSAGE:
+            raise SMSError(f"Termii rejected the message: {data}", response)
+        return data
+
+
+class TermiiClient(_TermiiBase):
+    def __init__(
+        self,
+        base_url,
+        api_key,
+        sender_id,
+        connect_timeout=3.05,
+        read_timeout=10,
+        max_retries=3,
+        backoff=0.5,
+        pool_size=10,
+        breaker=None,
+    ):
+        super().__init__(base_url, api_key, sender_id, max_retries, backoff, breaker)
+        self.timeout = (connect_timeout, read_timeout)
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    # ---------------- public API ----------------
+    def send(self, to, message, channel="generic", type="plain"):
+        """Send one SMS. Returns Termii's JSON response; raises SMSError."""
+        return self._post(SEND_PATH, self._payload(to, message, channel, type))
+
+    def send_bulk(self, recipients, message, channel="generic", type="plain"):
+        """
+        Send the same SMS to many numbers, BULK_MAX_RECIPIENTS per request.
+        Returns the list of Termii responses; raises SMSError on the first failed request.
+        """
+        recipients = list(recipients)
+        return [
+            self._post(BULK_PATH, self._payload(recipients[i:i + BULK_MAX_RECIPIENTS], message, channel, type))
+            for i in range(0, len(recipients), BULK_MAX_RECIPIENTS)
+        ]
+
+    # ---------------- internals ----------------
+    def _post(self, path, payload):
+        url = self.base_url + path
+        attempt = 0
+        while True:
+            retry_after = None
+            if not self.breaker.allow():
+                raise CircuitOpenError("Termii circuit breaker is open")
+
+            try:
+                try:
+                    response = self.session.post(url, json=payload, timeout=self.timeout)
+                except requests.exceptions.ReadTimeout as exc:
+                    self.breaker.record_failure()
+                    raise SMSError("Termii read timed out; message may have been sent") from exc
+                except requests.ConnectionError as exc:
+                    self.breaker.record_failure()
+                    if not self._connect_failed(exc):
+                        raise SMSError(f"Termii connection lost; message may have been sent: {exc}") from exc
+                    if attempt >= self.max_retries:
+                        raise SMSError(f"Termii unreachable: {exc}") from exc
+                else:
+                    if self._retryable_status(response.status_code):
+                        self.breaker.record_failure()
+                        retry_after = self._retry_after(response.headers)
+                        if attempt >= self.max_retries or (retry_after or 0) > MAX_RETRY_AFTER:
+                            raise SMSError(f"Termii returned HTTP {response.status_code}", response)
+                    else:
+                        # a 4xx is our request's fault, not Termii's health
+                        self.breaker.record_success()
+                        try:
+                            data = response.json()
+                        except ValueError:
+                            raise SMSError("Invalid JSON response from Termii", response)
+                        return self._check(response.status_code, data, response)
+            finally:
+                self.breaker.release()
+
+            time.sleep(self._retry_delay(attempt, retry_after))
+            attempt += 1
+
+
+class AsyncTermiiClient(_TermiiBase):
+    """
+    asyncio twin of TermiiClient for campaigns (customers/campaigns.py): one
+    aiohttp session and connection pool, same timeout, retry and breaker rules.
+    Use as `async with AsyncTermiiClient(...) as client`; the session is opened
+    on entry because it has to belong to the running event loop.
+
+    `rate_limiter` (anything with an async `acquire()`, e.g. campaigns.TokenBucket)
+    is awaited before every request, retries included.
+    """
+
+    def __init__(
+        self,
+        base_url,
+        api_key,
+        sender_id,
+        connect_timeout=3.05,
+        read_timeout=10,
+        max_retries=3,
+        backoff=0.5,
+        max_connections=50,
+        breaker=None,
+        rate_limiter=None,
+    ):
+        super().__init__(base_url, api_key, sender_id, max_retries, backoff, breaker)
+        self.timeout = aiohttp.ClientTimeout(total=None, sock_connect=connect_timeout, sock_read=read_timeout)
+        self.max_connections = max_connections
+        self.rate_limiter = rate_limiter
+        self.session = None
+
+    async def __aenter__(self):
+        self.session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=self.max_connections),
+            timeout=self.timeout,
+        )
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.session.close()
+        self.session = None
+
+    async def send(self, to, message, channel="generic", type="plain"):
+        """Send one SMS. Returns Termii's JSON response; raises SMSError."""
+        url = self.base_url + SEND_PATH
+        payload = self._payload(to, message, channel, type)
+        attempt = 0
+        while True:
+            retry_after = None
+            if not self.breaker.allow():
+                raise CircuitOpenError("Termii circuit breaker is open")
+            if self.rate_limiter is not None:
+                await self.rate_limiter.acquire()
+
+            try:
+                try:
+                    async with self.session.post(url, json=payload) as response:
+                        status_code = response.status
+                        if self._retryable_status(status_code):
+                            retry_after = self._retry_after(response.headers)
+                        else:
+                            try:
+                                data = await response.json(content_type=None)
+                            except ValueError:
+                                data = None
+                except (aiohttp.ClientConnectorError, aiohttp.ConnectionTimeoutError) as exc:  # never connected
+                    self.breaker.record_failure()
+                    if attempt >= self.max_retries:
+                        raise SMSError(f"Termii unreachable: {exc}") from exc
+                except aiohttp.SocketTimeoutError as exc:  # read timeout
+                    self.breaker.record_failure()
+                    raise SMSError("Termii read timed out; message may have been sent") from exc
+                except aiohttp.ClientConnectionError as exc:  # e.g. ServerDisconnectedError
+                    self.breaker.record_failure()
+                    raise SMSError(f"Termii connection lost; message may have been sent: {exc}") from exc
+                else:
+                    if self._retryable_status(status_code):
+                        self.breaker.record_failure()
+                        if attempt >= self.max_retries or (retry_after or 0) > MAX_RETRY_AFTER:
+                            raise SMSError(f"Termii returned HTTP {status_code}", response)
+                    else:
+                        self.breaker.record_success()
+                        if data is None:
+                            raise SMSError("Invalid JSON response from Termii", response)
+                        return self._check(status_code, data, response)
+            finally:
+                self.breaker.release()
+
+            await asyncio.sleep(self._retry_delay(attempt, retry_after))
+            attempt += 1
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """The process-wide client built from TERMII_* settings."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = TermiiClient(
+                base_url=settings.TERMII_BASE_URL,
+                api_key=settings.TERMII_API_KEY,
+                sender_id=settings.TERMII_SENDER_ID,
+                connect_timeout=settings.TERMII_CONNECT_TIMEOUT,
+                read_timeout=settings.TERMII_READ_TIMEOUT,
+                max_retries=settings.TERMII_MAX_RETRIES,
+                pool_size=settings.TERMII_POOL_SIZE,
+                breaker=CircuitBreaker(
+                    settings.TERMII_BREAKER_THRESHOLD, settings.TERMII_BREAKER_RESET_SECONDS
+                ),
+            )
+    return _client
+
+
 def send_sms(to, message):
     """
     Sends an SMS using Termii API.
     :param to: Recipient phone number (e.g., +2348012345678)
     :param message: SMS message string
     """
-    url = settings.TERMII_BASE_URL
-    payload = {
-        "to": to,
-        "from": settings.TERMII_SENDER_ID,  # Can also use "Termii" if Sender ID not approved yet
-        "sms": message,
-        "type": "plain",  # plain, unicode, flash
-        "channel": "generic",  # dnd, whatsapp, generic
-        "api_key": settings.TERMII_API_KEY
-    }
-
-    response = requests.post(url, json=payload)
+    try:
+        return {"status": "success", "detail": get_client().send(to, message)}
+    except SMSError as exc:
+        return {"status": "error", "detail": str(exc)}
+
 
+def send_bulk_sms(recipients, message):
+    """Same message to many numbers through the bulk endpoint; same return shape as send_sms."""
     try:
-        response_data = response.json()
-    except Exception:
-        return {"status": "error", "detail": "Invalid JSON response from Termii"}
-
-    if response.status_code == 200 and response_data.get("message") == "Successfully Sent":
-        return {"status": "success", "detail": response_data}
-    else:
-        return {"status": "error", "detail": response_data}
+        return {"status": "success", "detail": get_client().send_bulk(recipients, message)}
+    except SMSError as exc:
+        return {"status": "error", "detail": str(exc)}
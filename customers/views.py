@@ -2,23 +2,21 @@ from rest_framework import generics, status
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny, IsAuthenticated
-from rest_framework.decorators import api_view
+from rest_framework.decorators import api_view, permission_classes
 from rest_framework_simplejwt.authentication import JWTAuthentication
-from rest_framework_simplejwt.tokens import RefreshToken
-
-from django.contrib.auth import authenticate, get_user_model
-from django.core.mail import EmailMultiAlternatives
-from django.template.loader import render_to_string
-from django.utils.html import strip_tags
-from django.utils import timezone
-from django.contrib.auth.tokens import default_token_generator
-from django.urls import reverse
+
+from django.contrib.auth import get_user_model
 from django.conf import settings
+from django.db import transaction
+
+from rest_framework.pagination import PageNumberPagination
 
-import requests
-import os
-import datetime
+from chiamo_project.permissions import IsSalesExecutive, IsStaffRole
 
+from . import geo, otp, search, tasks
+from .login import LoginResult, login
+from .qr import ensure_qr_code
+from .tokens import RotatingRefreshToken
 from .models import User
 from .serializers import (
     UserSerializer,
@@ -29,6 +27,7 @@ from .serializers import (
     ResetPasswordSerializer,
     VerifyOtpSerializer,
     ProfileUpdateSerializer,
+    CustomerSearchSerializer,
 )
 
 # ✅ User model reference
@@ -45,52 +44,12 @@ class RegisterView(generics.CreateAPIView):
     authentication_classes = []  # Disable JWT auth for registration
 
     def perform_create(self, serializer):
-        user = serializer.save()
-
-        # Send Welcome Email
-        subject = "🎉 Welcome to ChiamoOrder!"
-        context = {
-            "user": user,
-            "domain": "http://127.0.0.1:8000",
-            "year": datetime.datetime.now().year,
-        }
-
-        html_message = render_to_string("emails/welcome_email.html", context)
-        plain_message = strip_tags(html_message)
-
-        from_email = settings.DEFAULT_FROM_EMAIL
-        recipient_list = [user.email]
-
-        try:
-            email = EmailMultiAlternatives(
-                subject, plain_message, from_email, recipient_list
-            )
-            email.attach_alternative(html_message, "text/html")
-            email.send()
-            print(f"📩 Welcome email sent to {user.email}")
-        except Exception as e:
-            print("❌ Email sending failed:", e)
-
-        # Send Welcome SMS (Termii)
-        TERMII_API_KEY = os.getenv("TERMII_API_KEY")
-        TERMII_BASE_URL = "https://api.ng.termii.com/api/sms/send"
-        TERMII_SENDER_ID = os.getenv("TERMII_SENDER_ID", "ChiamoOrder")
-
-        sms_payload = {
-            "to": user.phone,
-            "from": TERMII_SENDER_ID,
-            "sms": f"Hi {user.name}, welcome to ChiamoOrder 🎉. "
-                   f"Your business '{user.business_name}' has been registered successfully.",
-            "type": "plain",
-            "channel": "generic",
-            "api_key": TERMII_API_KEY,
-        }
-
-        try:
-            response = requests.post(TERMII_BASE_URL, json=sms_payload)
-            print("📲 Termii SMS response:", response.json())
-        except Exception as e:
-            print("❌ SMS sending failed:", e)
+        # ✅ Welcome email + SMS and the QR code are queued with the user row and run by the job worker
+        with transaction.atomic():
+            user = serializer.save()
+            tasks.send_welcome_email.delay(user.pk)
+            tasks.send_welcome_sms.delay(user.pk)
+            tasks.generate_qr_code.delay(user.pk)
 
 
 # ==========================
@@ -185,18 +144,21 @@ class LoginView(APIView):
                 status=400
             )
 
-        user = authenticate(
-            request,
-            business_name=business_name,
-            password=password
-        )
+        # ✅ one user query; lockout counters live in the cache (customers/login.py)
+        result = login(request, business_name, password)
 
-        if user is None:
-            if not User.objects.filter(business_name=business_name).exists():
-                return Response({"error": "Invalid business name ❌"}, status=400)
+        if result.status == LoginResult.LOCKED_OUT:
+            return Response(
+                {"error": "Too many failed login attempts. Try again later."},
+                status=settings.AXES_HTTP_RESPONSE_CODE
+            )
+        if result.status == LoginResult.UNKNOWN_USER:
+            return Response({"error": "Invalid business name ❌"}, status=400)
+        if result.status == LoginResult.BAD_PASSWORD:
             return Response({"error": "Incorrect password ❌"}, status=400)
 
-        refresh = RefreshToken.for_user(user)
+        user = result.user
+        refresh = RotatingRefreshToken.for_user(user)
 
         return Response({
             "refresh": str(refresh),
@@ -214,38 +176,24 @@ class LoginView(APIView):
 # PASSWORD RESET VIEWS
 # ==========================
 class ForgotPasswordView(APIView):
+    permission_classes = [AllowAny]
+    authentication_classes = []
+
     def post(self, request):
         serializer = ForgotPasswordSerializer(data=request.data)
         if not serializer.is_valid():
             return Response(serializer.errors, status=400)
 
-        email = serializer.validated_data["email"]
-        user = User.objects.get(email=email)
-
-        token = default_token_generator.make_token(user)
-        reset_link = f"http://127.0.0.1:8000/reset-password/{user.pk}/{token}/"
-
-        context = {
-            "user": user,
-            "reset_link": reset_link,
-            "year": timezone.now().year,
-        }
-        html_content = render_to_string("emails/reset_password_email.html", context)
-        text_content = strip_tags(html_content)
-
-        email_message = EmailMultiAlternatives(
-            subject="Reset Your Password - ChiamoOrder",
-            body=text_content,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            to=[user.email],
-        )
-        email_message.attach_alternative(html_content, "text/html")
-        email_message.send()
+        # issued here, in the process that will verify it, not in the job worker
+        user_id = serializer.validated_data["user_id"]
+        code = otp.issue(user_id, serializer.validated_data["email"])
+        tasks.send_password_reset_email.delay(user_id, code)
 
         return Response({"message": "Password reset email sent successfully 📩"}, status=200)
 
 
 @api_view(["POST"])
+@permission_classes([AllowAny])
 def verify_otp(request):
     serializer = VerifyOtpSerializer(data=request.data)
     if serializer.is_valid():
@@ -254,23 +202,17 @@ def verify_otp(request):
 
 
 @api_view(["POST"])
-def reset_password(user, reset_link):
-    subject = "Reset Your Password - ChiamoOrder"
-    context = {
-        "user": user,
-        "reset_link": reset_link,
-        "domain": "http://127.0.0.1:8000",
-        "year": datetime.datetime.now().year,
-    }
-
-    html_message = render_to_string("emails/reset_password_email.html", context)
-    plain_message = strip_tags(html_message)
-
-    email = EmailMultiAlternatives(
-        subject, plain_message, "chiamoorder@gmail.com", [user.email],
-    )
-    email.attach_alternative(html_message, "text/html")
-    email.send()
+@permission_classes([AllowAny])
+def reset_password(request):
+    """
+    POST /api/customers/reset-password/
+    Set a new password with the emailed OTP: {"email", "otp", "new_password"}.
+    """
+    serializer = ResetPasswordSerializer(data=request.data)
+    if serializer.is_valid():
+        serializer.save()
+        return Response({"message": "Password reset successfully ✅"}, status=200)
+    return Response(serializer.errors, status=400)
 
 
 # ==========================
@@ -281,6 +223,7 @@ class ProfileView(APIView):
 
     def get(self, request):
         user = request.user
+        ensure_qr_code(user)  # ✅ normally done by the registration job; renders here only if missing
         serializer = ProfileUpdateSerializer(user)
         return Response(serializer.data, status=200)
 
@@ -289,6 +232,7 @@ class ProfileView(APIView):
         serializer = ProfileUpdateSerializer(user, data=request.data, partial=True)
         if serializer.is_valid():
             serializer.save()
+            ensure_qr_code(user)
             return Response(serializer.data, status=200)
         return Response(serializer.errors, status=400)
 
@@ -311,10 +255,86 @@ class ThemeUpdateView(APIView):
             return Response({"error": "Invalid theme"}, status=400)
 
         user.theme = theme
-        user.save()
+        user.save(update_fields=["theme"])
         return Response({"message": "Theme updated successfully", "theme": user.theme}, status=200)
 
 
+# ==========================
+# NEARBY SHOPS (SALES EXECUTIVES)
+# ==========================
+class NearbyShopsView(APIView):
+    """
+    GET /api/customers/nearby/?lat=&lng=&k=20&max_km=
+    The k shops nearest to a point (default: the caller's own coordinates), closest first.
+    """
+    permission_classes = [IsAuthenticated, IsSalesExecutive]
+    MAX_K = 100
+
+    def get(self, request):
+        params = request.query_params
+        try:
+            if "lat" in params or "lng" in params:
+                lat, lng = float(params["lat"]), float(params["lng"])
+            else:
+                lat, lng = request.user.geo_lat, request.user.geo_lng
+            k = int(params.get("k", 20))
+            max_km = float(params["max_km"]) if params.get("max_km") else None
+        except (KeyError, ValueError):
+            return Response({"error": "lat, lng, k and max_km must be numbers"}, status=400)
+
+        if lat is None or lng is None:
+            return Response({"error": "lat and lng are required"}, status=400)
+        if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+            return Response({"error": "lat/lng out of range"}, status=400)
+        if not 1 <= k <= self.MAX_K:
+            return Response({"error": f"k must be between 1 and {self.MAX_K}"}, status=400)
+
+        shops = geo.nearest(
+            lat, lng, k=k, max_km=max_km,
+            queryset=User.objects.filter(is_active=True).exclude(pk=request.user.pk),
+        )
+        return Response([
+            {
+                "id": shop.id,
+                "businessName": shop.business_name,
+                "name": shop.name,
+                "phone": shop.phone,
+                "location": shop.location,
+                "latitude": shop.geo_lat,
+                "longitude": shop.geo_lng,
+                "distance_km": round(distance, 3),
+            }
+            for shop, distance in shops
+        ], status=200)
+
+
+# ==========================
+# CUSTOMER SEARCH (STAFF)
+# ==========================
+class CustomerSearchPagination(PageNumberPagination):
+    page_size = 20
+    page_size_query_param = "page_size"
+    max_page_size = 100
+
+
+class CustomerSearchView(generics.ListAPIView):
+    """
+    GET /api/customers/search/?q=<name, email or phone>&page=&page_size=
+    Paginated, newest customers first. Restricted to staff and back-office groups.
+    """
+    permission_classes = [IsAuthenticated, IsStaffRole]
+    serializer_class = CustomerSearchSerializer
+    pagination_class = CustomerSearchPagination
+
+    def get_queryset(self):
+        return search.search_customers(User.objects.all(), self.request.query_params.get("q", "")).order_by("-id")
+
+    def list(self, request, *args, **kwargs):
+        if len(request.query_params.get("q", "").strip()) < search.MIN_QUERY_LENGTH:
+            return Response({"error": f"q must be at least {search.MIN_QUERY_LENGTH} characters"}, status=400)
+        return super().list(request, *args, **kwargs)
+
+
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
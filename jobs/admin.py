@@ -0,0 +1,20 @@
+from django.contrib import admin
+from django.utils import timezone
+
+from .models import Job
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ("id", "name", "status", "attempts", "run_at", "locked_by", "created_at")
+    list_filter = ("status", "name")
+    search_fields = ("name",)
+    readonly_fields = ("attempts", "locked_by", "locked_at", "last_error", "created_at", "finished_at")
+    actions = ["requeue"]
+
+    @admin.action(description="Requeue selected jobs")
+    def requeue(self, request, queryset):
+        count = queryset.exclude(status__in=["queued", "running"]).update(
+            status="queued", attempts=0, run_at=timezone.now(), last_error=""
+        )
+        self.message_user(request, f"{count} jobs requeued")
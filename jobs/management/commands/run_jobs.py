@@ -0,0 +1,70 @@
+import signal
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from jobs.queue import claim, heartbeat, purge_finished, requeue_stale, run
+
+
+class Command(BaseCommand):
+    help = "Run queued background jobs (emails, SMS) on a thread pool"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=settings.JOBS_THREADS)
+        parser.add_argument("--once", action="store_true", help="Run what is due now, then exit")
+        parser.add_argument("--purge-days", type=int, default=None,
+                            help="Delete finished jobs older than this many days, then exit")
+
+    def handle(self, *args, **options):
+        if options["purge_days"] is not None:
+            deleted = purge_finished(options["purge_days"])
+            self.stdout.write(self.style.SUCCESS(f"🧹 Deleted {deleted} finished jobs"))
+            return
+
+        self.stopping = False
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+
+        threads = options["threads"]
+        requeued = requeue_stale()
+        self.stdout.write(f"⚙️  Job worker started with {threads} threads ({requeued} stale jobs requeued)")
+
+        in_flight = set()
+        last_stale_check = self.last_heartbeat = time.monotonic()
+        with ThreadPoolExecutor(max_workers=threads, thread_name_prefix="job") as pool:
+            while not self.stopping:
+                free = threads - len(in_flight)
+                claimed = claim(free) if free else []
+                for job in claimed:
+                    in_flight.add(pool.submit(run, job))
+
+                if not in_flight:
+                    if options["once"]:
+                        break
+                    time.sleep(settings.JOBS_POLL_SECONDS)
+                elif not claimed or len(in_flight) >= threads:
+                    done, in_flight = wait(in_flight, timeout=settings.JOBS_POLL_SECONDS,
+                                           return_when=FIRST_COMPLETED)
+
+                self._heartbeat()
+                if time.monotonic() - last_stale_check > settings.JOBS_STALE_SECONDS:
+                    requeue_stale()
+                    last_stale_check = time.monotonic()
+
+            # finish what is running; unclaimed jobs stay queued for the next worker
+            while in_flight:
+                done, in_flight = wait(in_flight, timeout=settings.JOBS_POLL_SECONDS)
+                self._heartbeat()
+
+        self.stdout.write(self.style.SUCCESS("✅ Job worker stopped"))
+
+    def _heartbeat(self):
+        """Keep our running jobs' locks fresh so requeue_stale() leaves them alone."""
+        if time.monotonic() - self.last_heartbeat > settings.JOBS_HEARTBEAT_SECONDS:
+            heartbeat()
+            self.last_heartbeat = time.monotonic()
+
+    def _stop(self, signum, frame):
+        self.stopping = True
@@ -0,0 +1,152 @@
+# jobs/queue.py
+"""
+Lightweight database-backed job queue.
+
+    @job(max_attempts=5)
+    def send_welcome_email(user_id): ...
+
+    send_welcome_email.delay(user.pk)      # enqueue; returns immediately
+
+delay() INSERTs a Job row. Inside a transaction the job becomes visible to
+workers only when that transaction commits, so a job never runs for a user
+whose registration rolled back. `manage.py run_jobs` claims due jobs with
+SELECT ... FOR UPDATE SKIP LOCKED and runs them on a thread pool, since the
+work (SMTP, SMS gateways) is almost all network wait. While a job runs, its
+worker refreshes locked_at every JOBS_HEARTBEAT_SECONDS; only a job whose
+heartbeat stopped (the worker died) is requeued by requeue_stale(), so a
+long job is never started a second time alongside the first.
+
+Failed jobs are retried with exponential backoff plus jitter; after
+`max_attempts` they are left with status "dead" for inspection and requeue
+from the admin. Arguments must be JSON-serialisable: pass ids, not instances.
+"""
+import logging
+import os
+import random
+import socket
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+_registry = {}
+
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+
+class JobFunction:
+    """A registered job: call it directly to run inline, .delay() to enqueue."""
+
+    def __init__(self, func, name, max_attempts):
+        self.func = func
+        self.name = name
+        self.max_attempts = max_attempts
+        self.__doc__ = func.__doc__
+
+    def __call__(self, *args, **kwargs):
+        return self.func(*args, **kwargs)
+
+    def delay(self, *args, **kwargs):
+        return enqueue(self.name, *args, **kwargs)
+
+    def delay_in(self, seconds, *args, **kwargs):
+        return enqueue(self.name, *args, _run_at=timezone.now() + timedelta(seconds=seconds), **kwargs)
+
+
+def job(func=None, *, name=None, max_attempts=None):
+    """Register a function as a job. Usable as @job or @job(max_attempts=3)."""
+    def register(f):
+        job_name = name or f"{f.__module__}.{f.__name__}"
+        wrapped = JobFunction(f, job_name, max_attempts or settings.JOBS_MAX_ATTEMPTS)
+        _registry[job_name] = wrapped
+        return wrapped
+
+    return register(func) if func is not None else register
+
+
+def enqueue(name, *args, _run_at=None, **kwargs):
+    registered = _registry.get(name)
+    if registered is None:
+        raise ValueError(f"Unknown job: {name}")
+    return Job.objects.create(
+        name=name,
+        args=list(args),
+        kwargs=kwargs,
+        max_attempts=registered.max_attempts,
+        run_at=_run_at or timezone.now(),
+    )
+
+
+def _backoff(attempts):
+    base = min(settings.JOBS_BACKOFF_SECONDS * 2 ** (attempts - 1), settings.JOBS_MAX_BACKOFF_SECONDS)
+    return timedelta(seconds=base * random.uniform(0.8, 1.2))
+
+
+# ---------------- Worker side ----------------
+def heartbeat(worker_id=WORKER_ID):
+    """Renew the lock on every job this worker is running. Returns rows touched."""
+    return Job.objects.filter(status="running", locked_by=worker_id).update(locked_at=timezone.now())
+
+
+def requeue_stale():
+    """Put back jobs whose worker died mid-run (no heartbeat for JOBS_STALE_SECONDS)."""
+    cutoff = timezone.now() - timedelta(seconds=settings.JOBS_STALE_SECONDS)
+    return Job.objects.filter(status="running", locked_at__lt=cutoff).update(
+        status="queued", locked_by="", locked_at=None
+    )
+
+
+def claim(limit, worker_id=WORKER_ID):
+    """Lock up to `limit` due jobs for this worker and mark them running."""
+    now = timezone.now()
+    with transaction.atomic():
+        jobs = list(
+            Job.objects.select_for_update(skip_locked=True)
+            .filter(status="queued", run_at__lte=now)
+            .order_by("run_at", "id")[:limit]
+        )
+        for claimed in jobs:
+            claimed.status = "running"
+            claimed.attempts += 1
+            claimed.locked_by = worker_id
+            claimed.locked_at = now
+        Job.objects.bulk_update(jobs, ["status", "attempts", "locked_by", "locked_at"])
+    return jobs
+
+
+def run(claimed):
+    """Execute one claimed job and record the outcome. Runs on a pool thread."""
+    close_old_connections()
+    try:
+        registered = _registry.get(claimed.name)
+        if registered is None:
+            raise LookupError(f"No job registered as {claimed.name}")
+        registered.func(*claimed.args, **claimed.kwargs)
+    except Exception as exc:
+        logger.exception("Job %s (%s) failed on attempt %s", claimed.pk, claimed.name, claimed.attempts)
+        fields = {"last_error": f"{type(exc).__name__}: {exc}", "locked_by": "", "locked_at": None}
+        if claimed.attempts >= claimed.max_attempts:
+            fields.update(status="dead", finished_at=timezone.now())
+        else:
+            fields.update(status="queued", run_at=timezone.now() + _backoff(claimed.attempts))
+        Job.objects.filter(pk=claimed.pk).update(**fields)
+        return False
+    else:
+        Job.objects.filter(pk=claimed.pk).update(
+            status="done", finished_at=timezone.now(), locked_by="", locked_at=None
+        )
+        return True
+    finally:
+        close_old_connections()
+
+
+def purge_finished(older_than_days=7):
+    """Delete successful jobs older than the given age. Dead jobs are kept."""
+    cutoff = timezone.now() - timedelta(days=older_than_days)
+    deleted, _ = Job.objects.filter(status="done", finished_at__lt=cutoff).delete()
+    return deleted
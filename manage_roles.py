@@ -22,6 +22,7 @@ def create_roles():
     # Create groups if they don't exist
     invoicer_group, _ = Group.objects.get_or_create(name="InvoicerAdmin")
     logistics_group, _ = Group.objects.get_or_create(name="LogisticsAdmin")
+    sales_group, _ = Group.objects.get_or_create(name="SalesExecutive")
 
     # Get content types
     order_ct = ContentType.objects.get_for_model(Order)
@@ -37,9 +38,13 @@ def create_roles():
     )
     logistics_group.permissions.set(logistics_perms)
 
+    # --- SalesExecutive: can view customers (nearby shops API) ---
+    sales_group.permissions.set(Permission.objects.filter(content_type=user_ct, codename__startswith="view_"))
+
     print("✅ Roles created successfully:")
     print(" - InvoicerAdmin (can manage Orders)")
     print(" - LogisticsAdmin (can manage Orders & Customers)")
+    print(" - SalesExecutive (can view Customers / nearby shops)")
 
 if __name__ == "__main__":
     create_roles()
@@ -1,8 +1,16 @@
 from django.contrib import admin
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from .services import record_placed_order
+from .tasks import send_broadcast_job
+from .export import stream_export, streaming_content
+from .notifications import recount_unread
 from .models import (
     Cart, CartItem, Order, OrderItem,
     SmartList, SmartListItem,
-    SupportMessage, Notification
+    SupportMessage, Notification,
+    ArchivedOrder, ArchivedOrderItem,
+    Broadcast, OutboxEvent,
 )
 
 # ------------------------------
@@ -31,10 +39,24 @@ class OrderItemInline(admin.TabularInline):
 class OrderAdmin(admin.ModelAdmin):
     """Admin for viewing and managing orders."""
 
-    list_display = ("id", "user", "status", "total", "created_at")
+    list_display = ("id", "user", "status", "priority", "claimed_by", "total", "created_at")
     list_filter = ("status", "created_at")
     search_fields = ("user__username",)
     inlines = [OrderItemInline]
+    actions = ["export_csv"]
+
+    @admin.action(description="Export selected orders (CSV)", permissions=["view"])
+    def export_csv(self, request, queryset):
+        # Streams straight from the DB instead of materialising the changelist
+        lines, content_type = stream_export("csv", orders=queryset)
+        response = StreamingHttpResponse(streaming_content(request, lines), content_type=content_type)
+        response["Content-Disposition"] = 'attachment; filename="orders.csv"'
+        return response
+
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        if not change:  # a new order, now with its items: rollups and outbox, as for checkout
+            record_placed_order(form.instance)
 
     # --- Permission Control ---
     def has_module_permission(self, request):
@@ -53,6 +75,40 @@ class OrderAdmin(admin.ModelAdmin):
         return request.user.has_perm("orders.delete_order")
 
 
+# ------------------------------
+# Archived orders (read-only, see orders/archive.py)
+# ------------------------------
+class ArchivedOrderItemInline(admin.TabularInline):
+    model = ArchivedOrderItem
+    extra = 0
+    can_delete = False
+    readonly_fields = ("product", "quantity", "price")
+
+
+@admin.register(ArchivedOrder)
+class ArchivedOrderAdmin(admin.ModelAdmin):
+    list_display = ("id", "order_id", "user", "status", "total", "created_at", "archived_at")
+    list_filter = ("status",)
+    search_fields = ("order_id",)
+    date_hierarchy = "created_at"
+    inlines = [ArchivedOrderItemInline]
+
+    def has_module_permission(self, request):
+        return request.user.has_perm("orders.view_order")
+
+    def has_view_permission(self, request, obj=None):
+        return request.user.has_perm("orders.view_order")
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
 # ------------------------------
 # SmartList & SmartListItem
 # ------------------------------
@@ -93,3 +149,58 @@ class NotificationAdmin(admin.ModelAdmin):
     list_display = ("user", "title", "type", "is_read", "created_at")
     list_filter = ("type", "is_read", "created_at")
     search_fields = ("user__username", "title", "message")
+
+    # Admin edits bypass orders/notifications.py, so re-sync the unread counters
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        recount_unread([obj.user_id])
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        recount_unread([obj.user_id])
+
+    def delete_queryset(self, request, queryset):
+        user_ids = list(queryset.values_list("user_id", flat=True).distinct())
+        super().delete_queryset(request, queryset)
+        recount_unread(user_ids)
+
+
+# ------------------------------
+# Broadcast
+# ------------------------------
+@admin.register(Broadcast)
+class BroadcastAdmin(admin.ModelAdmin):
+    list_display = ("title", "type", "location", "sales_executive", "status", "sent_count", "created_at")
+    list_filter = ("type", "status", "created_at")
+    search_fields = ("title", "message")
+    readonly_fields = ("status", "sent_count", "last_user_id", "created_by", "started_at", "finished_at")
+    actions = ["send_selected"]
+
+    def save_model(self, request, obj, form, change):
+        if not obj.created_by_id:
+            obj.created_by = request.user
+        super().save_model(request, obj, form, change)
+
+    @admin.action(description="Send (or resume) selected broadcasts")
+    def send_selected(self, request, queryset):
+        # the fan-out runs in the jobs worker, not in this request
+        for broadcast in queryset.exclude(status="sent"):
+            send_broadcast_job.delay(broadcast.pk)
+            self.message_user(request, f"{broadcast.title}: queued for sending")
+
+
+# ------------------------------
+# Outbox
+# ------------------------------
+@admin.register(OutboxEvent)
+class OutboxEventAdmin(admin.ModelAdmin):
+    list_display = ("id", "topic", "aggregate_id", "status", "attempts", "available_at", "created_at")
+    list_filter = ("status", "topic")
+    search_fields = ("topic", "aggregate_id")
+    readonly_fields = ("topic", "aggregate_id", "payload", "attempts", "last_error", "created_at", "processed_at")
+    actions = ["requeue"]
+
+    @admin.action(description="Requeue selected events")
+    def requeue(self, request, queryset):
+        count = queryset.exclude(status="pending").update(status="pending", attempts=0, available_at=timezone.now())
+        self.message_user(request, f"{count} events requeued")
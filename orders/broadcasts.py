@@ -0,0 +1,92 @@
+# orders/broadcasts.py
+"""
+Broadcast fan-out: one promo/system notification written to every matching user.
+
+Recipients are read in primary-key order, one chunk at a time after the
+broadcast's cursor (`last_user_id`), so memory stays bounded by the chunk
+size rather than the audience. Each chunk is one transaction: the Broadcast
+row is locked with SELECT ... FOR UPDATE, the next chunk is read from the
+cursor as committed, notify_many() writes it (a bulk INSERT of notifications
+and two statements for the unread counters) and the cursor advances. A send
+that dies half way therefore resumes from the last committed chunk, and two
+runners of the same broadcast (the admin action's job and
+`send_broadcast --resume`, say) take turns instead of both notifying the
+same users.
+"""
+import logging
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Broadcast
+from .notifications import notify_many
+
+logger = logging.getLogger(__name__)
+
+BROADCAST_CHUNK_SIZE = 2000
+
+
+def audience(broadcast):
+    """Active users the broadcast targets, as a queryset."""
+    users = get_user_model().objects.filter(is_active=True)
+    if broadcast.location:
+        users = users.filter(location__iexact=broadcast.location)
+    if broadcast.sales_executive:
+        users = users.filter(sales_executive__iexact=broadcast.sales_executive)
+    return users
+
+
+def _deliver_next_chunk(broadcast, chunk_size):
+    """Notify the next `chunk_size` users after the cursor; returns how many (0 once done)."""
+    with transaction.atomic():
+        locked = Broadcast.objects.select_for_update().get(pk=broadcast.pk)
+        user_ids = list(
+            audience(locked)
+            .filter(pk__gt=locked.last_user_id)
+            .order_by("pk")
+            .values_list("pk", flat=True)[:chunk_size]
+        )
+        if user_ids:
+            notify_many(user_ids, locked.title, locked.message, type=locked.type)
+            Broadcast.objects.filter(pk=locked.pk).update(
+                last_user_id=user_ids[-1], sent_count=locked.sent_count + len(user_ids)
+            )
+            locked.last_user_id, locked.sent_count = user_ids[-1], locked.sent_count + len(user_ids)
+    broadcast.last_user_id, broadcast.sent_count = locked.last_user_id, locked.sent_count
+    return len(user_ids)
+
+
+def send_broadcast(broadcast, chunk_size=BROADCAST_CHUNK_SIZE, progress=None):
+    """
+    Fan the broadcast out to its audience, continuing from `last_user_id`.
+    Calling it again on a "sending" or "failed" broadcast resumes it.
+    `progress(broadcast)` is called after every committed chunk.
+    Returns the number of notifications written by this call.
+    """
+    if broadcast.status == "sent":
+        return 0
+
+    broadcast.status = "sending"
+    broadcast.started_at = broadcast.started_at or timezone.now()
+    broadcast.save(update_fields=["status", "started_at"])
+
+    written = 0
+    try:
+        while True:
+            count = _deliver_next_chunk(broadcast, chunk_size)
+            if not count:
+                break
+            written += count
+            if progress:
+                progress(broadcast)
+    except Exception:
+        logger.exception("Broadcast %s stopped after user %s", broadcast.pk, broadcast.last_user_id)
+        broadcast.status = "failed"
+        broadcast.save(update_fields=["status"])
+        raise
+
+    broadcast.status = "sent"
+    broadcast.finished_at = timezone.now()
+    broadcast.save(update_fields=["status", "finished_at"])
+    return written
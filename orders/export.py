@@ -0,0 +1,210 @@
+# orders/export.py
+"""
+Streaming order export for invoicing.
+
+One row per order line; an order without lines still gets one row, with the
+line columns left empty. Orders are read with a server-side cursor
+(`.iterator(chunk_size=...)`), their lines prefetched one chunk at a time, and
+written out one line at a time, so memory stays flat no matter how many
+orders match the filters.
+
+Under ASGI, Django buffers a sync StreamingHttpResponse completely
+(sync_to_async(list)) before sending it. streaming_content() therefore hands
+the ASGI handler an async iterator, which pulls a block of lines at a time
+from a worker thread. Under WSGI it passes the sync iterator through as is.
+"""
+import csv
+import json
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.db.models import Prefetch
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from .models import Order, OrderItem
+
+EXPORT_CHUNK_SIZE = 2000
+
+EXPORT_FIELDS = [
+    "order_id",
+    "order_created_at",
+    "status",
+    "source",
+    "order_total",
+    "customer_id",
+    "business_name",
+    "customer_email",
+    "line_id",
+    "product_id",
+    "product_name",
+    "quantity",
+    "unit_price",
+    "line_total",
+]
+
+# columns read from the order and its customer, and from each order line
+_ORDER_COLUMNS = ["order_id", "created_at", "status", "source", "total", "user_id",
+                  "user__business_name", "user__email"]
+_LINE_COLUMNS = ["id", "order_id", "product_id", "product__name", "quantity", "price"]
+
+
+def _start_of_day(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def parse_export_filters(params):
+    """
+    Build filter kwargs from query params / command options.
+    Accepts date_from, date_to (inclusive, YYYY-MM-DD), status and source.
+    Raises ValueError on bad input.
+    """
+    filters = {}
+
+    days = {}
+    for key in ("date_from", "date_to"):
+        raw = params.get(key)
+        if not raw:
+            continue
+        day = parse_date(str(raw))
+        if day is None:
+            raise ValueError(f"{key} must be a date in YYYY-MM-DD format")
+        days[key] = day
+        if key == "date_from":
+            filters["created_at__gte"] = _start_of_day(day)
+        else:
+            # half-open range keeps the created_at index usable (no __date cast)
+            filters["created_at__lt"] = _start_of_day(day + timedelta(days=1))
+    if len(days) == 2 and days["date_from"] > days["date_to"]:
+        raise ValueError("date_from must not be after date_to")
+
+    status = params.get("status")
+    if status:
+        valid = dict(Order.STATUS_CHOICES)
+        statuses = [s.strip() for s in str(status).split(",") if s.strip()]
+        unknown = [s for s in statuses if s not in valid]
+        if unknown:
+            raise ValueError(f"Unknown status: {', '.join(unknown)}")
+        filters["status__in"] = statuses
+
+    source = params.get("source")
+    if source:
+        if source not in dict(Order.SOURCE_CHOICES):
+            raise ValueError(f"Unknown source: {source}")
+        filters["source"] = source
+
+    return filters
+
+
+def export_queryset(filters=None, orders=None):
+    """
+    Orders matching `filters` (Order field lookups), oldest first, with their
+    customer joined and their lines prefetched.
+    `orders` optionally restricts the export to an Order queryset (admin action).
+    """
+    qs = Order.objects.filter(**(filters or {}))
+    if orders is not None:
+        qs = qs.filter(pk__in=orders.values("pk"))
+    lines = OrderItem.objects.select_related("product").only(*_LINE_COLUMNS).order_by("id")
+    return (
+        qs.select_related("user")
+        .only(*_ORDER_COLUMNS)
+        .prefetch_related(Prefetch("items", queryset=lines))
+        .order_by("created_at", "id")
+    )
+
+
+def _line_values(line):
+    if line is None:
+        return dict.fromkeys(["line_id", "product_id", "product_name", "quantity", "unit_price", "line_total"])
+    return {
+        "line_id": line.id,
+        "product_id": line.product_id,
+        "product_name": line.product.name if line.product else None,
+        "quantity": line.quantity,
+        "unit_price": line.price,
+        "line_total": (line.price or Decimal("0")) * line.quantity,
+    }
+
+
+def iter_rows(queryset, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Yield one dict per order line (one with empty line columns for an order
+    without lines), streaming orders from a server-side cursor.
+    """
+    for order in queryset.iterator(chunk_size=chunk_size):  # lines are prefetched per chunk
+        base = {
+            "order_id": order.order_id,
+            "order_created_at": order.created_at,
+            "status": order.status,
+            "source": order.source,
+            "order_total": order.total,
+            "customer_id": order.user_id,
+            "business_name": order.user.business_name,
+            "customer_email": order.user.email,
+        }
+        for line in order.items.all() or [None]:
+            yield {**base, **_line_values(line)}
+
+
+class _Echo:
+    """File-like object whose write() just hands the line back to csv.writer."""
+
+    def write(self, value):
+        return value
+
+
+def _format_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+def iter_csv(rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(EXPORT_FIELDS)
+    for row in rows:
+        yield writer.writerow([_format_value(row[name]) for name in EXPORT_FIELDS])
+
+
+def iter_ndjson(rows):
+    for row in rows:
+        yield json.dumps({name: _format_value(row[name]) for name in EXPORT_FIELDS}) + "\n"
+
+
+EXPORT_FORMATS = {
+    "csv": (iter_csv, "text/csv"),
+    "ndjson": (iter_ndjson, "application/x-ndjson"),
+}
+
+
+def stream_export(fmt, filters=None, orders=None, chunk_size=EXPORT_CHUNK_SIZE):
+    """Return (line iterator, content type) for the requested format."""
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format: {fmt}")
+    encoder, content_type = EXPORT_FORMATS[fmt]
+    rows = iter_rows(export_queryset(filters, orders), chunk_size=chunk_size)
+    return encoder(rows), content_type
+
+
+async def _async_lines(lines, block_size):
+    next_block = sync_to_async(lambda: "".join(islice(lines, block_size)))
+    try:
+        while block := await next_block():
+            yield block
+    finally:
+        # release the server-side cursor if the client went away mid-download
+        await sync_to_async(lines.close)()
+
+
+def streaming_content(request, lines, block_size=500):
+    """`lines` in the form the running server streams without buffering (see module docstring)."""
+    request = getattr(request, "_request", request)  # DRF Request -> HttpRequest
+    if isinstance(request, ASGIRequest):
+        return _async_lines(lines, block_size)
+    return lines
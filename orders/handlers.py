@@ -0,0 +1,68 @@
+# orders/handlers.py
+"""
+Outbox handlers for order events, registered on import by OrdersConfig.ready().
+They run in the dispatcher, never in the request that placed or updated the order.
+A notification is keyed on its event (Notification.outbox_event), so
+redelivering an event never notifies the customer twice.
+"""
+from collections import defaultdict
+
+from chiamo_project import emails
+
+from . import outbox
+from .models import Order, OrderItem
+from .notifications import create_order_notification
+
+# status changes the customer is told about
+NOTIFIED_STATUSES = ("shipped", "delivered")
+
+
+def _order(event):
+    return Order.objects.select_related("user").filter(pk=event.aggregate_id).first()
+
+
+@outbox.handler(outbox.ORDER_PLACED)
+def notify_order_placed(event):
+    order = _order(event)
+    if order is not None:
+        create_order_notification(order.user, order, "placed", outbox_event=event)
+
+
+@outbox.handler(outbox.ORDER_STATUS_CHANGED)
+def notify_order_status(event):
+    if event.payload.get("status") not in NOTIFIED_STATUSES:
+        return
+    order = _order(event)
+    if order is not None:
+        create_order_notification(order.user, order, event.payload["status"], outbox_event=event)
+
+
+@outbox.handler(outbox.ORDER_PLACED, batch=True)
+def email_order_confirmations(events):
+    """
+    One confirmation email per placed order, all sent over one SMTP connection.
+    Returns {event id: exception} for the emails that weren't sent.
+    """
+    orders = Order.objects.select_related("user").in_bulk([event.aggregate_id for event in events])
+    items = defaultdict(list)
+    for line in OrderItem.objects.filter(order_id__in=orders).values(
+        "order_id", "quantity", "price", "product__name"
+    ):
+        items[line["order_id"]].append(
+            {"name": line["product__name"] or "Deleted Product", "quantity": line["quantity"], "price": line["price"]}
+        )
+
+    to_send = []  # (event, message)
+    for event in events:
+        order = orders.get(event.aggregate_id)
+        if order is None or not order.user.email:
+            continue
+        to_send.append((event, emails.build_email(
+            f"Order {order.order_id} confirmed - ChiamoOrder",
+            "emails/order_confirmation.html",
+            {"user": order.user, "order": order, "items": items[order.pk]},
+            [order.user.email],
+        )))
+
+    results = emails.send_messages([message for _, message in to_send])
+    return {event.pk: error for (event, _), error in zip(to_send, results) if error is not None}
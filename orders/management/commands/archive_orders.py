@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+
+from orders.archive import ARCHIVE_AFTER_DAYS, archivable_orders, archive_batch, archive_cutoff
+
+
+class Command(BaseCommand):
+    help = "Move delivered/cancelled orders older than N days into the archive tables"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=ARCHIVE_AFTER_DAYS)
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument("--max-batches", type=int, default=None)
+        parser.add_argument("--dry-run", action="store_true", help="Only count what would be archived")
+
+    def handle(self, *args, **options):
+        cutoff = archive_cutoff(options["days"])
+
+        if options["dry_run"]:
+            count = archivable_orders(cutoff).count()
+            self.stdout.write(f"🗄️  {count} orders created before {cutoff:%Y-%m-%d} would be archived")
+            return
+
+        moved = 0
+        batches = 0
+        while options["max_batches"] is None or batches < options["max_batches"]:
+            count = archive_batch(cutoff, options["batch_size"])
+            if not count:
+                break
+            moved += count
+            batches += 1
+            self.stdout.write(f"📦 Batch {batches}: archived {count} orders")
+
+        self.stdout.write(self.style.SUCCESS(f"✅ Archived {moved} orders created before {cutoff:%Y-%m-%d}"))
@@ -0,0 +1,33 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from orders.outbox import dispatch_batch, purge_processed
+
+
+class Command(BaseCommand):
+    help = "Deliver pending order events from the outbox to their handlers"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=settings.OUTBOX_BATCH_SIZE)
+        parser.add_argument("--once", action="store_true", help="Drain what is due now, then exit")
+        parser.add_argument("--purge-days", type=int, default=None,
+                            help="Delete delivered events older than this many days, then exit")
+
+    def handle(self, *args, **options):
+        if options["purge_days"] is not None:
+            deleted = purge_processed(options["purge_days"])
+            self.stdout.write(self.style.SUCCESS(f"🧹 Deleted {deleted} delivered outbox events"))
+            return
+
+        self.stdout.write(f"📬 Outbox dispatcher started (batch size {options['batch_size']})")
+        while True:
+            delivered, failed = dispatch_batch(options["batch_size"])
+            if delivered or failed:
+                self.stdout.write(f"📨 Delivered {delivered}, failed {failed}")
+            if delivered + failed >= options["batch_size"]:
+                continue  # more may be waiting
+            if options["once"]:
+                break
+            time.sleep(settings.OUTBOX_POLL_SECONDS)
@@ -0,0 +1,34 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from orders.rollups import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = "Recompute the daily sales rollups for a date range (inclusive)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--from", dest="date_from", help="First day (YYYY-MM-DD), default: 30 days ago")
+        parser.add_argument("--to", dest="date_to", help="Last day (YYYY-MM-DD), default: today")
+
+    def handle(self, *args, **options):
+        today = timezone.localdate()
+        try:
+            date_from = parse_date(options["date_from"]) if options["date_from"] else today - timedelta(days=30)
+            date_to = parse_date(options["date_to"]) if options["date_to"] else today
+        except ValueError as e:  # well formed but not a real date
+            raise CommandError(f"Invalid date: {e}") from e
+        if date_from is None or date_to is None:
+            raise CommandError("Dates must be in YYYY-MM-DD format")
+        if date_from > date_to:
+            raise CommandError("--from must not be after --to")
+
+        written = rebuild_rollups(date_from, date_to)
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Rebuilt rollups {date_from} → {date_to}: "
+            f"{written['products']} product rows, {written['categories']} category rows, "
+            f"{written['customers']} customer rows"
+        ))
@@ -0,0 +1,53 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from orders.broadcasts import BROADCAST_CHUNK_SIZE, audience, send_broadcast
+from orders.models import Broadcast
+
+
+class Command(BaseCommand):
+    help = "Send a promo/system notification to all users, or to one location / sales executive"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--title")
+        parser.add_argument("--message")
+        parser.add_argument("--type", choices=[value for value, _ in Broadcast.TYPE_CHOICES], default="promo")
+        parser.add_argument("--location", default="")
+        parser.add_argument("--sales-executive", default="")
+        parser.add_argument("--resume", type=int, metavar="BROADCAST_ID", help="Continue an interrupted broadcast")
+        parser.add_argument("--chunk-size", type=int, default=BROADCAST_CHUNK_SIZE)
+        parser.add_argument("--dry-run", action="store_true", help="Only count the audience")
+
+    def handle(self, *args, **options):
+        if options["resume"]:
+            try:
+                broadcast = Broadcast.objects.get(pk=options["resume"])
+            except Broadcast.DoesNotExist:
+                raise CommandError(f"Broadcast {options['resume']} does not exist")
+            if broadcast.status == "sent":
+                raise CommandError(f"Broadcast {broadcast.pk} has already been sent")
+        else:
+            if not options["title"] or not options["message"]:
+                raise CommandError("--title and --message are required for a new broadcast")
+            broadcast = Broadcast(
+                title=options["title"],
+                message=options["message"],
+                type=options["type"],
+                location=options["location"],
+                sales_executive=options["sales_executive"],
+            )
+
+        if options["dry_run"]:
+            count = audience(broadcast).filter(pk__gt=broadcast.last_user_id).count()
+            self.stdout.write(f"📣 {count} users would receive \"{broadcast.title}\"")
+            return
+
+        if broadcast.pk is None:
+            broadcast.save()
+
+        def progress(b):
+            self.stdout.write(f"📨 Broadcast {b.pk}: {b.sent_count} sent (last user {b.last_user_id})")
+
+        written = send_broadcast(broadcast, chunk_size=options["chunk_size"], progress=progress)
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Broadcast {broadcast.pk} sent to {written} users ({broadcast.sent_count} in total)"
+        ))
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.9 on 2026-10-19 04:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0007_outbox'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='outboxevent',
+            name='handled_by',
+            field=models.JSONField(blank=True, default=list),
+        ),
+    ]
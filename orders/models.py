@@ -30,7 +30,7 @@ class CartItem(models.Model):
 
 
 import uuid
-from django.db import models
+from django.db import models, transaction
 from django.conf import settings
 from datetime import datetime
 from products.models import Product  # ✅ ensure this import is correct
@@ -59,8 +59,28 @@ class Order(models.Model):
     total = models.DecimalField(max_digits=10, decimal_places=2, default=0)
     source = models.CharField(max_length=20, choices=SOURCE_CHOICES, default="manual")
 
+    # Fulfilment queue (see orders/fulfilment.py): higher priority is picked first,
+    # a claim is only honoured until claim_expires_at.
+    priority = models.SmallIntegerField(default=0)
+    claimed_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="claimed_orders",
+    )
+    claim_expires_at = models.DateTimeField(null=True, blank=True)
+
+    # Whether this order is currently counted in the daily sales rollups (orders/rollups.py)
+    in_sales_rollups = models.BooleanField(default=False, editable=False)
+
     class Meta:
         ordering = ["-created_at"]  # ✅ newest orders appear first
+        indexes = [
+            models.Index(fields=["status", "-priority", "created_at"], name="order_queue_idx"),
+            models.Index(fields=["user", "-created_at"], name="order_user_recent_idx"),
+            models.Index(fields=["created_at"], name="order_created_idx"),
+        ]
 
     def save(self, *args, **kwargs):
         """
@@ -84,7 +104,35 @@ class Order(models.Model):
         if self._state.adding and self.progress == 0:
             self.progress = 1
 
-        super().save(*args, **kwargs)
+        adding = self._state.adding
+        update_fields = kwargs.get("update_fields")
+        status_changed = (
+            not adding
+            and self.status != getattr(self, "_loaded_status", self.status)
+            and (update_fields is None or "status" in update_fields)
+        )
+
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if status_changed:
+                # ✅ keep sales rollups in step with cancellations / reinstatements
+                from .rollups import sync_order_rollups
+                sync_order_rollups(self)
+
+                from . import outbox
+                outbox.emit(
+                    outbox.ORDER_STATUS_CHANGED,
+                    {"status": self.status, "previous_status": self._loaded_status},
+                    aggregate_id=self.pk,
+                )
+        self._loaded_status = self.status
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # remember the stored status so save() can tell when it changes
+        instance._loaded_status = instance.__dict__.get("status")
+        return instance
 
     def __str__(self):
         return f"{self.order_id} by {self.user.business_name or self.user.username}"
@@ -163,9 +211,211 @@ class Notification(models.Model):
     )
     is_read = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
+    # the outbox event that produced it, so a redelivered event can't notify twice
+    outbox_event = models.OneToOneField(
+        "OutboxEvent",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        editable=False,
+        related_name="notification",
+    )
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["user", "-created_at"], name="notification_inbox_idx"),
+            models.Index(fields=["user", "is_read"], name="notification_unread_idx"),
+        ]
 
     def __str__(self):
         return f"{self.user} - {self.title}"
+
+
+class NotificationCounter(models.Model):
+    """
+    Denormalised unread count per user, kept exact by orders/notifications.py
+    so badge refreshes never touch the Notification table.
+    """
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="notification_counter",
+    )
+    unread = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.user_id}: {self.unread} unread"
+
+
+class Broadcast(models.Model):
+    """
+    A promo/system notification fanned out to many users by orders/broadcasts.py.
+    `last_user_id` is the fan-out cursor, so an interrupted send resumes where it stopped.
+    """
+    STATUS_CHOICES = [
+        ("draft", "Draft"),
+        ("sending", "Sending"),
+        ("sent", "Sent"),
+        ("failed", "Failed"),
+    ]
+    TYPE_CHOICES = [
+        ("promo", "Promo"),
+        ("system", "System"),
+    ]
+
+    title = models.CharField(max_length=200)
+    message = models.TextField()
+    type = models.CharField(max_length=50, choices=TYPE_CHOICES, default="promo")
+
+    # audience: every active user, narrowed by whichever of these are set
+    location = models.CharField(max_length=255, blank=True, default="")
+    sales_executive = models.CharField(max_length=255, blank=True, default="")
+
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="draft")
+    last_user_id = models.BigIntegerField(default=0, editable=False)
+    sent_count = models.IntegerField(default=0, editable=False)
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name="+"
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+
+    def __str__(self):
+        return f"{self.title} ({self.status})"
+
+
+# orders/models.py
+class ArchivedOrder(models.Model):
+    """
+    Cold copy of an Order moved out of the hot table by orders/archive.py.
+    Keeps the original primary key so links and order_ids stay valid.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="archived_orders")
+    order_id = models.CharField(max_length=40, unique=True, blank=True, null=True)
+    created_at = models.DateTimeField(db_index=True)
+    status = models.CharField(max_length=20, choices=Order.STATUS_CHOICES)
+    progress = models.IntegerField(default=1)
+    total = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    source = models.CharField(max_length=20, choices=Order.SOURCE_CHOICES)
+    priority = models.SmallIntegerField(default=0)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["user", "-created_at"], name="archived_order_user_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.order_id} (archived)"
+
+
+class ArchivedOrderItem(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    order = models.ForeignKey(ArchivedOrder, on_delete=models.CASCADE, related_name="items")
+    product = models.ForeignKey(Product, on_delete=models.SET_NULL, null=True)
+    quantity = models.PositiveIntegerField()
+    price = models.DecimalField(max_digits=10, decimal_places=2)
+
+    def __str__(self):
+        product_name = self.product.name if self.product else "Deleted Product"
+        return f"{self.quantity} × {product_name}"
+
+
+# orders/models.py
+from products.models import Category
+
+
+class DailyProductSales(models.Model):
+    """Per day × product sales, maintained by orders/rollups.py."""
+    day = models.DateField()
+    product = models.ForeignKey(Product, on_delete=models.SET_NULL, null=True, related_name="daily_sales")
+    quantity = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    order_count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["day", "product"], name="daily_product_sales_uniq"),
+        ]
+
+    def __str__(self):
+        return f"{self.day} {self.product_id}: {self.revenue}"
+
+
+class DailyCategorySales(models.Model):
+    """Per day × category sales, maintained by orders/rollups.py."""
+    day = models.DateField()
+    category = models.ForeignKey(Category, on_delete=models.SET_NULL, null=True, related_name="daily_sales")
+    quantity = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    order_count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["day", "category"], name="daily_category_sales_uniq"),
+        ]
+
+    def __str__(self):
+        return f"{self.day} {self.category_id}: {self.revenue}"
+
+
+class DailyCustomerSales(models.Model):
+    """Per day × customer sales, maintained by orders/rollups.py."""
+    day = models.DateField()
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="daily_sales")
+    order_count = models.IntegerField(default=0)
+    item_count = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["day", "user"], name="daily_customer_sales_uniq"),
+        ]
+
+    def __str__(self):
+        return f"{self.day} {self.user_id}: {self.revenue}"
+
+
+# orders/models.py
+from django.utils import timezone
+
+
+class OutboxEvent(models.Model):
+    """
+    Domain event written in the same transaction as the change that caused it
+    and delivered afterwards by `manage.py dispatch_outbox` (orders/outbox.py).
+    """
+    STATUS_CHOICES = [
+        ("pending", "Pending"),
+        ("done", "Done"),
+        ("dead", "Dead"),
+    ]
+
+    topic = models.CharField(max_length=100)
+    aggregate_id = models.BigIntegerField(null=True, blank=True)
+    payload = models.JSONField(default=dict)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="pending")
+    attempts = models.PositiveSmallIntegerField(default=0)
+    available_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True, default="")
+    # handlers that already succeeded for this event; a retry skips them (orders/outbox.py)
+    handled_by = models.JSONField(default=list, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["id"]
+        indexes = [
+            models.Index(fields=["status", "available_at"], name="outbox_pending_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.topic} #{self.pk} ({self.status})"
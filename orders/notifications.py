@@ -0,0 +1,126 @@
+# orders/notifications.py
+"""
+Notification writes and the per-user unread counter.
+
+Every path that creates or reads notifications goes through here so that
+NotificationCounter stays exact: creation bumps it in the same transaction,
+mark_read() flips is_read with one UPDATE and subtracts the rows it touched.
+unread_count() is a primary-key lookup on the counter row and never reads
+the Notification table. It is not cached: a read-through copy could be
+written back after a change's invalidation and stay stale, and the lookup
+costs about as much as the cache round trip would. New notifications are
+pushed to connected clients (orders/streams.py) once the transaction commits.
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from . import streams
+from .models import Notification, NotificationCounter
+from .utils import increment_or_create
+
+
+def notify(user, title, message, type="system", outbox_event=None):
+    """
+    Create one notification and count it as unread. With `outbox_event`, at
+    most one notification is ever created for that event: a redelivery
+    returns the existing one and counts nothing.
+    """
+    if outbox_event is not None:
+        existing = Notification.objects.filter(outbox_event=outbox_event).first()
+        if existing is not None:
+            return existing
+
+    with transaction.atomic():
+        try:
+            with transaction.atomic():
+                notification = Notification.objects.create(
+                    user=user, title=title, message=message, type=type, outbox_event=outbox_event
+                )
+        except IntegrityError:  # a concurrent delivery of the same event got there first
+            if outbox_event is None:
+                raise
+            return Notification.objects.get(outbox_event=outbox_event)
+        increment_or_create(NotificationCounter, {"user_id": user.pk}, unread=1)
+    event = streams.notification_event(notification)
+    transaction.on_commit(lambda: streams.publish([user.pk], event))
+    return notification
+
+
+ORDER_MESSAGES = {
+    "placed": "Your order #{id} has been placed successfully.",
+    "shipped": "Good news! Order #{id} is on the way.",
+    "delivered": "Your order #{id} has been delivered successfully.",
+}
+
+
+def create_order_notification(user, order, event, outbox_event=None):
+    template = ORDER_MESSAGES.get(event)
+    notify(
+        user,
+        title="Order Update",
+        message=template.format(id=order.id) if template else "Order update",
+        type="order",
+        outbox_event=outbox_event,
+    )
+
+
+def notify_many(user_ids, title, message, type="system"):
+    """
+    Create the same notification for every id in `user_ids` with one bulk
+    INSERT, and bump their counters with one INSERT (missing rows) and one
+    UPDATE. The push goes out as a single message for the whole batch.
+    """
+    with transaction.atomic():
+        Notification.objects.bulk_create(
+            [Notification(user_id=user_id, title=title, message=message, type=type) for user_id in user_ids],
+            batch_size=len(user_ids),
+        )
+        NotificationCounter.objects.bulk_create(
+            [NotificationCounter(user_id=user_id) for user_id in user_ids],
+            ignore_conflicts=True,
+        )
+        NotificationCounter.objects.filter(user_id__in=user_ids).update(unread=F("unread") + 1)
+    # no per-user ids in a shared event; clients refetch the inbox
+    event = {
+        "id": None,
+        "title": title,
+        "message": message,
+        "type": type,
+        "is_read": False,
+        "created_at": timezone.now().isoformat(),
+    }
+    transaction.on_commit(lambda: streams.publish(user_ids, event))
+    return len(user_ids)
+
+
+def unread_count(user):
+    return NotificationCounter.objects.filter(user_id=user.pk).values_list("unread", flat=True).first() or 0
+
+
+def mark_read(user, ids=None):
+    """
+    Mark the user's unread notifications (all, or only `ids`) as read with a
+    single UPDATE. Returns how many rows changed.
+    """
+    queryset = Notification.objects.filter(user=user, is_read=False)
+    if ids is not None:
+        queryset = queryset.filter(id__in=ids)
+
+    with transaction.atomic():
+        updated = queryset.update(is_read=True)
+        if updated:
+            NotificationCounter.objects.filter(user_id=user.pk).update(
+                unread=Greatest(F("unread") - updated, 0)
+            )
+    return updated
+
+
+def recount_unread(user_ids):
+    """Recompute counters from the Notification table (admin edits, repairs)."""
+    user_ids = list(set(user_ids))
+    with transaction.atomic():
+        for user_id in user_ids:
+            unread = Notification.objects.filter(user_id=user_id, is_read=False).count()
+            NotificationCounter.objects.update_or_create(user_id=user_id, defaults={"unread": unread})
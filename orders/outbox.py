@@ -0,0 +1,181 @@
+# orders/outbox.py
+"""
+Transactional outbox for order lifecycle events.
+
+emit() only INSERTs an OutboxEvent row, and must run inside the transaction
+that changes the order: the event exists if and only if the change commits.
+`manage.py dispatch_outbox` then drains pending rows in batches. A batch is
+claimed in a short SELECT ... FOR UPDATE SKIP LOCKED transaction that pushes
+available_at OUTBOX_CLAIM_SECONDS ahead, so several dispatchers can run side
+by side. The handlers (SMTP included) run after that transaction commits,
+not while it holds row locks. Batch handlers are fed OUTBOX_HANDLER_CHUNK_SIZE
+events at a time and the claim is renewed before each chunk, so a slow batch
+of emails doesn't outlive its lease and get re-claimed (and resent) by
+another dispatcher.
+
+Each handler that succeeds for an event is recorded in event.handled_by (for
+plain handlers in the same transaction as their writes), and a retry only
+runs the handlers still missing. Batch handlers report failures per event,
+so one bad recipient doesn't resend everyone else's email. A failing event
+is retried with exponential backoff and marked "dead" after
+OUTBOX_MAX_ATTEMPTS. Delivery is still at-least-once (a crash between an
+email and its marker resends it), so handlers should be idempotent.
+"""
+import logging
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import OutboxEvent
+
+logger = logging.getLogger(__name__)
+
+ORDER_PLACED = "order.placed"
+ORDER_STATUS_CHANGED = "order.status_changed"
+
+MAX_BACKOFF_SECONDS = 60 * 60
+
+_handlers = defaultdict(list)
+_batch_handlers = defaultdict(list)
+
+
+def handler(topic, batch=False):
+    """
+    Decorator registering `func(event)` for `topic` (see orders/handlers.py).
+    With batch=True the function is called with lists of that topic's events
+    instead (up to OUTBOX_HANDLER_CHUNK_SIZE at a time), e.g. to send emails over
+    one connection, and returns {event id: exception} for the events it failed on.
+    """
+    def register(func):
+        (_batch_handlers if batch else _handlers)[topic].append(func)
+        return func
+    return register
+
+
+def emit(topic, payload, aggregate_id=None):
+    """Record an event in the current transaction."""
+    return OutboxEvent.objects.create(topic=topic, payload=payload, aggregate_id=aggregate_id)
+
+
+def _backoff(attempts):
+    return timedelta(seconds=min(2 ** attempts, MAX_BACKOFF_SECONDS))
+
+
+def _name(func):
+    return f"{func.__module__}.{func.__qualname__}"
+
+
+def _claim(batch_size):
+    """Lock, lease and return up to `batch_size` due events; the locks end with this transaction."""
+    now = timezone.now()
+    with transaction.atomic():
+        events = list(
+            OutboxEvent.objects.select_for_update(skip_locked=True)
+            .filter(status="pending", available_at__lte=now)
+            .order_by("id")[:batch_size]
+        )
+        for event in events:
+            event.attempts += 1
+            event.available_at = now + timedelta(seconds=settings.OUTBOX_CLAIM_SECONDS)
+        OutboxEvent.objects.bulk_update(events, ["attempts", "available_at"])
+    return events
+
+
+def _extend_claim(events):
+    """Push the lease on `events` OUTBOX_CLAIM_SECONDS ahead again."""
+    available_at = timezone.now() + timedelta(seconds=settings.OUTBOX_CLAIM_SECONDS)
+    OutboxEvent.objects.filter(pk__in=[event.pk for event in events]).update(available_at=available_at)
+    for event in events:
+        event.available_at = available_at
+
+
+def _deliver(event):
+    for func in _handlers.get(event.topic, ()):
+        name = _name(func)
+        if name in event.handled_by:
+            continue
+        # the handler's writes and its marker commit together
+        with transaction.atomic():
+            func(event)
+            event.handled_by.append(name)
+            OutboxEvent.objects.filter(pk=event.pk).update(handled_by=event.handled_by)
+
+
+def _deliver_batches(events):
+    """Run batch handlers per topic; returns {event id: exception} for the events that failed."""
+    by_topic = defaultdict(list)
+    for event in events:
+        if event.topic in _batch_handlers:
+            by_topic[event.topic].append(event)
+
+    errors = {}
+    for topic, topic_events in by_topic.items():
+        for func in _batch_handlers[topic]:
+            name = _name(func)
+            todo = [event for event in topic_events if name not in event.handled_by and event.pk not in errors]
+            chunk_size = settings.OUTBOX_HANDLER_CHUNK_SIZE
+            for start in range(0, len(todo), chunk_size):
+                chunk = todo[start:start + chunk_size]
+                _extend_claim(events)  # everything this dispatch still has to finish
+                try:
+                    failures = func(chunk) or {}
+                except Exception as exc:
+                    logger.exception("Outbox batch handler %s failed (%s events)", name, len(chunk))
+                    failures = {event.pk: exc for event in chunk}
+                errors.update(failures)
+
+                done = [event for event in chunk if event.pk not in failures]
+                for event in done:
+                    event.handled_by.append(name)
+                OutboxEvent.objects.bulk_update(done, ["handled_by"])
+    return errors
+
+
+def _mark_failed(event, exc):
+    event.last_error = f"{type(exc).__name__}: {exc}"
+    if event.attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+        event.status = "dead"
+    else:
+        event.available_at = timezone.now() + _backoff(event.attempts)
+
+
+def dispatch_batch(batch_size=None):
+    """
+    Deliver up to `batch_size` due events. Returns (delivered, failed).
+    """
+    events = _claim(batch_size or settings.OUTBOX_BATCH_SIZE)
+    delivered = failed = 0
+
+    succeeded = []
+    for event in events:
+        try:
+            _deliver(event)
+        except Exception as exc:
+            logger.exception("Outbox event %s (%s) failed", event.pk, event.topic)
+            failed += 1
+            _mark_failed(event, exc)
+        else:
+            succeeded.append(event)
+
+    batch_errors = _deliver_batches(succeeded)
+    for event in succeeded:
+        if event.pk in batch_errors:
+            failed += 1
+            _mark_failed(event, batch_errors[event.pk])
+        else:
+            delivered += 1
+            event.status = "done"
+            event.processed_at = timezone.now()
+
+    OutboxEvent.objects.bulk_update(events, ["status", "available_at", "last_error", "processed_at"])
+    return delivered, failed
+
+
+def purge_processed(older_than_days=7):
+    """Delete delivered events older than the given age. Returns rows deleted."""
+    cutoff = timezone.now() - timedelta(days=older_than_days)
+    deleted, _ = OutboxEvent.objects.filter(status="done", processed_at__lt=cutoff).delete()
+    return deleted
@@ -0,0 +1,262 @@
+# orders/rollups.py
+"""
+Daily sales rollups (day × product, day × category, day × customer).
+
+Kept current incrementally: place_order() counts a new order, and Order.save()
+calls sync_order_rollups() whenever the status changes, so cancelling removes
+the order's contribution and reinstating adds it back. `Order.in_sales_rollups`
+records whether an order is currently counted, which keeps the two paths
+idempotent.
+
+Anything edited behind these hooks (e.g. order lines changed in the admin)
+is reconciled by `manage.py rebuild_sales_rollups`, which recomputes a date
+range with grouped SQL over both the hot and archived order tables.
+"""
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Case, Count, DecimalField, F, Sum, Value, When
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import (
+    ArchivedOrder, ArchivedOrderItem,
+    DailyCategorySales, DailyCustomerSales, DailyProductSales,
+    Order, OrderItem,
+)
+from .utils import increment_or_create
+
+# Cancelled orders are not sales; every other status counts from placement on.
+EXCLUDED_STATUSES = ("cancelled",)
+
+REBUILD_BATCH_SIZE = 1000
+
+
+def _counts(order):
+    return order.status not in EXCLUDED_STATUSES
+
+
+def _line_total():
+    # annotate this before any `quantity=Sum(...)` alias, which would shadow the column
+    return Sum(F("price") * F("quantity"), output_field=DecimalField(max_digits=14, decimal_places=2))
+
+
+def _apply(order, sign):
+    """
+    Add (sign=1) or remove (sign=-1) one order's contribution to the rollups.
+    Rows are upserted in product, then category id order, so two checkouts
+    sharing products lock them in the same order and can't deadlock.
+    """
+    day = timezone.localdate(order.created_at)
+    lines = (
+        OrderItem.objects.filter(order=order)
+        .values("product_id", "product__category_id")
+        .annotate(revenue=_line_total(), quantity=Sum("quantity"))
+        .order_by("product_id")
+    )
+
+    item_count = 0
+    categories = defaultdict(lambda: [0, Decimal("0")])
+    for line in lines:
+        item_count += line["quantity"]
+        if line["product_id"] is None:
+            continue  # product deleted since the order was placed
+        increment_or_create(
+            DailyProductSales,
+            {"day": day, "product_id": line["product_id"]},
+            quantity=sign * line["quantity"],
+            revenue=sign * line["revenue"],
+            order_count=sign,
+        )
+        if line["product__category_id"] is not None:
+            bucket = categories[line["product__category_id"]]
+            bucket[0] += line["quantity"]
+            bucket[1] += line["revenue"]
+
+    for category_id, (quantity, revenue) in sorted(categories.items()):
+        increment_or_create(
+            DailyCategorySales,
+            {"day": day, "category_id": category_id},
+            quantity=sign * quantity,
+            revenue=sign * revenue,
+            order_count=sign,
+        )
+
+    increment_or_create(
+        DailyCustomerSales,
+        {"day": day, "user_id": order.user_id},
+        order_count=sign,
+        item_count=sign * item_count,
+        revenue=sign * order.total,
+    )
+
+
+def sync_order_rollups(order):
+    """
+    Make the rollups agree with the order's current status.
+    A no-op (and no queries) when nothing needs to change.
+    """
+    should_count = _counts(order)
+    if should_count == order.in_sales_rollups:
+        return
+
+    with transaction.atomic():
+        # flip the flag only if it still holds the old value; of two concurrent
+        # status changes, just the one whose UPDATE matches applies the delta
+        flipped = Order.objects.filter(pk=order.pk, in_sales_rollups=not should_count).update(
+            in_sales_rollups=should_count
+        )
+        if flipped:
+            _apply(order, 1 if should_count else -1)
+    order.in_sales_rollups = should_count
+
+
+# ---------------- Rebuild ----------------
+def _day_bounds(date_from, date_to):
+    start = timezone.make_aware(datetime.combine(date_from, time.min))
+    end = timezone.make_aware(datetime.combine(date_to + timedelta(days=1), time.min))
+    return start, end
+
+
+def _aggregate(order_model, item_model, start, end):
+    """Grouped SQL over one pair of order/item tables; returns three dicts keyed by (day, id)."""
+    items = (
+        item_model.objects.filter(order__created_at__gte=start, order__created_at__lt=end)
+        .exclude(order__status__in=EXCLUDED_STATUSES)
+        .annotate(day=TruncDate("order__created_at"))
+    )
+    orders = (
+        order_model.objects.filter(created_at__gte=start, created_at__lt=end)
+        .exclude(status__in=EXCLUDED_STATUSES)
+        .annotate(day=TruncDate("created_at"))
+    )
+
+    products = {
+        (row["day"], row["product_id"]): row
+        for row in items.exclude(product=None)
+        .values("day", "product_id")
+        .annotate(revenue=_line_total(), quantity=Sum("quantity"), order_count=Count("order_id", distinct=True))
+    }
+    categories = {
+        (row["day"], row["product__category_id"]): row
+        for row in items.exclude(product__category=None)
+        .values("day", "product__category_id")
+        .annotate(revenue=_line_total(), quantity=Sum("quantity"), order_count=Count("order_id", distinct=True))
+    }
+    customers = {
+        (row["day"], row["user_id"]): {**row, "item_count": 0}
+        for row in orders.values("day", "user_id").annotate(order_count=Count("id"), revenue=Sum("total"))
+    }
+    for row in items.values("day", "order__user_id").annotate(item_count=Sum("quantity")):
+        key = (row["day"], row["order__user_id"])
+        if key in customers:
+            customers[key]["item_count"] = row["item_count"]
+
+    return products, categories, customers
+
+
+def _merge(target, source, fields):
+    for key, row in source.items():
+        if key in target:
+            for field in fields:
+                target[key][field] += row[field]
+        else:
+            target[key] = dict(row)
+
+
+def rebuild_rollups(date_from, date_to):
+    """
+    Recompute all three rollups for [date_from, date_to] (inclusive dates)
+    from the hot and archived order tables. Returns row counts written.
+    """
+    start, end = _day_bounds(date_from, date_to)
+
+    with transaction.atomic():
+        # delete first: the deleted rows stay locked until commit, so an order
+        # placed from here on either is committed before the aggregation below
+        # (and counted there) or waits and adds itself to the new rows after
+        for model in (DailyProductSales, DailyCategorySales, DailyCustomerSales):
+            model.objects.filter(day__gte=date_from, day__lte=date_to).delete()
+
+        products, categories, customers = _aggregate(Order, OrderItem, start, end)
+        archived = _aggregate(ArchivedOrder, ArchivedOrderItem, start, end)
+        _merge(products, archived[0], ("quantity", "revenue", "order_count"))
+        _merge(categories, archived[1], ("quantity", "revenue", "order_count"))
+        _merge(customers, archived[2], ("order_count", "item_count", "revenue"))
+
+        DailyProductSales.objects.bulk_create(
+            [
+                DailyProductSales(day=day, product_id=product_id, quantity=row["quantity"],
+                                  revenue=row["revenue"], order_count=row["order_count"])
+                for (day, product_id), row in products.items()
+            ],
+            batch_size=REBUILD_BATCH_SIZE,
+        )
+        DailyCategorySales.objects.bulk_create(
+            [
+                DailyCategorySales(day=day, category_id=category_id, quantity=row["quantity"],
+                                   revenue=row["revenue"], order_count=row["order_count"])
+                for (day, category_id), row in categories.items()
+            ],
+            batch_size=REBUILD_BATCH_SIZE,
+        )
+        DailyCustomerSales.objects.bulk_create(
+            [
+                DailyCustomerSales(day=day, user_id=user_id, order_count=row["order_count"],
+                                   item_count=row["item_count"], revenue=row["revenue"])
+                for (day, user_id), row in customers.items()
+            ],
+            batch_size=REBUILD_BATCH_SIZE,
+        )
+
+        Order.objects.filter(created_at__gte=start, created_at__lt=end).update(
+            in_sales_rollups=Case(
+                When(status__in=EXCLUDED_STATUSES, then=Value(False)),
+                default=Value(True),
+            )
+        )
+
+    return {"products": len(products), "categories": len(categories), "customers": len(customers)}
+
+
+# ---------------- Reports ----------------
+def _in_range(model, date_from, date_to):
+    return model.objects.filter(day__gte=date_from, day__lte=date_to)
+
+
+def sales_by_day(date_from, date_to):
+    return list(
+        _in_range(DailyCustomerSales, date_from, date_to)
+        .values("day")
+        .annotate(orders=Sum("order_count"), items=Sum("item_count"), revenue=Sum("revenue"))
+        .order_by("day")
+    )
+
+
+def sales_by_product(date_from, date_to, limit):
+    return list(
+        _in_range(DailyProductSales, date_from, date_to)
+        .values("product_id", name=F("product__name"))
+        .annotate(quantity=Sum("quantity"), revenue=Sum("revenue"), orders=Sum("order_count"))
+        .order_by("-revenue")[:limit]
+    )
+
+
+def sales_by_category(date_from, date_to, limit):
+    return list(
+        _in_range(DailyCategorySales, date_from, date_to)
+        .values("category_id", name=F("category__name"))
+        .annotate(quantity=Sum("quantity"), revenue=Sum("revenue"), orders=Sum("order_count"))
+        .order_by("-revenue")[:limit]
+    )
+
+
+def sales_by_customer(date_from, date_to, limit):
+    return list(
+        _in_range(DailyCustomerSales, date_from, date_to)
+        .values("user_id", business_name=F("user__business_name"))
+        .annotate(orders=Sum("order_count"), items=Sum("item_count"), revenue=Sum("revenue"))
+        .order_by("-revenue")[:limit]
+    )
@@ -0,0 +1,178 @@
+# orders/routing.py
+"""
+Delivery run planning for logistics staff.
+
+Open orders (pending/processing) are grouped into stops, one per customer,
+using the customer's geo_lat/geo_lng (see customers/geo.py). Then:
+
+1. Batching: a sweep around the depot. Stops are sorted by bearing from the
+   depot and cut into vehicle-sized runs, so each van covers one wedge of the
+   map. The sweep starts at the widest angular gap, so a cluster isn't split
+   across the start/end seam.
+2. Ordering: within each run, a nearest-neighbour tour from the depot and
+   back, improved with 2-opt until no reversal shortens it.
+
+Both steps work on a NumPy haversine distance matrix per run. A 2-opt pass
+scores every candidate move for a given edge in one vectorised step, so
+planning 2,000 stops takes seconds, not minutes, on one core.
+
+Nothing is saved. The plan is a suggestion that staff then claim through the
+fulfilment queue.
+"""
+import math
+from dataclasses import dataclass, field
+
+import numpy as np
+from django.conf import settings
+
+from customers.geo import EARTH_RADIUS_KM
+
+from .fulfilment import QUEUE_STATUSES
+from .models import Order
+
+DEFAULT_CAPACITY = getattr(settings, "ROUTE_VEHICLE_CAPACITY", 25)
+MAX_STOPS = getattr(settings, "ROUTE_MAX_STOPS", 5000)
+MAX_CAPACITY = getattr(settings, "ROUTE_MAX_CAPACITY", 500)
+
+
+@dataclass
+class Stop:
+    customer_id: int
+    business_name: str
+    location: str
+    latitude: float
+    longitude: float
+    order_ids: list = field(default_factory=list)
+
+
+@dataclass
+class Route:
+    stops: list  # [Stop] in visiting order
+    legs_km: list  # distance to each stop from the previous one (or the depot)
+    return_km: float  # last stop back to the depot
+
+    @property
+    def distance_km(self):
+        return sum(self.legs_km) + self.return_km
+
+
+# ---------------- Distances ----------------
+def distance_matrix(lats, lngs):
+    """Pairwise haversine distances (km) between the points."""
+    lats, lngs = np.radians(lats), np.radians(lngs)
+    dlat = lats[:, None] - lats[None, :]
+    dlng = lngs[:, None] - lngs[None, :]
+    a = np.sin(dlat / 2) ** 2 + np.cos(lats)[:, None] * np.cos(lats)[None, :] * np.sin(dlng / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+# ---------------- Batching ----------------
+def sweep(depot, stops, capacity):
+    """Split `stops` into runs of at most `capacity`, by bearing from the depot."""
+    if not stops:
+        return []
+    lat0, lng0 = depot
+    lats = np.array([s.latitude for s in stops])
+    lngs = np.array([s.longitude for s in stops])
+    # equirectangular bearing is plenty for ordering stops around a city depot
+    angles = np.arctan2(lats - lat0, (lngs - lng0) * math.cos(math.radians(lat0)))
+    order = np.argsort(angles)
+
+    gaps = np.diff(np.append(angles[order], angles[order[0]] + 2 * math.pi))
+    order = np.roll(order, -(int(np.argmax(gaps)) + 1))
+
+    batches = [order[i:i + capacity] for i in range(0, len(order), capacity)]
+    return [[stops[i] for i in batch] for batch in batches]
+
+
+# ---------------- Ordering ----------------
+def nearest_neighbour(dist):
+    """Tour over nodes of `dist` starting and ending at node 0 (the depot)."""
+    n = len(dist)
+    visited = np.zeros(n, dtype=bool)
+    visited[0] = True
+    tour = [0]
+    for _ in range(n - 1):
+        row = np.where(visited, np.inf, dist[tour[-1]])
+        nxt = int(np.argmin(row))
+        visited[nxt] = True
+        tour.append(nxt)
+    tour.append(0)
+    return np.array(tour)
+
+
+def two_opt(tour, dist, max_passes=50):
+    """
+    Improve a closed tour (depot at both ends) in place by reversing segments.
+    For each edge (a, b) every later edge (c, d) is scored at once; the best
+    reversal that shortens the tour is applied.
+    """
+    size = len(tour)
+    for _ in range(max_passes):
+        improved = False
+        for i in range(size - 3):
+            a, b = tour[i], tour[i + 1]
+            c, d = tour[i + 2:size - 1], tour[i + 3:size]
+            delta = dist[a, c] + dist[b, d] - dist[a, b] - dist[c, d]
+            j = int(np.argmin(delta))
+            if delta[j] < -1e-9:
+                j += i + 2
+                tour[i + 1:j + 1] = tour[i + 1:j + 1][::-1].copy()
+                improved = True
+        if not improved:
+            break
+    return tour
+
+
+def order_route(depot, stops):
+    lats = np.array([depot[0]] + [s.latitude for s in stops])
+    lngs = np.array([depot[1]] + [s.longitude for s in stops])
+    dist = distance_matrix(lats, lngs)
+    tour = two_opt(nearest_neighbour(dist), dist)
+    legs = dist[tour[:-1], tour[1:]]
+    return Route(
+        stops=[stops[node - 1] for node in tour[1:-1]],
+        legs_km=[float(km) for km in legs[:-1]],
+        return_km=float(legs[-1]),
+    )
+
+
+# ---------------- Planning ----------------
+def open_stops(limit=MAX_STOPS):
+    """
+    One Stop per customer with open orders, plus the ids of open orders whose
+    customer has no usable coordinates. Reads a single joined query.
+    """
+    rows = (
+        Order.objects.filter(status__in=QUEUE_STATUSES)
+        .order_by("-priority", "created_at")
+        .values_list(
+            "id", "user_id", "user__business_name", "user__location", "user__geo_lat", "user__geo_lng",
+        )
+    )
+    stops, unrouted = {}, []
+    for order_id, user_id, business_name, location, lat, lng in rows.iterator(chunk_size=2000):
+        if lat is None or lng is None:
+            unrouted.append(order_id)
+            continue
+        stop = stops.get(user_id)
+        if stop is None:
+            if len(stops) >= limit:
+                unrouted.append(order_id)
+                continue
+            stop = stops[user_id] = Stop(user_id, business_name, location or "", lat, lng)
+        stop.order_ids.append(order_id)
+    return list(stops.values()), unrouted
+
+
+def plan_routes(depot=None, capacity=None):
+    """
+    Returns (routes, unrouted order ids). `depot` is (lat, lng), defaulting to
+    ROUTE_DEPOT_LAT/LNG; `capacity` is stops per vehicle, at most MAX_CAPACITY
+    (a run's distance matrix is capacity² floats and 2-opt grows faster still).
+    """
+    depot = depot or (settings.ROUTE_DEPOT_LAT, settings.ROUTE_DEPOT_LNG)
+    capacity = min(capacity or DEFAULT_CAPACITY, MAX_CAPACITY)
+    stops, unrouted = open_stops()
+    routes = [order_route(depot, batch) for batch in sweep(depot, stops, capacity)]
+    return routes, unrouted
@@ -93,3 +93,38 @@ class NotificationSerializer(serializers.ModelSerializer):
     class Meta:
         model = Notification
         fields = ["id", "title", "message", "is_read", "created_at"]
+
+
+# orders/serializers.py
+class FulfilmentOrderSerializer(OrderSerializer):
+    """Order as seen by a logistics worker holding a claim on it."""
+    business_name = serializers.CharField(source="user.business_name", read_only=True)
+    phone = serializers.CharField(source="user.phone", read_only=True)
+    location = serializers.CharField(source="user.location", read_only=True)
+
+    class Meta(OrderSerializer.Meta):
+        fields = OrderSerializer.Meta.fields + [
+            "business_name", "phone", "location", "priority", "claim_expires_at",
+        ]
+
+
+# orders/serializers.py
+from .models import ArchivedOrder, ArchivedOrderItem
+
+
+class ArchivedOrderItemSerializer(serializers.ModelSerializer):
+    product = ProductSerializer()
+
+    class Meta:
+        model = ArchivedOrderItem
+        fields = ["id", "product", "quantity", "price"]
+
+
+class ArchivedOrderSerializer(serializers.ModelSerializer):
+    """Same shape as OrderSerializer, read-only, plus archived_at."""
+    items = ArchivedOrderItemSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = ArchivedOrder
+        fields = ["id", "order_id", "user", "status", "progress", "total", "source", "created_at", "items", "archived_at"]
+        read_only_fields = fields
@@ -0,0 +1,116 @@
+# orders/services.py
+from decimal import Decimal
+
+from django.db import transaction
+
+from products.models import Product
+
+from . import outbox
+from .models import Cart, CartItem, Order, OrderItem
+from .rollups import sync_order_rollups
+
+
+def place_order(user, lines, source):
+    """
+    Create an Order with one OrderItem per (product, quantity) line, priced
+    at the product's current price. Items are written with one bulk INSERT,
+    the order is counted in the sales rollups and an order.placed outbox
+    event is recorded, all in the same transaction.
+    """
+    lines = [(product, quantity) for product, quantity in lines]
+    total = sum(((product.price or Decimal("0")) * quantity for product, quantity in lines), Decimal("0"))
+
+    with transaction.atomic():
+        # ✅ auto-generates order_id in Order.save
+        order = Order.objects.create(
+            user=user,
+            total=total,
+            source=source,
+            progress=1,  # “Order Confirmed” step
+            status="pending",
+        )
+        OrderItem.objects.bulk_create([
+            OrderItem(order=order, product=product, quantity=quantity, price=product.price)
+            for product, quantity in lines
+        ])
+        record_placed_order(order)
+    return order
+
+
+def record_placed_order(order):
+    """
+    Count a newly created order (items already saved) in the sales rollups
+    and record its order.placed outbox event. place_order() calls this; so
+    must any other path that creates orders (the orders API, the admin).
+    """
+    with transaction.atomic():
+        sync_order_rollups(order)
+        outbox.emit(
+            outbox.ORDER_PLACED,
+            {"user_id": order.user_id, "total": str(order.total), "source": order.source},
+            aggregate_id=order.pk,
+        )
+
+
+def reorder_into_cart(user, order):
+    """
+    Copy a past order's lines into the user's cart.
+
+    One query loads the order lines, one locks the products and reads their
+    stock, one loads the existing cart items; stock and cart are then written
+    with bulk_update / bulk_create. As with AddToCartView, quantities moved
+    into the cart are deducted from global stock.
+
+    Returns one dict per product: requested, added and a status of
+    "added", "partial" or "unavailable" (out of stock or deleted product).
+    """
+    requested = {}
+    for product_id, quantity in OrderItem.objects.filter(order=order).values_list("product_id", "quantity"):
+        requested[product_id] = requested.get(product_id, 0) + quantity
+
+    lines = []
+    with transaction.atomic():
+        products = {
+            product.id: product
+            for product in Product.objects.select_for_update().filter(
+                id__in=[product_id for product_id in requested if product_id is not None]
+            )
+        }
+        cart, _ = Cart.objects.get_or_create(user=user)
+        cart_items = {item.product_id: item for item in CartItem.objects.filter(cart=cart, product_id__in=products)}
+
+        changed_products, changed_items, new_items = [], [], []
+        for product_id, quantity in requested.items():
+            product = products.get(product_id)
+            available = max(product.stock, 0) if product else 0
+            added = min(quantity, available)
+
+            if added == quantity:
+                line_status = "added"
+            elif added:
+                line_status = "partial"
+            else:
+                line_status = "unavailable"
+            lines.append({
+                "product_id": product_id,
+                "product": product.name if product else None,
+                "requested": quantity,
+                "added": added,
+                "status": line_status,
+            })
+            if not added:
+                continue
+
+            product.stock -= added
+            changed_products.append(product)
+            item = cart_items.get(product_id)
+            if item:
+                item.quantity += added
+                changed_items.append(item)
+            else:
+                new_items.append(CartItem(cart=cart, product=product, quantity=added))
+
+        Product.objects.bulk_update(changed_products, ["stock"])
+        CartItem.objects.bulk_update(changed_items, ["quantity"])
+        CartItem.objects.bulk_create(new_items)
+    return lines
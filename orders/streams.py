@@ -0,0 +1,131 @@
+# orders/streams.py
+"""
+Server-Sent Events push channel for notifications.
+
+Each worker process runs a single subscriber that receives every published
+event from Redis pub/sub. Notifications are written by the worker and jobs
+processes, so the stream needs REDIS_URL; without it the view answers 503,
+and publish() only reaches streams in its own process (none, in practice).
+The subscriber fans events out to the asyncio queues of the users connected
+to that process, so an idle connection costs one coroutine and one small
+queue instead of a polling request every few seconds.
+
+Messages on the channel look like {"user_ids": [...], "event": {...}}, so one
+publish can reach many users (see broadcasts).
+"""
+import asyncio
+import json
+import logging
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "chiamoorder:notifications"
+QUEUE_SIZE = 100
+HEARTBEAT_SECONDS = 15
+
+
+class NotificationBroker:
+    def __init__(self):
+        self._queues = defaultdict(set)  # str(user_id) -> {asyncio.Queue}
+        self._loop = None
+        self._listener = None
+        self._redis = None
+        self._lock = threading.Lock()
+
+    # ---------------- producer side (sync, any thread) ----------------
+    def publish(self, user_ids, event):
+        """Send `event` to every connected stream of `user_ids`. Never raises."""
+        message = {"user_ids": list(user_ids), "event": event}
+        try:
+            if settings.REDIS_URL:
+                self._sync_redis().publish(CHANNEL, json.dumps(message, default=str))
+            elif self._loop is not None:
+                self._loop.call_soon_threadsafe(self._dispatch, message)
+        except Exception:
+            logger.exception("Failed to publish notification event")
+
+    def _sync_redis(self):
+        with self._lock:
+            if self._redis is None:
+                import redis
+                self._redis = redis.Redis.from_url(settings.REDIS_URL)
+        return self._redis
+
+    # ---------------- consumer side (event loop) ----------------
+    def subscribe(self, user_id):
+        self._loop = asyncio.get_running_loop()
+        if settings.REDIS_URL and (self._listener is None or self._listener.done()):
+            self._listener = self._loop.create_task(self._listen())
+        queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+        self._queues[str(user_id)].add(queue)
+        return queue
+
+    def unsubscribe(self, user_id, queue):
+        key = str(user_id)
+        queues = self._queues.get(key)
+        if queues is None:
+            return
+        queues.discard(queue)
+        if not queues:
+            del self._queues[key]
+
+    def _dispatch(self, message):
+        for user_id in message.get("user_ids", []):
+            # token claims carry the id as a string, model pks as ints
+            for queue in self._queues.get(str(user_id), ()):
+                try:
+                    queue.put_nowait(message["event"])
+                except asyncio.QueueFull:
+                    # slow client: it catches up from Last-Event-ID on reconnect
+                    pass
+
+    async def _listen(self):
+        import redis.asyncio as aioredis
+
+        delay = 1
+        while True:
+            try:
+                client = aioredis.from_url(settings.REDIS_URL)
+                async with client.pubsub() as pubsub:
+                    await pubsub.subscribe(CHANNEL)
+                    delay = 1
+                    async for message in pubsub.listen():
+                        if message["type"] == "message":
+                            self._dispatch(json.loads(message["data"]))
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Notification subscriber lost Redis; retrying in %ss", delay)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 30)
+
+
+broker = NotificationBroker()
+
+
+def publish(user_ids, event):
+    broker.publish(user_ids, event)
+
+
+def notification_event(notification):
+    return {
+        "id": notification.id,
+        "title": notification.title,
+        "message": notification.message,
+        "type": notification.type,
+        "is_read": notification.is_read,
+        "created_at": notification.created_at.isoformat(),
+    }
+
+
+def format_sse(event):
+    lines = []
+    if event.get("id") is not None:
+        lines.append(f"id: {event['id']}")
+    lines.append("event: notification")
+    lines.append(f"data: {json.dumps(event, default=str)}")
+    return "\n".join(lines) + "\n\n"
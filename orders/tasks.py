@@ -0,0 +1,39 @@
+# orders/tasks.py
+"""Background jobs for the orders app (run by `manage.py run_jobs`)."""
+from django.conf import settings
+from django.core.mail import EmailMessage
+
+from chiamo_project.emails import send_message
+from jobs.queue import job
+
+from .broadcasts import send_broadcast
+from .models import Broadcast
+
+SUPPORT_INBOX = "chiamoorder@gmail.com"
+
+
+@job
+def send_support_email(name, email, subject, message):
+    full_message = f"""
+    From: {name} <{email}>
+    Subject: {subject}
+
+    {message}
+    """
+    send_message(
+        EmailMessage(
+            subject=f"New Support Message from {name}",
+            body=full_message,
+            from_email=settings.DEFAULT_FROM_EMAIL,
+            to=[SUPPORT_INBOX],
+        )
+    )
+
+
+@job
+def send_broadcast_job(broadcast_id):
+    broadcast = Broadcast.objects.filter(pk=broadcast_id).first()
+    if broadcast is None:
+        return
+    # an exception leaves it "failed"; the retry resumes from the cursor
+    send_broadcast(broadcast)
@@ -1,3 +1,118 @@
-from django.test import TestCase
+import math
+from itertools import combinations
 
-# Create your tests here.
+import numpy as np
+from django.test import SimpleTestCase, TestCase
+
+from customers.geo import haversine_km
+from customers.models import User
+from orders import routing
+from orders.models import Order
+
+DEPOT = (6.5244, 3.3792)
+
+
+def _stops(n, seed=47):
+    rng = np.random.default_rng(seed)
+    lats = DEPOT[0] + rng.uniform(-0.3, 0.3, n)
+    lngs = DEPOT[1] + rng.uniform(-0.3, 0.3, n)
+    return [routing.Stop(i, f"Shop{i}", "", float(lat), float(lng)) for i, (lat, lng) in enumerate(zip(lats, lngs))]
+
+
+def _matrix(stops):
+    lats = np.array([DEPOT[0]] + [s.latitude for s in stops])
+    lngs = np.array([DEPOT[1]] + [s.longitude for s in stops])
+    return routing.distance_matrix(lats, lngs)
+
+
+def _length(tour, dist):
+    return float(dist[tour[:-1], tour[1:]].sum())
+
+
+class RoutingTests(SimpleTestCase):
+    def assertClosedTour(self, tour, n):
+        self.assertEqual((tour[0], tour[-1]), (0, 0))
+        self.assertEqual(sorted(tour[1:-1]), list(range(1, n)))
+
+    def test_distance_matrix(self):
+        stops = _stops(20)
+        dist = _matrix(stops)
+        np.testing.assert_allclose(dist, dist.T)
+        np.testing.assert_allclose(np.diag(dist), 0, atol=1e-9)
+        np.testing.assert_allclose(
+            dist[0, 1:], haversine_km(DEPOT[0], DEPOT[1], [s.latitude for s in stops], [s.longitude for s in stops])
+        )
+
+    def test_two_opt_keeps_tour_and_never_lengthens_it(self):
+        dist = _matrix(_stops(60))
+        start = routing.nearest_neighbour(dist)
+        self.assertClosedTour(start, 61)
+        before = _length(start, dist)
+
+        tour = routing.two_opt(start.copy(), dist)
+        self.assertClosedTour(tour, 61)
+        self.assertLessEqual(_length(tour, dist), before + 1e-9)
+
+    def test_two_opt_result_is_a_local_optimum(self):
+        dist = _matrix(_stops(25))
+        tour = routing.two_opt(routing.nearest_neighbour(dist), dist)
+        length = _length(tour, dist)
+        for i, j in combinations(range(1, len(tour) - 1), 2):
+            candidate = tour.copy()
+            candidate[i:j + 1] = candidate[i:j + 1][::-1]
+            self.assertGreaterEqual(_length(candidate, dist), length - 1e-9)
+
+    def test_two_opt_untangles_a_ring(self):
+        # stops on a circle around the depot, listed in a crossing order: the result must follow the ring
+        angles = [2 * math.pi * k / 12 for k in (0, 6, 1, 7, 2, 8, 3, 9, 4, 10, 5, 11)]
+        stops = [routing.Stop(i, "", "", DEPOT[0] + 0.1 * math.sin(a), DEPOT[1] + 0.1 * math.cos(a))
+                 for i, a in enumerate(angles)]
+        dist = _matrix(stops)
+        crossed = np.array([0] + list(range(1, 13)) + [0])
+        tour = routing.two_opt(crossed.copy(), dist)
+        ring = sorted(range(1, 13), key=lambda node: angles[node - 1])
+        # the depot (at the centre) may break the ring anywhere; either direction is the same length
+        best = min(_length(np.array([0] + ring[r:] + ring[:r] + [0]), dist) for r in range(12))
+        self.assertAlmostEqual(_length(tour, dist), best, places=6)
+
+    def test_order_route_distances(self):
+        stops = _stops(30)
+        route = routing.order_route(DEPOT, stops)
+        self.assertEqual(sorted(s.customer_id for s in route.stops), list(range(30)))
+        points = [DEPOT] + [(s.latitude, s.longitude) for s in route.stops] + [DEPOT]
+        expected = sum(
+            haversine_km(a[0], a[1], [b[0]], [b[1]])[0] for a, b in zip(points, points[1:])
+        )
+        self.assertAlmostEqual(route.distance_km, expected, places=6)
+        self.assertEqual(len(route.legs_km), 30)
+
+    def test_sweep_partitions_stops(self):
+        stops = _stops(53)
+        runs = routing.sweep(DEPOT, stops, 10)
+        self.assertEqual([len(run) for run in runs], [10, 10, 10, 10, 10, 3])
+        self.assertEqual(sorted(s.customer_id for run in runs for s in run), list(range(53)))
+        self.assertEqual(routing.sweep(DEPOT, [], 10), [])
+
+
+class PlanRoutesTests(TestCase):
+    def test_one_stop_per_customer_and_unrouted_orders(self):
+        shops = [
+            User.objects.create(business_name=f"Shop{i}", email=f"s{i}@x.com",
+                                latitude=str(DEPOT[0] + 0.01 * i), longitude=str(DEPOT[1] + 0.01 * i))
+            for i in range(1, 6)
+        ]
+        nowhere = User.objects.create(business_name="Nowhere", email="n@x.com")
+        for shop in shops:
+            Order.objects.create(user=shop, status="pending")
+        Order.objects.create(user=shops[0], status="processing")
+        Order.objects.create(user=shops[1], status="delivered")  # not open
+        unlocated = Order.objects.create(user=nowhere, status="pending")
+
+        routes, unrouted = routing.plan_routes(depot=DEPOT, capacity=2)
+
+        self.assertEqual(unrouted, [unlocated.pk])
+        self.assertEqual([len(route.stops) for route in routes], [2, 2, 1])
+        stops = {stop.customer_id: stop for route in routes for stop in route.stops}
+        self.assertEqual(sorted(stops), sorted(shop.pk for shop in shops))
+        self.assertEqual(len(stops[shops[0].pk].order_ids), 2)
+        self.assertEqual(len(stops[shops[1].pk].order_ids), 1)
@@ -2,6 +2,8 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .views import support_message, mark_notification_read
+from .views import mark_notifications_read, mark_all_notifications_read, notification_unread_count
+from .views import notification_stream, notification_stream_ticket
 from .views import NotificationListView
 from .views import (
     CartView,
@@ -18,6 +20,13 @@ from .views import (
     SmartListRemoveItemAPIView,
     SmartListOrderAllAPIView,
     OrderSummaryView,
+    OrderExportView,
+    FulfilmentClaimView,
+    FulfilmentRenewView,
+    FulfilmentReleaseView,
+    FulfilmentStatusView,
+    DeliveryRoutePlanView,
+    SalesReportView,
 )
 
 # Router for regular Orders
@@ -40,6 +49,25 @@ urlpatterns = [
     # -------------------------------
     path("summary/", OrderSummaryView.as_view(), name="order-summary"),
 
+    # -------------------------------
+    # 📤 EXPORT (invoicing)
+    # -------------------------------
+    path("export/", OrderExportView.as_view(), name="order-export"),
+
+    # -------------------------------
+    # 🚚 FULFILMENT QUEUE (logistics)
+    # -------------------------------
+    path("fulfilment/claim/", FulfilmentClaimView.as_view(), name="fulfilment-claim"),
+    path("fulfilment/renew/", FulfilmentRenewView.as_view(), name="fulfilment-renew"),
+    path("fulfilment/release/", FulfilmentReleaseView.as_view(), name="fulfilment-release"),
+    path("fulfilment/<int:pk>/status/", FulfilmentStatusView.as_view(), name="fulfilment-status"),
+    path("routes/plan/", DeliveryRoutePlanView.as_view(), name="delivery-route-plan"),
+
+    # -------------------------------
+    # 📊 SALES REPORTS (rollups)
+    # -------------------------------
+    path("reports/sales/<str:dimension>/", SalesReportView.as_view(), name="sales-report"),
+
     # -------------------------------
     # 🧠 SMART LIST ENDPOINTS
     # -------------------------------
@@ -64,6 +92,11 @@ urlpatterns = [
     path('support/messages/', support_message, name='support_message'),
     path("notifications/", NotificationListView.as_view(), name="notifications"),
     path("notifications/<int:pk>/mark_read/", mark_notification_read, name="mark_notification_read"),
+    path("notifications/mark_read/", mark_notifications_read, name="mark_notifications_read"),
+    path("notifications/mark_all_read/", mark_all_notifications_read, name="mark_all_notifications_read"),
+    path("notifications/unread_count/", notification_unread_count, name="notification_unread_count"),
+    path("notifications/stream/", notification_stream, name="notification_stream"),
+    path("notifications/stream/ticket/", notification_stream_ticket, name="notification_stream_ticket"),
 
 ]
 print("SMARTLIST URLS LOADED")
@@ -153,3 +153,24 @@ def _get_product_by_identifier(identifier):
     logger.debug("[_get_product_by_identifier] NO MATCH for identifier=%r -> returning None", identifier)
     print("[DEBUG] NO MATCH for identifier:", identifier)
     return None
+
+
+# ---------------- Counters ----------------
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+
+def increment_or_create(model, lookup, **deltas):
+    """
+    Add `deltas` to the row matching `lookup`, creating it when missing.
+    Uses UPDATE ... SET col = col + delta, so concurrent writers never lose
+    increments; a racing insert falls back to the update.
+    """
+    updates = {field: F(field) + delta for field, delta in deltas.items()}
+    if model.objects.filter(**lookup).update(**updates):
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(**lookup, **deltas)
+    except IntegrityError:
+        model.objects.filter(**lookup).update(**updates)
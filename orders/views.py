@@ -388,11 +388,13 @@ from django.utils import timezone
 
 
 from django.utils import timezone
+from django.db import transaction
 from rest_framework import generics, status, permissions
 from rest_framework.response import Response
 from django.shortcuts import get_object_or_404
 from .models import Order, OrderItem
 from .models import Cart  # ✅ adjust import if your Cart model is in a different module
+from .services import place_order, record_placed_order
 
 
 class CheckoutView(generics.GenericAPIView):
@@ -413,30 +415,16 @@ class CheckoutView(generics.GenericAPIView):
             print("[DEBUG] Cart not found:", e)
             return Response({"error": "Cart not found."}, status=status.HTTP_404_NOT_FOUND)
 
-        cart_items = list(cart.items.all())
+        cart_items = list(cart.items.select_related("product"))
         if not cart_items:
             return Response({"error": "Cart is empty."}, status=status.HTTP_400_BAD_REQUEST)
 
-        # ✅ Create new order (auto-generates order_id in model)
-        order = Order.objects.create(
-            user=user,
-            total=cart.total_price(),
-            source="cart",
-            progress=1,  # “Order Confirmed” step
-            status="pending",
-        )
+        with transaction.atomic():
+            # ✅ Create the order with all cart items (see orders/services.py)
+            order = place_order(user, [(item.product, item.quantity) for item in cart_items], source="cart")
 
-        # ✅ Add all cart items to order
-        for item in cart_items:
-            OrderItem.objects.create(
-                order=order,
-                product=item.product,
-                quantity=item.quantity,
-                price=item.product.price,
-            )
-
-        # ✅ Clear cart
-        cart.items.all().delete()
+            # ✅ Clear cart
+            cart.items.all().delete()
 
         print(f"[DEBUG] Order {order.order_id} created for {user} ({len(cart_items)} items)")
 
@@ -457,6 +445,15 @@ class CheckoutView(generics.GenericAPIView):
 
 
 # ---------------- ORDERS (viewset for CRUD on Orders) ---------------- #
+from .models import ArchivedOrder
+from .serializers import ArchivedOrderSerializer
+from .services import reorder_into_cart
+
+
+def _wants_archive(request):
+    return request.query_params.get("include_archived", "").lower() in ("1", "true", "yes")
+
+
 class OrderViewSet(viewsets.ModelViewSet):
     queryset = Order.objects.all()
     serializer_class = OrderSerializer
@@ -467,7 +464,58 @@ class OrderViewSet(viewsets.ModelViewSet):
         return self.queryset.filter(user=self.request.user).order_by("-created_at")
 
     def perform_create(self, serializer):
-        serializer.save(user=self.request.user)
+        with transaction.atomic():
+            order = serializer.save(user=self.request.user)
+            record_placed_order(order)  # rollups and outbox, as for checkout
+
+    def retrieve(self, request, *args, **kwargs):
+        """
+        GET /api/orders/user-orders/<pk>/?include_archived=true
+        Falls back to the archive only when asked and the order is no longer hot.
+        """
+        pk = kwargs.get(self.lookup_url_kwarg or self.lookup_field)
+        if _wants_archive(request) and not self.get_queryset().filter(pk=pk).exists():
+            archived = get_object_or_404(
+                ArchivedOrder.objects.prefetch_related("items__product"),
+                pk=pk,
+                user=request.user,
+            )
+            return Response(ArchivedOrderSerializer(archived, context=self.get_serializer_context()).data)
+        return super().retrieve(request, *args, **kwargs)
+
+    @action(detail=False, methods=["get"])
+    def archived(self, request):
+        """
+        GET /api/orders/user-orders/archived/
+        Paginated history of the user's archived (older, closed) orders.
+        """
+        queryset = (
+            ArchivedOrder.objects.filter(user=request.user)
+            .prefetch_related("items__product")
+            .order_by("-created_at")
+        )
+        page = self.paginate_queryset(queryset)
+        serializer = ArchivedOrderSerializer(page, many=True, context=self.get_serializer_context())
+        return self.get_paginated_response(serializer.data)
+
+    @action(detail=True, methods=["post"])
+    def reorder(self, request, pk=None):
+        """
+        POST /api/orders/user-orders/<pk>/reorder/
+        Refills the cart from a past order in one transaction. Each line is
+        added in full, partially (limited by stock) or not at all; the
+        response reports the outcome per line.
+        """
+        order = get_object_or_404(self.get_queryset(), pk=pk)
+        lines = reorder_into_cart(request.user, order)
+        added = sum(1 for line in lines if line["added"])
+        return Response(
+            {
+                "message": f"Added {added} of {len(lines)} items from {order.order_id} to your cart",
+                "lines": lines,
+            },
+            status=status.HTTP_200_OK,
+        )
 
 # ---------------- SMARTLISTS (explicit APIViews) ---------------- #
 class SmartListListCreateAPIView(APIView):
@@ -860,25 +908,9 @@ class SmartListOrderAllAPIView(APIView):
         if not items:
             return Response({"error": "Smart list is empty."}, status=status.HTTP_400_BAD_REQUEST)
 
-        total = sum((item.product.price or 0) * item.quantity for item in items)
-
-        order = Order.objects.create(
-            user=user,
-            total=total,
-            source="smartlist",
-            progress=1,
-            status="pending",
-        )
-
-        for item in items:
-            OrderItem.objects.create(
-                order=order,
-                product=item.product,
-                quantity=item.quantity,
-                price=item.product.price,
-            )
-
-        smartlist.items.all().delete()
+        with transaction.atomic():
+            order = place_order(user, [(item.product, item.quantity) for item in items], source="smartlist")
+            smartlist.items.all().delete()
 
         serializer = OrderSerializer(order, context={"request": request})
         return Response(
@@ -909,8 +941,7 @@ class OrderSummaryView(APIView):
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 from rest_framework import status
-from django.core.mail import send_mail
-from django.conf import settings
+from . import tasks
 from .serializers import SupportMessageSerializer
 
 
@@ -926,25 +957,8 @@ def support_message(request):
         subject = serializer.validated_data['subject']
         message = serializer.validated_data['message']
 
-        full_message = f"""
-        From: {name} <{email}>
-        Subject: {subject}
-
-        {message}
-        """
-
-        # ✅ Try to send email, but don’t block or fail if it doesn’t work
-        try:
-            send_mail(
-                subject=f"New Support Message from {name}",
-                message=full_message,
-                from_email=settings.DEFAULT_FROM_EMAIL,
-                recipient_list=['chiamoorder@gmail.com'],
-                fail_silently=True,  # 👈 this ensures no exception is raised
-            )
-        except Exception as e:
-            # 👇 log the error but still return success
-            print(f"[Email Error] Support message saved, but email failed: {e}")
+        # ✅ Email the support inbox from the job worker; the request doesn't wait on SMTP
+        tasks.send_support_email.delay(name, email, subject, message)
 
         # ✅ Always return success if saved successfully
         return Response(
@@ -958,20 +972,7 @@ def support_message(request):
 # orders/views.py
 
 from .models import Notification
-
-def create_order_notification(user, order, event):
-    messages = {
-        "placed": f"Your order #{order.id} has been placed successfully.",
-        "shipped": f"Good news! Order #{order.id} is on the way.",
-        "delivered": f"Your order #{order.id} has been delivered successfully.",
-    }
-    
-    Notification.objects.create(
-        user=user,
-        title="Order Update",
-        message=messages.get(event, "Order update"),
-        type="order"
-    )
+from .notifications import create_order_notification  # noqa: F401  (sent by orders/handlers.py)
 
 # orders/views.py
 from rest_framework import generics, permissions
@@ -983,20 +984,496 @@ class NotificationListView(generics.ListAPIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
-        # show only this user's notifications, newest first
-        return Notification.objects.filter(user=self.request.user).order_by("-created_at")
+        # show only this user's notifications, newest first (notification_inbox_idx)
+        queryset = Notification.objects.filter(user=self.request.user)
+        if self.request.query_params.get("unread", "").lower() in ("1", "true", "yes"):
+            queryset = queryset.filter(is_read=False)
+        return queryset.order_by("-created_at")
 
 # orders/views.py
 from rest_framework.response import Response
 from rest_framework.decorators import api_view, permission_classes
 
+from . import notifications
+
+
 @api_view(["PATCH"])
 @permission_classes([permissions.IsAuthenticated])
 def mark_notification_read(request, pk):
-    try:
-        notif = Notification.objects.get(pk=pk, user=request.user)
-        notif.is_read = True
-        notif.save()
+    # single UPDATE; only fall back to an existence check when nothing changed
+    if notifications.mark_read(request.user, [pk]):
         return Response({"detail": "Marked as read"})
-    except Notification.DoesNotExist:
-        return Response({"detail": "Not found"}, status=404)
+    if Notification.objects.filter(pk=pk, user=request.user).exists():
+        return Response({"detail": "Marked as read"})
+    return Response({"detail": "Not found"}, status=404)
+
+
+@api_view(["POST"])
+@permission_classes([permissions.IsAuthenticated])
+def mark_notifications_read(request):
+    """
+    POST /api/orders/notifications/mark_read/
+    payload: { ids: [1, 2, 3] }
+    """
+    ids = request.data.get("ids")
+    if not isinstance(ids, list) or not ids:
+        return Response({"error": "ids must be a non-empty list"}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        ids = [int(i) for i in ids]
+    except (ValueError, TypeError):
+        return Response({"error": "ids must be numbers"}, status=status.HTTP_400_BAD_REQUEST)
+
+    updated = notifications.mark_read(request.user, ids)
+    return Response({"updated": updated, "unread": notifications.unread_count(request.user)})
+
+
+@api_view(["POST"])
+@permission_classes([permissions.IsAuthenticated])
+def mark_all_notifications_read(request):
+    """
+    POST /api/orders/notifications/mark_all_read/
+    """
+    updated = notifications.mark_read(request.user)
+    return Response({"updated": updated, "unread": notifications.unread_count(request.user)})
+
+
+@api_view(["GET"])
+@permission_classes([permissions.IsAuthenticated])
+def notification_unread_count(request):
+    """
+    GET /api/orders/notifications/unread_count/  -> { unread }
+    Served from the cache / counter row, never the notification table.
+    """
+    return Response({"unread": notifications.unread_count(request.user)})
+
+# ---------------- EXPORT ---------------- #
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from chiamo_project.permissions import IsInvoicerAdmin
+from .export import parse_export_filters, stream_export, streaming_content
+
+
+class OrderExportView(APIView):
+    """
+    GET /api/orders/export/?fmt=csv|ndjson&date_from=YYYY-MM-DD&date_to=YYYY-MM-DD&status=pending,shipped&source=cart
+    Streams every matching order line (an order without lines as one row). Restricted to InvoicerAdmin.
+    (`fmt` rather than `format`, which DRF reserves for content negotiation.)
+    """
+    permission_classes = [permissions.IsAuthenticated, IsInvoicerAdmin]
+
+    def get(self, request):
+        fmt = request.query_params.get("fmt", "csv")
+        try:
+            filters = parse_export_filters(request.query_params)
+            lines, content_type = stream_export(fmt, filters)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        response = StreamingHttpResponse(streaming_content(request, lines), content_type=content_type)
+        filename = f"orders-{timezone.now():%Y%m%d-%H%M%S}.{fmt}"
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        return response
+
+
+# ---------------- FULFILMENT QUEUE ---------------- #
+from chiamo_project.permissions import IsLogisticsAdmin
+from . import fulfilment
+from .serializers import FulfilmentOrderSerializer
+
+
+def _order_ids(request):
+    ids = request.data.get("order_ids")
+    if not isinstance(ids, list) or not ids:
+        return None
+    try:
+        return [int(i) for i in ids]
+    except (ValueError, TypeError):
+        return None
+
+
+def _lease_seconds(request):
+    """`lease_seconds` from the payload, None for the default; ValueError unless 1..MAX_LEASE_SECONDS."""
+    lease_seconds = request.data.get("lease_seconds")
+    if lease_seconds in (None, ""):
+        return None
+    if not isinstance(lease_seconds, (int, str)) or not 1 <= int(lease_seconds) <= fulfilment.MAX_LEASE_SECONDS:
+        raise ValueError(f"invalid lease_seconds {lease_seconds!r}")
+    return int(lease_seconds)
+
+
+class FulfilmentClaimView(APIView):
+    """
+    POST /api/orders/fulfilment/claim/
+    payload: { batch_size: n, lease_seconds: s }
+    Claims the next batch of pending/processing orders for the caller.
+    Concurrent callers always receive disjoint batches.
+    """
+    permission_classes = [permissions.IsAuthenticated, IsLogisticsAdmin]
+
+    def post(self, request):
+        try:
+            batch_size = int(request.data.get("batch_size", 10))
+        except (ValueError, TypeError):
+            return Response({"error": "batch_size must be a number"}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            lease_seconds = _lease_seconds(request)
+        except ValueError:
+            return Response(
+                {"error": f"lease_seconds must be between 1 and {fulfilment.MAX_LEASE_SECONDS}"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        orders = fulfilment.claim_orders(request.user, batch_size, lease_seconds)
+        serializer = FulfilmentOrderSerializer(orders, many=True, context={"request": request})
+        return Response({"count": len(orders), "orders": serializer.data}, status=status.HTTP_200_OK)
+
+
+class FulfilmentRenewView(APIView):
+    """
+    POST /api/orders/fulfilment/renew/
+    payload: { order_ids: [...], lease_seconds: s }
+    """
+    permission_classes = [permissions.IsAuthenticated, IsLogisticsAdmin]
+
+    def post(self, request):
+        ids = _order_ids(request)
+        if ids is None:
+            return Response({"error": "order_ids must be a non-empty list"}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            lease_seconds = _lease_seconds(request)
+        except ValueError:
+            return Response(
+                {"error": f"lease_seconds must be between 1 and {fulfilment.MAX_LEASE_SECONDS}"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        renewed = fulfilment.renew_claims(request.user, ids, lease_seconds)
+        return Response({"renewed": renewed}, status=status.HTTP_200_OK)
+
+
+class FulfilmentReleaseView(APIView):
+    """
+    POST /api/orders/fulfilment/release/
+    payload: { order_ids: [...] }
+    """
+    permission_classes = [permissions.IsAuthenticated, IsLogisticsAdmin]
+
+    def post(self, request):
+        ids = _order_ids(request)
+        if ids is None:
+            return Response({"error": "order_ids must be a non-empty list"}, status=status.HTTP_400_BAD_REQUEST)
+
+        released = fulfilment.release_claims(request.user, ids)
+        return Response({"released": released}, status=status.HTTP_200_OK)
+
+
+class FulfilmentStatusView(APIView):
+    """
+    POST /api/orders/fulfilment/<pk>/status/
+    payload: { status: "shipped", progress: n }
+    Only the worker holding a live claim may move the order.
+    """
+    permission_classes = [permissions.IsAuthenticated, IsLogisticsAdmin]
+
+    def post(self, request, pk):
+        new_status = request.data.get("status")
+        if new_status not in dict(Order.STATUS_CHOICES):
+            return Response({"error": "Invalid status"}, status=status.HTTP_400_BAD_REQUEST)
+
+        progress = request.data.get("progress")
+        try:
+            progress = int(progress) if progress is not None else None
+        except (ValueError, TypeError):
+            return Response({"error": "progress must be a number"}, status=status.HTTP_400_BAD_REQUEST)
+        if progress is not None and not 1 <= progress <= fulfilment.PROGRESS_STEPS:
+            return Response(
+                {"error": f"progress must be between 1 and {fulfilment.PROGRESS_STEPS}"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        order = fulfilment.update_claimed_status(request.user, pk, new_status, progress)
+        if order is None:
+            return Response({"error": "You do not hold a claim on this order"}, status=status.HTTP_409_CONFLICT)
+
+        return Response(
+            {"id": order.id, "order_id": order.order_id, "status": order.status, "progress": order.progress},
+            status=status.HTTP_200_OK,
+        )
+
+
+# ---------------- DELIVERY ROUTES ---------------- #
+from django.conf import settings
+from . import routing
+
+
+class DeliveryRoutePlanView(APIView):
+    """
+    GET /api/orders/routes/plan/?capacity=25&depot_lat=&depot_lng=
+    Splits open (pending/processing) orders into vehicle runs and orders each run.
+    Nothing is saved; staff claim the orders through the fulfilment queue.
+    """
+    permission_classes = [permissions.IsAuthenticated, IsLogisticsAdmin]
+
+    def get(self, request):
+        params = request.query_params
+        try:
+            capacity = int(params.get("capacity", routing.DEFAULT_CAPACITY))
+            depot = (
+                float(params.get("depot_lat", settings.ROUTE_DEPOT_LAT)),
+                float(params.get("depot_lng", settings.ROUTE_DEPOT_LNG)),
+            )
+        except (ValueError, TypeError):
+            return Response({"error": "capacity, depot_lat and depot_lng must be numbers"}, status=status.HTTP_400_BAD_REQUEST)
+        if not 1 <= capacity <= routing.MAX_CAPACITY:
+            return Response(
+                {"error": f"capacity must be between 1 and {routing.MAX_CAPACITY}"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if not (-90 <= depot[0] <= 90 and -180 <= depot[1] <= 180):
+            return Response({"error": "depot_lat/depot_lng out of range"}, status=status.HTTP_400_BAD_REQUEST)
+
+        routes, unrouted = routing.plan_routes(depot, capacity)
+        return Response({
+            "depot": {"latitude": depot[0], "longitude": depot[1]},
+            "vehicles": len(routes),
+            "total_distance_km": round(sum(route.distance_km for route in routes), 2),
+            "routes": [
+                {
+                    "vehicle": number,
+                    "distance_km": round(route.distance_km, 2),
+                    "return_km": round(route.return_km, 2),
+                    "stops": [
+                        {
+                            "customer_id": stop.customer_id,
+                            "business_name": stop.business_name,
+                            "location": stop.location,
+                            "latitude": stop.latitude,
+                            "longitude": stop.longitude,
+                            "order_ids": stop.order_ids,
+                            "leg_km": round(leg, 2),
+                        }
+                        for stop, leg in zip(route.stops, route.legs_km)
+                    ],
+                }
+                for number, route in enumerate(routes, start=1)
+            ],
+            "unrouted_order_ids": unrouted,
+        }, status=status.HTTP_200_OK)
+
+
+# ---------------- SALES REPORTS ---------------- #
+from datetime import timedelta
+from django.utils.dateparse import parse_date
+from . import rollups
+
+SALES_REPORTS = {
+    "products": rollups.sales_by_product,
+    "categories": rollups.sales_by_category,
+    "customers": rollups.sales_by_customer,
+}
+
+
+class SalesReportView(APIView):
+    """
+    GET /api/orders/reports/sales/<daily|products|categories|customers>/?date_from=&date_to=&limit=
+    Reads the daily rollup tables only, never Order/OrderItem.
+    Defaults to the last 30 days. Restricted to InvoicerAdmin.
+    """
+    permission_classes = [permissions.IsAuthenticated, IsInvoicerAdmin]
+
+    def get(self, request, dimension):
+        if dimension != "daily" and dimension not in SALES_REPORTS:
+            return Response({"detail": "Unknown report."}, status=status.HTTP_404_NOT_FOUND)
+
+        today = timezone.localdate()
+        raw_from = request.query_params.get("date_from")
+        raw_to = request.query_params.get("date_to")
+        try:
+            date_from = parse_date(raw_from) if raw_from else today - timedelta(days=30)
+            date_to = parse_date(raw_to) if raw_to else today
+        except ValueError:  # well formed but not a real date, e.g. 2024-02-30
+            date_from = date_to = None
+        if date_from is None or date_to is None:
+            return Response({"error": "Dates must be valid YYYY-MM-DD dates"}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            limit = int(request.query_params.get("limit", 50))
+        except (ValueError, TypeError):
+            return Response({"error": "limit must be a number"}, status=status.HTTP_400_BAD_REQUEST)
+        if not 1 <= limit <= 500:
+            return Response({"error": "limit must be between 1 and 500"}, status=status.HTTP_400_BAD_REQUEST)
+
+        if dimension == "daily":
+            rows = rollups.sales_by_day(date_from, date_to)
+        else:
+            rows = SALES_REPORTS[dimension](date_from, date_to, limit)
+
+        return Response({
+            "dimension": dimension,
+            "date_from": date_from,
+            "date_to": date_to,
+            "results": rows,
+        }, status=status.HTTP_200_OK)
+
+
+# ---------------- NOTIFICATION STREAM (SSE, ASGI only) ---------------- #
+import asyncio
+import time
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.db import connection
+from django.http import JsonResponse
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, TokenError
+from rest_framework_simplejwt.tokens import AccessToken
+from rest_framework_simplejwt.utils import get_md5_hash_password
+from customers import auth_cache
+from customers.authentication import CachedJWTAuthentication
+from . import streams
+
+STREAM_TICKET_SALT = "orders.notification_stream"
+
+
+def _db_call(func):
+    """
+    Run a sync function from a stream on the shared thread pool and close its
+    DB connection afterwards, so an open stream holds neither a thread nor a
+    connection between calls.
+    """
+    def call(*args):
+        try:
+            return func(*args)
+        finally:
+            connection.close()
+
+    return sync_to_async(call, thread_sensitive=False)
+
+
+def _password_fingerprint(user):
+    return get_md5_hash_password(user.password)
+
+
+def _stream_user(user_id, fingerprint):
+    """
+    The user behind a stream, through the same cache as request.user; None
+    once they are deleted, deactivated or have changed their password.
+    """
+    user, stamp = auth_cache.get_user(user_id)
+    if user is None:
+        user = get_user_model().objects.filter(pk=user_id).first()
+        if user is None:
+            return None
+        auth_cache.set_user(user, stamp)
+    if not user.is_active or _password_fingerprint(user) != fingerprint:
+        return None
+    return user
+
+
+def _authenticate_stream(request):
+    """
+    (user id, password fingerprint, stream deadline) from a ?ticket= (EventSource
+    cannot set headers) or an Authorization: Bearer header; None if neither is valid.
+    """
+    ticket = request.GET.get("ticket")
+    if ticket:
+        try:
+            data = signing.loads(ticket, salt=STREAM_TICKET_SALT, max_age=settings.NOTIFICATION_STREAM_TICKET_SECONDS)
+        except signing.BadSignature:
+            return None
+        if _stream_user(data["user_id"], data["pw"]) is None:
+            return None
+        lifetime = settings.SIMPLE_JWT["ACCESS_TOKEN_LIFETIME"].total_seconds()
+        return data["user_id"], data["pw"], time.time() + lifetime
+
+    header = request.headers.get("Authorization", "")
+    if not header.startswith("Bearer "):
+        return None
+    try:
+        token = AccessToken(header[len("Bearer "):])
+        user = CachedJWTAuthentication().get_user(token)  # inactive / password-changed checks
+    except (TokenError, AuthenticationFailed):
+        return None
+    return user.pk, _password_fingerprint(user), token["exp"]
+
+
+@api_view(["POST"])
+@permission_classes([permissions.IsAuthenticated])
+def notification_stream_ticket(request):
+    """
+    POST /api/orders/notifications/stream/ticket/  -> { ticket, expires_in }
+    A short-lived signed ticket for ?ticket= on the stream, so the access token
+    never appears in a URL (and so in access logs).
+    """
+    ticket = signing.dumps(
+        {"user_id": request.user.pk, "pw": _password_fingerprint(request.user)}, salt=STREAM_TICKET_SALT
+    )
+    return Response({"ticket": ticket, "expires_in": settings.NOTIFICATION_STREAM_TICKET_SECONDS})
+
+
+def _missed_notifications(user_id, last_event_id):
+    return [
+        streams.notification_event(n)
+        for n in Notification.objects.filter(user_id=user_id, id__gt=last_event_id).order_by("id")[:50]
+    ]
+
+
+async def _notification_events(user_id, fingerprint, last_event_id, expires_at):
+    queue = streams.broker.subscribe(user_id)
+    try:
+        yield "retry: 5000\n\n"
+        if last_event_id:
+            for event in await _db_call(_missed_notifications)(user_id, last_event_id):
+                yield streams.format_sse(event)
+
+        checked_at = time.monotonic()
+        while True:
+            remaining = expires_at - time.time()
+            if remaining <= 0:
+                return  # client reconnects with a fresh ticket
+            try:
+                event = await asyncio.wait_for(queue.get(), min(streams.HEARTBEAT_SECONDS, remaining))
+            except asyncio.TimeoutError:
+                # re-check the account now and then (through the user cache, so
+                # rarely the DB): deactivation or a password change ends the stream
+                if time.monotonic() - checked_at >= settings.NOTIFICATION_STREAM_RECHECK_SECONDS:
+                    if await _db_call(_stream_user)(user_id, fingerprint) is None:
+                        return
+                    checked_at = time.monotonic()
+                yield ": keep-alive\n\n"
+                continue
+            yield streams.format_sse(event)
+    finally:
+        streams.broker.unsubscribe(user_id, queue)
+
+
+async def notification_stream(request):
+    """
+    GET /api/orders/notifications/stream/?ticket=<from stream/ticket/>
+    Server-Sent Events stream of the user's new notifications.
+    Needs the ASGI server (see Procfile) and Redis: notifications are created
+    in the worker/jobs processes and only reach the web processes through
+    Redis pub/sub, so without REDIS_URL the stream answers 503 and clients
+    poll the notification list. Non-browser clients may send
+    Authorization: Bearer <access> instead of a ticket.
+    """
+    if not settings.REDIS_URL:
+        return JsonResponse({"detail": "Notification stream unavailable; poll notifications instead"}, status=503)
+
+    auth = await _db_call(_authenticate_stream)(request)
+    if auth is None:
+        return JsonResponse({"detail": "Invalid or expired ticket"}, status=401)
+    user_id, fingerprint, expires_at = auth
+
+    try:
+        last_event_id = int(request.headers.get("Last-Event-ID") or request.GET.get("last_event_id") or 0)
+    except ValueError:
+        last_event_id = 0
+
+    response = StreamingHttpResponse(
+        _notification_events(user_id, fingerprint, last_event_id, expires_at),
+        content_type="text/event-stream",
+    )
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response